@@ -104,7 +104,14 @@ class ActionsRegistrar(ResourceRegistrar):
 
         return actions
 
-    def _register_action(self, pack, action):
+    def _get_action_model(self, pack, action, existing_actions=None):
+        """
+        Load and validate the action from the provided metadata file.
+
+        :param existing_actions: Actions of this pack which are already in the database keyed by
+                                 name. If not provided, the action is looked up in the database.
+        :type existing_actions: ``dict``
+        """
         content = self._meta_loader.load(action)
         pack_field = content.get('pack', None)
         if not pack_field:
@@ -120,7 +127,11 @@ class ActionsRegistrar(ResourceRegistrar):
         model = ActionAPI.to_model(action_api)
 
         action_ref = ResourceReference.to_string_reference(pack=pack, name=str(content['name']))
-        existing = action_utils.get_action_by_ref(action_ref)
+        if existing_actions is not None:
+            existing = existing_actions.get(str(content['name']), None)
+        else:
+            existing = action_utils.get_action_by_ref(action_ref)
+
         if not existing:
             LOG.debug('Action %s not found. Creating new one with: %s', action_ref, content)
         else:
@@ -128,6 +139,11 @@ class ActionsRegistrar(ResourceRegistrar):
                       action_ref, existing, model)
             model.id = existing.id
 
+        return model
+
+    def _register_action(self, pack, action):
+        model = self._get_action_model(pack=pack, action=action)
+
         try:
             model = Action.add_or_update(model)
             extra = {'action_db': model}
@@ -137,19 +153,27 @@ class ActionsRegistrar(ResourceRegistrar):
             raise
 
     def _register_actions_from_pack(self, pack, actions):
-        registered_count = 0
+        existing_actions = self.get_existing_resources(resource_cls=Action, pack=pack)
+        models = []
 
         for action in actions:
             try:
                 LOG.debug('Loading action from %s.', action)
-                self._register_action(pack, action)
+                model = self._get_action_model(pack=pack, action=action,
+                                               existing_actions=existing_actions)
             except Exception:
                 LOG.exception('Unable to register action: %s', action)
                 continue
-            else:
-                registered_count += 1
 
-        return registered_count
+            models.append((action, model))
+
+        saved = self.save_resources(resource_cls=Action, resources=models)
+
+        for action, model in saved:
+            extra = {'action_db': model}
+            LOG.audit('Action updated. Action %s from %s.', model, action, extra=extra)
+
+        return len(saved)
 
 
 def register_actions(packs_base_paths=None, pack_dir=None):
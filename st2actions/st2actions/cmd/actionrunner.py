@@ -10,6 +10,21 @@ from st2common.service_setup import teardown as common_teardown
 
 LOG = logging.getLogger(__name__)
 
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.action',
+    'st2common.models.db.auth',
+    'st2common.models.db.execution',
+    'st2common.models.db.executionstate',
+    'st2common.models.db.keyvalue',
+    'st2common.models.db.liveaction',
+    'st2common.models.db.outbox',
+    'st2common.models.db.policy',
+    'st2common.models.db.runner',
+    'st2common.models.db.trace',
+    'st2common.models.db.trigger'
+]
+
 
 eventlet.monkey_patch(
     os=True,
@@ -21,7 +36,8 @@ eventlet.monkey_patch(
 
 def _setup():
     common_setup(service='actionrunner', config=config, setup_db=True, register_mq_exchanges=True,
-                 register_signal_handlers=True)
+                 register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
 
 
 def _run_worker():
@@ -12,6 +12,15 @@ from st2actions.notifier import scheduler
 
 LOG = logging.getLogger(__name__)
 
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.action',
+    'st2common.models.db.execution',
+    'st2common.models.db.liveaction',
+    'st2common.models.db.trace',
+    'st2common.models.db.trigger'
+]
+
 
 eventlet.monkey_patch(
     os=True,
@@ -23,7 +32,8 @@ eventlet.monkey_patch(
 
 def _setup():
     common_setup(service='notifier', config=config, setup_db=True, register_mq_exchanges=True,
-                 register_signal_handlers=True)
+                 register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
 
 
 def _run_worker():
@@ -38,6 +38,12 @@ RESERVED_QUERY_PARAMS = {
     'sort': 'order_by'
 }
 
+# Values of the "total_count" query parameter
+TOTAL_COUNT_EXACT = 'exact'
+TOTAL_COUNT_ESTIMATED = 'estimated'
+TOTAL_COUNT_NONE = 'none'
+TOTAL_COUNT_MODES = [TOTAL_COUNT_EXACT, TOTAL_COUNT_ESTIMATED, TOTAL_COUNT_NONE]
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ResourceController(rest.RestController):
@@ -51,6 +57,14 @@ class ResourceController(rest.RestController):
     # Maximum value of limit which can be specified by user
     max_limit = 100
 
+    # Number of objects after which counting stops when an estimated total count is requested
+    max_estimated_total_count = 10000
+
+    # True to build the API objects of the listings directly from the raw MongoDB documents
+    # without constructing the DB model instances. API model class needs to support it (see
+    # "BaseAPI.from_raw_document").
+    use_raw_documents = False
+
     query_options = {
         'sort': []
     }
@@ -99,12 +113,24 @@ class ResourceController(rest.RestController):
             sort_value = direction + self.supported_filters[sort_key]
             db_sort_values.append(sort_value)
 
-        default_sort_values = copy.copy(self.query_options.get('sort'))
+        default_sort_values = copy.copy(self.query_options.get('sort')) or []
         kwargs['sort'] = db_sort_values if db_sort_values else default_sort_values
 
+        # Unique key as the last sort key makes the order stable which is needed to retrieve the
+        # next page with a cursor.
+        if 'id' not in [value.lstrip('+-') for value in kwargs['sort']]:
+            kwargs['sort'].append('id')
+
         # TODO: To protect us from DoS, we need to make max_limit mandatory
         offset = int(kwargs.pop('offset', 0))
         limit = kwargs.pop('limit', None)
+        after = kwargs.pop('after', None)
+        total_count = kwargs.pop('total_count', None) or TOTAL_COUNT_EXACT
+        include_fields = self._get_include_fields(kwargs.pop('include_attributes', None))
+
+        if total_count not in TOTAL_COUNT_MODES:
+            raise ValueError('Invalid total_count value "%s". Valid values are: %s' %
+                             (total_count, ', '.join(TOTAL_COUNT_MODES)))
 
         if limit and int(limit) > self.max_limit:
             limit = self.max_limit
@@ -126,21 +152,99 @@ class ResourceController(rest.RestController):
 
         LOG.info('GET all %s with filters=%s', pecan.request.path, filters)
 
-        instances = self.access.query(exclude_fields=exclude_fields, **filters)
+        query_include_fields = self._get_query_include_fields(include_fields=include_fields)
+        instances = self.access.query(exclude_fields=exclude_fields,
+                                      include_fields=query_include_fields, **filters)
+
+        if after:
+            page_instances = self.access.query(exclude_fields=exclude_fields,
+                                               include_fields=query_include_fields, after=after,
+                                               **filters)
+        else:
+            page_instances = instances
 
         if limit:
             pecan.response.headers['X-Limit'] = str(limit)
-        pecan.response.headers['X-Total-Count'] = str(instances.count())
+
+        if total_count != TOTAL_COUNT_NONE:
+            count = self._get_total_count(instances=instances, mode=total_count)
+            pecan.response.headers['X-Total-Count'] = str(count)
 
         from_model_kwargs = self._get_from_model_kwargs_for_request(request=pecan.request)
 
+        if self.use_raw_documents:
+            page_instances = page_instances.as_pymongo()
+            from_model = self.model.from_raw_document
+            from_partial_model = self.model.from_partial_raw_document
+        else:
+            from_model = self.model.from_model
+            from_partial_model = self.model.from_partial_model
+
         result = []
-        for instance in instances[offset:eop]:
-            item = self.model.from_model(instance, **from_model_kwargs)
+        instance = None
+        instances_page = self._process_instances(page_instances[offset:eop],
+                                                 include_fields=include_fields,
+                                                 exclude_fields=exclude_fields)
+        for instance in instances_page:
+            if include_fields:
+                item = from_partial_model(instance, include_fields=include_fields,
+                                          **from_model_kwargs)
+            else:
+                item = from_model(instance, **from_model_kwargs)
             result.append(item)
 
+        # Full page, there might be more objects
+        if limit and result and len(result) == int(limit):
+            cursor = self.access.get_pagination_cursor(queryset=page_instances, instance=instance)
+            pecan.response.headers['X-Next-Cursor'] = cursor
+
         return result
 
+    def _get_include_fields(self, include_attributes):
+        """
+        Parse and validate the comma delimited value of the "include_attributes" query parameter.
+
+        :rtype: ``list``
+        """
+        if not include_attributes:
+            return []
+
+        include_fields = [field.strip() for field in include_attributes.split(',')
+                          if field.strip()]
+        valid_attributes = list(self.access._get_impl().model._fields.keys()) + ['id']
+
+        for field in include_fields:
+            if field.split('.')[0] not in valid_attributes:
+                raise ValueError('Invalid attribute "%s" in include_attributes. Valid attributes '
+                                 'are: %s' % (field, ', '.join(sorted(valid_attributes))))
+
+        return include_fields
+
+    def _get_query_include_fields(self, include_fields):
+        """
+        Retrieve the fields which are retrieved from the database for the requested fields.
+        Controllers which need additional fields to build the API objects can override it.
+
+        :rtype: ``list``
+        """
+        return include_fields
+
+    def _process_instances(self, instances, include_fields=None, exclude_fields=None):
+        """
+        Process the retrieved instances (model instances or raw documents) before they are
+        converted to the API objects.
+        """
+        return instances
+
+    def _get_total_count(self, instances, mode):
+        if mode == TOTAL_COUNT_ESTIMATED:
+            # Counting all the matching objects of a large collection is expensive, the count is
+            # exact up to max_estimated_total_count objects.
+            instances = instances.limit(self.max_estimated_total_count)
+            return instances.count(with_limit_and_skip=True)
+
+        return instances.count()
+
     def _get_one(self, id, exclude_fields=None):
         # Note: This is here for backward compatibility reasons
         return self._get_one_by_id(id=id, exclude_fields=exclude_fields)
@@ -159,6 +263,8 @@ class ResourceController(rest.RestController):
             msg = 'Unable to identify resource with id "%s".' % id
             pecan.abort(http_client.NOT_FOUND, msg)
 
+        instance = self._process_instances([instance], exclude_fields=exclude_fields)[0]
+
         from_model_kwargs = self._get_from_model_kwargs_for_request(request=pecan.request)
         result = self.model.from_model(instance, **from_model_kwargs)
         LOG.debug('GET %s with id=%s, client_result=%s', pecan.request.path, id, result)
@@ -264,6 +370,11 @@ class ContentPackResourceController(ResourceController):
             for item in result:
                 pack = getattr(item, 'pack', None)
                 name = getattr(item, 'name', None)
+
+                # Reference can't be computed when only some of the attributes are requested
+                if not pack or not name:
+                    continue
+
                 item.ref = ResourceReference(pack=pack, name=name).ref
 
         return result
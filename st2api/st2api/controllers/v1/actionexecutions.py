@@ -20,6 +20,7 @@ import jsonschema
 from oslo_config import cfg
 import pecan
 from pecan import abort
+from pecan import Response
 from six.moves import http_client
 
 from st2api.controllers.base import BaseRestControllerMixin
@@ -33,11 +34,13 @@ from st2common.exceptions.trace import TraceNotFoundException
 from st2common.models.api.action import LiveActionAPI
 from st2common.models.api.base import jsexpose
 from st2common.models.api.execution import ActionExecutionAPI
+from st2common.models.db.execution import SHARED_FIELDS
 from st2common.models.db.liveaction import LiveActionDB
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.execution import ActionExecution
 from st2common.services import action as action_service
 from st2common.services import executions as execution_service
+from st2common.services import resultstorage
 from st2common.rbac.utils import request_user_is_admin
 from st2common.util import jsonify
 from st2common.util import isotime
@@ -148,10 +151,20 @@ class ActionExecutionsControllerMixin(BaseRestControllerMixin):
 
         :rtype: ``dict``
         """
-        fields = ['result']
-        action_exec_db = self.access.impl.model.objects.filter(id=id).only(*fields).get()
+        action_exec_db = self._get_result_fields(id=id)
+
+        if action_exec_db.result_ref:
+            return resultstorage.load_result(result_ref=action_exec_db.result_ref)
+
         return action_exec_db.result
 
+    def _get_result_fields(self, id):
+        fields = ['result', 'result_ref', 'shared_fields', 'liveaction']
+        action_exec_db = self.access.impl.model.objects.filter(id=id).only(*fields).get()
+        self.access.populate_shared_fields([action_exec_db], fields=['result'])
+
+        return action_exec_db
+
     def _get_children(self, id_, depth=-1, result_fmt=None):
         # make sure depth is int. Url encoding will make it a string and needs to
         # be converted back in that case.
@@ -161,10 +174,35 @@ class ActionExecutionsControllerMixin(BaseRestControllerMixin):
         descendants = execution_service.get_descendants(actionexecution_id=id_,
                                                         descendant_depth=depth,
                                                         result_fmt=result_fmt)
+        self.access.populate_shared_fields(descendants)
 
         return [self.model.from_model(descendant, from_model_kwargs) for
                 descendant in descendants]
 
+    def _get_query_include_fields(self, include_fields):
+        include_attributes = [field.split('.')[0] for field in include_fields or []]
+
+        # Needed to fill in the fields which are stored in the liveactions
+        if set(include_attributes) & set(SHARED_FIELDS):
+            include_fields = include_fields + ['shared_fields', 'liveaction.id']
+
+        # Needed to mask the secret parameters. Those fields are removed from the API objects
+        # unless they have been requested.
+        if 'parameters' in include_attributes:
+            for field in ['action.parameters', 'runner.runner_parameters']:
+                if field.split('.')[0] not in include_attributes:
+                    include_fields = include_fields + [field]
+
+        return include_fields
+
+    def _process_instances(self, instances, include_fields=None, exclude_fields=None):
+        fields = [field for field in SHARED_FIELDS if field not in (exclude_fields or [])]
+        if include_fields:
+            include_attributes = [field.split('.')[0] for field in include_fields]
+            fields = [field for field in fields if field in include_attributes]
+
+        return self.access.populate_shared_fields(list(instances), fields=fields)
+
     def _validate_exclude_fields(self, exclude_fields):
         """
         Validate that provided exclude fields are valid.
@@ -205,11 +243,39 @@ class ActionExecutionAttributeController(ActionExecutionsControllerMixin):
         """
         fields = [attribute]
         fields = self._validate_exclude_fields(fields)
+
+        if attribute == 'result':
+            return self._get_result_object(id=id)
+
         action_exec_db = self.access.impl.model.objects.filter(id=id).only(*fields).get()
         result = getattr(action_exec_db, attribute, None)
         return result
 
 
+class ActionExecutionResultController(ActionExecutionsControllerMixin):
+    # Response is returned as is, the stored result is already serialized
+    @jsexpose(arg_types=[str], content_type='application/octet-stream')
+    def get(self, id):
+        """
+        Retrieve the result of the provided action execution. Results which are stored outside of
+        the execution are streamed without being deserialized.
+
+        Handles requests:
+
+            GET /actionexecutions/<id>/result
+
+        :rtype: ``dict``
+        """
+        action_exec_db = self._get_result_fields(id=id)
+
+        if action_exec_db.result_ref:
+            app_iter = resultstorage.iter_serialized_result(result_ref=action_exec_db.result_ref)
+        else:
+            app_iter = [jsonify.json_encode(action_exec_db.result, indent=None)]
+
+        return Response(content_type='application/json', app_iter=app_iter)
+
+
 class ActionExecutionReRunController(ActionExecutionsControllerMixin, ResourceController):
     supported_filters = {}
     exclude_fields = [
@@ -264,6 +330,7 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
 
     children = ActionExecutionChildrenController()
     attribute = ActionExecutionAttributeController()
+    result = ActionExecutionResultController()
     re_run = ActionExecutionReRunController()
 
     # ResourceController attributes
@@ -275,6 +342,7 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
         'timestamp_gt': lambda value: isotime.parse(value=value),
         'timestamp_lt': lambda value: isotime.parse(value=value)
     }
+    use_raw_documents = True
 
     @jsexpose()
     def get_all(self, exclude_attributes=None, **kw):
@@ -313,8 +381,14 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
             exclude_fields = None
 
         exclude_fields = self._validate_exclude_fields(exclude_fields=exclude_fields)
+        execution_api = self._get_one(id=id, exclude_fields=exclude_fields)
+
+        # Result which is stored outside of the execution is only loaded when it's requested
+        result_ref = getattr(execution_api, 'result_ref', None)
+        if result_ref and 'result' not in (exclude_fields or []):
+            execution_api.result = resultstorage.load_result(result_ref=result_ref)
 
-        return self._get_one(id=id, exclude_fields=exclude_fields)
+        return execution_api
 
     @jsexpose(body_cls=LiveActionAPI, status_code=http_client.CREATED)
     def post(self, liveaction):
@@ -356,17 +430,24 @@ class ActionExecutionsController(ActionExecutionsControllerMixin, ResourceContro
                   'Action cannot be canceled. State = %s.' % liveaction_db.status)
             return
 
-        liveaction_db.status = 'canceled'
-        liveaction_db.end_timestamp = date_utils.get_datetime_utc_now()
-        liveaction_db.result = {'message': 'Action canceled by user.'}
         try:
-            LiveAction.add_or_update(liveaction_db)
+            # Compare-and-set so an execution which has completed in the meantime isn't canceled.
+            updated_liveaction_db = LiveAction.update(
+                liveaction_db.id, expected_status=liveaction_db.status, status='canceled',
+                end_timestamp=date_utils.get_datetime_utc_now(),
+                result={'message': 'Action canceled by user.'})
         except:
             LOG.exception('Failed updating status to canceled for liveaction %s.',
                           liveaction_db.id)
             abort(http_client.INTERNAL_SERVER_ERROR, 'Failed canceling execution.')
             return
 
+        if not updated_liveaction_db:
+            abort(http_client.OK, 'Action cannot be canceled. State has changed.')
+            return
+
+        liveaction_db = updated_liveaction_db
+
         execution_db = execution_service.update_execution(liveaction_db)
         from_model_kwargs = self._get_from_model_kwargs_for_request(request=pecan.request)
         return ActionExecutionAPI.from_model(execution_db, from_model_kwargs)
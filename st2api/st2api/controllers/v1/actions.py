@@ -67,6 +67,7 @@ class ActionsController(resource.ContentPackResourceController):
     }
 
     include_reference = True
+    use_raw_documents = True
 
     def __init__(self, *args, **kwargs):
         super(ActionsController, self).__init__(*args, **kwargs)
@@ -80,6 +80,11 @@ class PolicyTypeController(resource.ResourceController):
             for item in result:
                 resource_type = getattr(item, 'resource_type', None)
                 name = getattr(item, 'name', None)
+
+                # Reference can't be computed when only some of the attributes are requested
+                if not resource_type or not name:
+                    continue
+
                 item.ref = PolicyTypeReference(resource_type=resource_type, name=name).ref
 
         return result
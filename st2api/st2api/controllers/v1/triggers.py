@@ -368,6 +368,7 @@ class TriggerInstanceController(TriggerInstanceControllerMixin, resource.Resourc
     query_options = {
         'sort': ['-occurrence_time', 'trigger']
     }
+    use_raw_documents = True
 
     def __init__(self):
         super(TriggerInstanceController, self).__init__()
@@ -31,12 +31,12 @@
 import eventlet
 
 from kombu import Connection, Queue
-from kombu.mixins import ConsumerMixin
 from oslo_config import cfg
 
 from st2common.models.api.action import LiveActionAPI
 from st2common.models.api.execution import ActionExecutionAPI
-from st2common.transport import liveaction, execution, publishers
+from st2common.transport import liveaction, execution, publishers, serializers
+from st2common.transport.consumers import ConsumerMixin
 from st2common.transport import utils as transport_utils
 from st2common import log as logging
 
@@ -66,14 +66,14 @@ class Listener(ConsumerMixin):
         return [
             consumer(queues=[execution.get_queue(routing_key=publishers.ANY_RK,
                                                  exclusive=True)],
-                     accept=['pickle'],
+                     accept=serializers.ACCEPTED_SERIALIZERS,
                      callbacks=[self.processor(ActionExecutionAPI)]),
 
             consumer(queues=[Queue(None,
                                    liveaction.LIVEACTION_XCHG,
                                    routing_key=publishers.ANY_RK,
                                    exclusive=True)],
-                     accept=['pickle'],
+                     accept=serializers.ACCEPTED_SERIALIZERS,
                      callbacks=[self.processor(LiveActionAPI)])
         ]
 
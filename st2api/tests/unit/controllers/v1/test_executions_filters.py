@@ -211,6 +211,60 @@ class TestActionExecutionFilters(FunctionalTest):
             retrieved += ids
         self.assertListEqual(sorted(retrieved), sorted(self.refs.keys()))
 
+    def test_pagination_cursor(self):
+        retrieved = []
+        page_size = 30
+        url = '/v1/executions?limit=%s' % (page_size)
+        response = self.app.get(url)
+
+        while True:
+            self.assertEqual(response.status_int, 200)
+            retrieved += [item['id'] for item in response.json]
+
+            if 'X-Next-Cursor' not in response.headers:
+                break
+
+            self.assertEqual(len(response.json), page_size)
+            self.assertEqual(response.headers['X-Total-Count'], str(self.num_records))
+            response = self.app.get('%s&after=%s' % (url, response.headers['X-Next-Cursor']))
+
+        self.assertEqual(len(retrieved), self.num_records)
+        self.assertListEqual(sorted(retrieved), sorted(self.refs.keys()))
+
+        # Pages are retrieved in the same order as with offset
+        response = self.app.get('/v1/executions')
+        self.assertListEqual(retrieved, [item['id'] for item in response.json])
+
+    def test_pagination_invalid_cursor(self):
+        response = self.app.get('/v1/executions?after=invalid', expect_errors=True)
+        self.assertEqual(response.status_int, 400)
+
+    def test_total_count(self):
+        response = self.app.get('/v1/executions?limit=10&total_count=estimated')
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual(response.headers['X-Total-Count'], str(self.num_records))
+
+        response = self.app.get('/v1/executions?limit=10&total_count=none')
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual(len(response.json), 10)
+        self.assertNotIn('X-Total-Count', response.headers)
+
+        response = self.app.get('/v1/executions?total_count=foo', expect_errors=True)
+        self.assertEqual(response.status_int, 400)
+
+    def test_include_attributes(self):
+        response = self.app.get('/v1/executions?limit=5&include_attributes=status,action.ref')
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual(len(response.json), 5)
+        self.assertEqual(response.headers['X-Total-Count'], str(self.num_records))
+
+        for item in response.json:
+            self.assertItemsEqual(item.keys(), ['id', 'status', 'action'])
+            self.assertItemsEqual(item['action'].keys(), ['ref'])
+
+        response = self.app.get('/v1/executions?include_attributes=foo', expect_errors=True)
+        self.assertEqual(response.status_int, 400)
+
     def test_datetime_range(self):
         dt_range = '2014-12-25T00:00:10Z..2014-12-25T00:00:19Z'
         response = self.app.get('/v1/executions?timestamp=%s' % dt_range)
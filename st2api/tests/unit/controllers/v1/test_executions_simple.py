@@ -27,11 +27,14 @@ except ImportError:
 import st2common.validators.api.action as action_validator
 
 from six.moves import filter
+from st2common.constants.secrets import MASKED_ATTRIBUTE_VALUE
 from st2common.util import isotime
 from st2common.util import date as date_utils
 from st2common.models.db.auth import TokenDB
 from st2common.persistence.auth import Token
+from st2common.persistence.execution import ActionExecution
 from st2common.persistence.trace import Trace
+from st2common.services import resultstorage
 from st2common.transport.publishers import PoolPublisher
 from st2tests.fixturesloader import FixturesLoader
 from tests import FunctionalTest, AuthMiddlewareTest
@@ -93,7 +96,11 @@ ACTION_3 = {
     'runner_type': 'run-remote',
     'parameters': {
         'e': {},
-        'f': {}
+        'f': {},
+        'g': {
+            'type': 'string',
+            'secret': True
+        }
     }
 }
 
@@ -123,6 +130,15 @@ LIVE_ACTION_3 = {
     }
 }
 
+LIVE_ACTION_4 = {
+    'action': 'wolfpack.st2.dummy.action3',
+    'parameters': {
+        'hosts': 'localhost',
+        'cmd': 'ls -l',
+        'g': 'supersecret'
+    }
+}
+
 
 class FakeResponse(object):
 
@@ -223,10 +239,49 @@ class TestActionExecutionController(FunctionalTest):
         self.assertEqual(resp.status_int, 200)
         self.assertTrue(len(resp.json) > 1)
 
+    def test_get_all_include_attributes_secrets_are_masked(self):
+        actionexecution_id = self._get_actionexecution_id(self._do_post(LIVE_ACTION_4))
+
+        resp = self.app.get('/v1/executions?include_attributes=parameters')
+        self.assertEqual(resp.status_int, 200)
+
+        executions = [execution for execution in resp.json
+                      if execution['id'] == actionexecution_id]
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(executions[0]['parameters']['g'], MASKED_ATTRIBUTE_VALUE)
+        self.assertEqual(executions[0]['parameters']['cmd'], 'ls -l')
+        self.assertNotIn('action', executions[0])
+        self.assertNotIn('runner', executions[0])
+
     def test_get_one_fail(self):
         resp = self.app.get('/v1/executions/100', expect_errors=True)
         self.assertEqual(resp.status_int, 404)
 
+    def test_get_one_stored_result(self):
+        actionexecution_id = self._get_actionexecution_id(self._do_post(LIVE_ACTION_1))
+        result = {'stdout': 'line of output\n' * 1000}
+        result_fields = resultstorage.save_result(execution_id=actionexecution_id,
+                                                  data=json.dumps(result))
+        ActionExecution.update(actionexecution_id, publish=False, dispatch_trigger=False,
+                               **result_fields)
+
+        get_resp = self._do_get_one(actionexecution_id)
+        self.assertEqual(get_resp.status_int, 200)
+        self.assertEqual(get_resp.json['result'], result)
+        self.assertEqual(get_resp.json['result_ref'], result_fields['result_ref'])
+
+        get_resp = self._do_get_one(actionexecution_id, params={'exclude_attributes': 'result'})
+        self.assertNotIn('result', get_resp.json)
+
+        # Listings only contain the preview
+        resp = self.app.get('/v1/executions?id=%s' % (actionexecution_id))
+        self.assertEqual(resp.json[0]['result'], result_fields['result'])
+
+        resp = self.app.get('/v1/executions/%s/result' % (actionexecution_id))
+        self.assertEqual(resp.status_int, 200)
+        self.assertEqual(resp.content_type, 'application/json')
+        self.assertEqual(json.loads(resp.body), result)
+
     def test_post_delete(self):
         post_resp = self._do_post(LIVE_ACTION_1)
         self.assertEqual(post_resp.status_int, 201)
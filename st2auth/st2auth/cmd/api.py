@@ -37,10 +37,16 @@ eventlet.monkey_patch(
 
 LOG = logging.getLogger(__name__)
 
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.auth'
+]
+
 
 def _setup():
     common_setup(service='auth', config=config, setup_db=True, register_mq_exchanges=False,
-                 register_signal_handlers=True)
+                 register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
 
     if cfg.CONF.auth.mode not in VALID_MODES:
         raise ValueError('Valid modes are: %s' % (','.join(VALID_MODES)))
@@ -889,6 +889,10 @@ class ActionExecutionListCommand(resource.ResourceCommand):
         if args.timestamp_lt:
             kwargs['timestamp_lt'] = args.timestamp_lt
 
+        # Only retrieve the displayed attributes, "children" is needed to mark the workflows
+        if 'all' not in args.attr:
+            kwargs['include_attributes'] = ','.join(args.attr + ['children'])
+
         return self.manager.query(limit=args.last, **kwargs)
 
     def run_and_print(self, args, **kwargs):
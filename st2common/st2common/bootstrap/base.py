@@ -72,6 +72,36 @@ class ResourceRegistrar(object):
         resources = sorted(resources)
         return resources
 
+    def get_existing_resources(self, resource_cls, pack):
+        """
+        Retrieve all the resources of the provided pack which are already in the database.
+
+        :return: Dictionary which maps resource name to the model.
+        :rtype: ``dict``
+        """
+        return dict([(resource_db.name, resource_db)
+                     for resource_db in resource_cls.query(pack=pack)])
+
+    def save_resources(self, resource_cls, resources):
+        """
+        Save the provided resources with a single bulk write.
+
+        :param resources: List of (metadata file path, model) tuples.
+        :type resources: ``list``
+
+        :return: List of (metadata file path, saved model) tuples of the resources which have
+                 been saved.
+        :rtype: ``list``
+        """
+        file_paths = dict([(id(model), file_path) for file_path, model in resources])
+        saved, errors = resource_cls.add_or_update_many([model for _, model in resources])
+
+        for model, error in errors:
+            LOG.error('Failed to write %s from %s to db: %s', resource_cls.__name__,
+                      file_paths[id(model)], error)
+
+        return [(file_paths[id(model)], model) for model in saved]
+
     def register_packs(self, base_dirs):
         """
         Register packs in all the provided directories.
@@ -209,7 +209,7 @@ class ActionAPI(BaseAPI):
     @classmethod
     def from_model(cls, model, mask_secrets=False):
         action = cls._from_model(model)
-        action['runner_type'] = action['runner_type']['name']
+        action['runner_type'] = action['runner_type'].get('name', None)
         action['tags'] = TagsHelper.from_model(model.tags)
 
         if getattr(model, 'notify', None):
@@ -217,6 +217,20 @@ class ActionAPI(BaseAPI):
 
         return cls(**action)
 
+    @classmethod
+    def from_raw_document(cls, raw_doc, mask_secrets=False):
+        action = cls._from_raw_document(raw_doc)
+        action['runner_type'] = action['runner_type'].get('name', None)
+        action['tags'] = [{'name': tag.get('name'), 'value': tag.get('value')}
+                          for tag in action['tags']]
+
+        if action.get('notify', None):
+            # Embedded document is small, constructing it is cheaper than duplicating the logic
+            notify = cls.model._fields['notify'].to_python(action['notify'])
+            action['notify'] = NotificationsHelper.from_model(notify)
+
+        return cls(**action)
+
     @classmethod
     def to_model(cls, action):
         name = getattr(action, 'name', None)
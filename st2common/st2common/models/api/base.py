@@ -28,6 +28,8 @@ import pecan.jsonify
 import traceback
 from oslo_config import cfg
 
+from st2common.models.db.stormbase import EscapedDictField
+from st2common.models.db.stormbase import EscapedDynamicField
 from st2common.util import mongoescape as util_mongodb
 from st2common.util import schema as util_schema
 from st2common.util.jsonify import json_encode
@@ -37,6 +39,71 @@ from st2common import log as logging
 LOG = logging.getLogger(__name__)
 VALIDATOR = util_schema.get_validator(assign_property_default=False)
 
+ESCAPED_FIELD_TYPES = (EscapedDictField, EscapedDynamicField)
+
+
+class RawDocumentMapper(object):
+    """
+    Converts raw MongoDB documents of a particular model (as returned by ``QuerySet.as_pymongo``)
+    to the same dictionaries as ``BaseAPI._from_model`` produces from the model instances, but
+    without constructing the instances.
+
+    What needs to be done with each field (unescaping of the keys, default value) is determined
+    once when the mapper is created. Embedded documents are left as stored in the database.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._fields = []
+
+        for name, field in six.iteritems(model._fields):
+            if name == 'id':
+                continue
+
+            unescape = isinstance(field, ESCAPED_FIELD_TYPES)
+            self._fields.append((name, field, unescape))
+
+    def to_dict(self, raw_doc):
+        doc = {}
+
+        if '_id' in raw_doc:
+            doc['id'] = str(raw_doc['_id'])
+
+        for name, field, unescape in self._fields:
+            value = raw_doc.get(field.db_field, None)
+
+            if value is None:
+                # Same as when the instance is constructed, missing fields get the default value
+                value = field.default() if callable(field.default) else field.default
+                if value is None:
+                    continue
+                value = field.to_mongo(copy.deepcopy(value))
+
+            if unescape:
+                value = util_mongodb.unescape_chars(value)
+
+            doc[name] = value
+
+        return doc
+
+
+_raw_document_mappers = {}
+
+
+def get_raw_document_mapper(model):
+    """
+    Retrieve (and create on first use) raw document mapper for the provided model class.
+
+    :rtype: :class:`RawDocumentMapper`
+    """
+    mapper = _raw_document_mappers.get(model, None)
+
+    if not mapper:
+        mapper = RawDocumentMapper(model=model)
+        _raw_document_mappers[model] = mapper
+
+    return mapper
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseAPI(object):
@@ -92,6 +159,67 @@ class BaseAPI(object):
 
         return cls(**attrs)
 
+    @classmethod
+    def _from_raw_document(cls, raw_doc, mask_secrets=False):
+        doc = get_raw_document_mapper(cls.model).to_dict(raw_doc)
+
+        if mask_secrets and cfg.CONF.log.mask_secrets:
+            doc = cls.model.mask_secrets(value=doc)
+
+        return doc
+
+    @classmethod
+    def from_raw_document(cls, raw_doc, mask_secrets=False):
+        """
+        Create API model class instance for the provided raw MongoDB document of the ``model``
+        class. This is a faster alternative to ``from_model`` for read-only listings.
+
+        Classes which override ``from_model`` need to override this method as well.
+
+        :param raw_doc: Raw document as returned by ``QuerySet.as_pymongo``.
+        :type raw_doc: ``dict``
+
+        :param mask_secrets: True to mask secrets in the resulting instance.
+        :type mask_secrets: ``boolean``
+        """
+        doc = cls._from_raw_document(raw_doc=raw_doc, mask_secrets=mask_secrets)
+        attrs = {attr: value for attr, value in six.iteritems(doc) if value is not None}
+
+        return cls(**attrs)
+
+    @classmethod
+    def from_partial_model(cls, model, include_fields, **kwargs):
+        """
+        Create API model class instance for the provided DB model instance which has been
+        retrieved with only a subset of the fields.
+
+        Fields which haven't been retrieved are set to their default values by the ODM so they
+        are removed from the resulting instance.
+
+        :param include_fields: Retrieved fields. Dotted paths select the whole top-level attribute.
+        :type include_fields: ``list``
+        """
+        result = cls.from_model(model, **kwargs)
+        return cls._remove_excluded_attributes(result, include_fields=include_fields)
+
+    @classmethod
+    def from_partial_raw_document(cls, raw_doc, include_fields, **kwargs):
+        """
+        Same as ``from_partial_model``, but for raw MongoDB documents.
+        """
+        result = cls.from_raw_document(raw_doc, **kwargs)
+        return cls._remove_excluded_attributes(result, include_fields=include_fields)
+
+    @staticmethod
+    def _remove_excluded_attributes(result, include_fields):
+        attributes = set([field.split('.')[0] for field in include_fields] + ['id'])
+
+        for attribute in list(vars(result).keys()):
+            if attribute not in attributes:
+                delattr(result, attribute)
+
+        return result
+
     @classmethod
     def to_model(cls, doc):
         """
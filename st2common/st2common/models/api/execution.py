@@ -104,6 +104,11 @@ class ActionExecutionAPI(BaseAPI):
                 "type": "array",
                 "items": {"type": "string"},
                 "uniqueItems": True
+            },
+            "result_ref": {
+                "description": "Id of the separately stored result. When set, the result is "
+                               "only included when a single execution is retrieved.",
+                "type": "string"
             }
         },
         "additionalProperties": False
@@ -112,10 +117,31 @@ class ActionExecutionAPI(BaseAPI):
     @classmethod
     def from_model(cls, model, mask_secrets=False):
         doc = cls._from_model(model, mask_secrets=mask_secrets)
-        start_timestamp = isotime.format(model.start_timestamp, offset=False)
+        return cls._from_doc(doc=doc, start_timestamp=model.start_timestamp,
+                             end_timestamp=model.end_timestamp)
+
+    @classmethod
+    def from_raw_document(cls, raw_doc, mask_secrets=False):
+        doc = cls._from_raw_document(raw_doc, mask_secrets=mask_secrets)
+
+        # Timestamps are stored as number of microseconds since the epoch
+        fields = cls.model._fields
+        start_timestamp = fields['start_timestamp'].to_python(doc['start_timestamp'])
+        end_timestamp = doc.get('end_timestamp', None)
+        if end_timestamp:
+            end_timestamp = fields['end_timestamp'].to_python(end_timestamp)
+
+        return cls._from_doc(doc=doc, start_timestamp=start_timestamp,
+                             end_timestamp=end_timestamp)
+
+    @classmethod
+    def _from_doc(cls, doc, start_timestamp, end_timestamp):
+        # Internal marker of the fields which are stored in the liveaction
+        doc.pop('shared_fields', None)
+
+        start_timestamp = isotime.format(start_timestamp, offset=False)
         doc['start_timestamp'] = start_timestamp
 
-        end_timestamp = model.end_timestamp
         if end_timestamp:
             end_timestamp = isotime.format(end_timestamp, offset=False)
             doc['end_timestamp'] = end_timestamp
@@ -168,6 +168,12 @@ class TriggerInstanceAPI(BaseAPI):
         instance['occurrence_time'] = isotime.format(instance['occurrence_time'], offset=False)
         return cls(**instance)
 
+    @classmethod
+    def from_raw_document(cls, raw_doc, mask_secrets=False):
+        instance = cls._from_raw_document(raw_doc, mask_secrets=mask_secrets)
+        instance['occurrence_time'] = isotime.format(instance['occurrence_time'], offset=False)
+        return cls(**instance)
+
     @classmethod
     def to_model(cls, instance):
         trigger = instance.trigger
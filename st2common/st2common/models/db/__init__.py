@@ -1,16 +1,27 @@
+import base64
 import copy
 import importlib
+import json
+import time
 
 import six
+import bson
 import mongoengine
+import pymongo
+from bson import json_util
+from pymongo.errors import BulkWriteError
 
 from st2common.util import isotime
+from st2common.models.db import profiling
 from st2common.models.db import stormbase
 from st2common import log as logging
 
 
 LOG = logging.getLogger(__name__)
 
+# MongoDB error codes of the unique index violations
+DUPLICATE_KEY_ERROR_CODES = [11000, 11001]
+
 MODEL_MODULE_NAMES = [
     'st2common.models.db.auth',
     'st2common.models.db.action',
@@ -19,15 +30,19 @@ MODEL_MODULE_NAMES = [
     'st2common.models.db.execution',
     'st2common.models.db.executionstate',
     'st2common.models.db.liveaction',
+    'st2common.models.db.marker',
+    'st2common.models.db.outbox',
+    'st2common.models.db.pack',
     'st2common.models.db.policy',
     'st2common.models.db.rule',
     'st2common.models.db.runner',
     'st2common.models.db.sensor',
+    'st2common.models.db.trace',
     'st2common.models.db.trigger',
 ]
 
 
-def db_setup(db_name, db_host, db_port, username=None, password=None):
+def db_setup(db_name, db_host, db_port, username=None, password=None, ensure_indexes=True):
     LOG.info('Connecting to database "%s" @ "%s:%s" as user "%s".' %
              (db_name, db_host, db_port, str(username)))
     connection = mongoengine.connection.connect(db_name, host=db_host,
@@ -36,29 +51,73 @@ def db_setup(db_name, db_host, db_port, username=None, password=None):
 
     # Create all the indexes upfront to prevent race-conditions caused by
     # lazy index creation
-    db_ensure_indexes()
+    if ensure_indexes:
+        db_ensure_indexes()
 
     return connection
 
 
-def db_ensure_indexes():
+def db_ensure_indexes(model_module_names=None, background=False):
     """
     This function ensures that indexes for all the models have been created.
 
     Note #1: When calling this method database connection already needs to be
     established.
 
-    Note #2: This method blocks until all the index have been created (indexes
-    are created in real-time and not in background).
+    Note #2: By default this method blocks until all the index have been created (indexes
+    are created in real-time and not in background). With ``background`` the missing indexes
+    are built by MongoDB in the background, without locking the collections.
+
+    :param model_module_names: Names of the modules with the models to ensure the indexes for.
+                               Defaults to all the modules in ``MODEL_MODULE_NAMES``.
+    :type model_module_names: ``list``
+
+    :param background: True to build the missing indexes in the background.
+    :type background: ``bool``
     """
     LOG.debug('Ensuring database indexes...')
 
-    for module_name in MODEL_MODULE_NAMES:
-        module = importlib.import_module(module_name)
-        model_classes = getattr(module, 'MODELS', [])
-        for cls in model_classes:
-            LOG.debug('Ensuring indexes for model "%s"...' % (cls.__name__))
+    for cls in _get_model_classes(model_module_names=model_module_names):
+        LOG.debug('Ensuring indexes for model "%s"...' % (cls.__name__))
+
+        if not background:
             cls.ensure_indexes()
+            continue
+
+        index_background = cls._meta.get('index_background', False)
+        cls._meta['index_background'] = True
+
+        try:
+            cls.ensure_indexes()
+        finally:
+            cls._meta['index_background'] = index_background
+
+
+def db_set_auto_create_index(enabled, model_module_names=None):
+    """
+    Enable or disable the creation of the indexes of a model when its collection is first used.
+
+    This needs to be disabled when the index creation is left to someone else, otherwise
+    mongoengine builds the missing indexes in the foreground on the first query.
+
+    :param model_module_names: Names of the modules with the models. Defaults to all the modules
+                               in ``MODEL_MODULE_NAMES``.
+    :type model_module_names: ``list``
+    """
+    for cls in _get_model_classes(model_module_names=model_module_names):
+        cls._meta['auto_create_index'] = enabled
+
+
+def _get_model_classes(model_module_names=None):
+    if model_module_names is None:
+        model_module_names = MODEL_MODULE_NAMES
+
+    model_classes = []
+    for module_name in model_module_names:
+        module = importlib.import_module(module_name)
+        model_classes.extend(getattr(module, 'MODELS', []))
+
+    return model_classes
 
 
 def db_teardown():
@@ -80,14 +139,17 @@ class MongoDBAccess(object):
     def get_by_ref(self, value):
         return self.get(ref=value, raise_exception=True)
 
-    def get(self, exclude_fields=None, *args, **kwargs):
+    def get(self, exclude_fields=None, include_fields=None, *args, **kwargs):
         raise_exception = kwargs.pop('raise_exception', False)
 
-        instances = self.model.objects(**kwargs)
+        instances = self._get_queryset()(**kwargs)
 
         if exclude_fields:
             instances = instances.exclude(*exclude_fields)
 
+        if include_fields:
+            instances = instances.only(*include_fields)
+
         instance = instances[0] if instances else None
 
         if not instance and raise_exception:
@@ -98,10 +160,21 @@ class MongoDBAccess(object):
         return self.query(*args, **kwargs)
 
     def count(self, *args, **kwargs):
-        return self.model.objects(**kwargs).count()
-
-    def query(self, offset=0, limit=None, order_by=None, exclude_fields=None,
-              **filters):
+        return self._get_queryset()(**kwargs).count()
+
+    def query(self, offset=0, limit=None, order_by=None, exclude_fields=None, include_fields=None,
+              after=None, **filters):
+        """
+        :param include_fields: Only retrieve the provided fields (and the id). Fields which are
+                               not retrieved are set to their default values in the returned
+                               instances. Dotted paths select nested fields.
+        :type include_fields: ``list``
+
+        :param after: Pagination cursor (as returned by ``get_pagination_cursor``) of the last
+                      instance of the previous page. If provided, only the instances which come
+                      after it in the sort order are returned.
+        :type after: ``str``
+        """
         order_by = order_by or []
         exclude_fields = exclude_fields or []
         eop = offset + int(limit) if limit else None
@@ -112,22 +185,110 @@ class MongoDBAccess(object):
         filters, order_by = self._process_datetime_range_filters(filters=filters, order_by=order_by)
         filters = self._process_null_filters(filters=filters)
 
-        result = self.model.objects(**filters)
+        result = self._get_queryset()(**filters)
 
         if exclude_fields:
             result = result.exclude(*exclude_fields)
 
+        if include_fields:
+            # Sort keys are always retrieved so the pagination cursors can be calculated.
+            sort_fields = [key.lstrip('+-') for key in order_by]
+            result = result.only(*(['id'] + list(include_fields) + sort_fields))
+
         result = result.order_by(*order_by)
+
+        if after:
+            result = result.filter(__raw__=self._get_keyset_filter(queryset=result, cursor=after))
+
         result = result[offset:eop]
 
         return result
 
+    def get_pagination_cursor(self, queryset, instance):
+        """
+        Return an opaque cursor which points right after the provided instance in the sort order
+        of the provided query.
+
+        The cursor is made of the values of the sort keys of the instance so the next page can be
+        retrieved with an index range scan instead of skipping all the preceding instances. The
+        sort order needs to include a unique key (e.g. ``id``) as the last sort key.
+
+        :param instance: Model instance or a raw document (as returned by ``as_pymongo``).
+
+        :rtype: ``str``
+        """
+        ordering = [[key, direction] for key, direction in queryset._ordering]
+        son = instance if isinstance(instance, dict) else instance.to_mongo()
+        values = []
+
+        for key, _ in ordering:
+            value = son
+            for part in key.split('.'):
+                value = value.get(part, None) if isinstance(value, dict) else None
+            values.append(value)
+
+        data = json.dumps({'sort': ordering, 'values': values}, default=json_util.default)
+        return base64.urlsafe_b64encode(data)
+
+    def _get_keyset_filter(self, queryset, cursor):
+        ordering = [[key, direction] for key, direction in queryset._ordering]
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(str(cursor)),
+                              object_hook=json_util.object_hook)
+            values = data['values']
+            is_valid = data['sort'] == ordering and len(values) == len(ordering)
+        except (TypeError, ValueError, KeyError):
+            is_valid = False
+
+        if not is_valid:
+            raise ValueError('Invalid pagination cursor "%s". Cursor needs to be retrieved with '
+                             'the same sort order.' % (cursor))
+
+        # (a > x) or (a == x and b > y) or (a == x and b == y and c > z) ...
+        # Note: Null and missing values sort before all the other values and compare equal to
+        # each other ({a: None} matches both) but "$gt" and "$lt" never match them.
+        clauses = []
+        for index, (key, direction) in enumerate(ordering):
+            prefix = dict(zip([previous_key for previous_key, _ in ordering[:index]],
+                              values[:index]))
+            value = values[index]
+
+            if direction == pymongo.ASCENDING:
+                conditions = [{'$ne': None}] if value is None else [{'$gt': value}]
+            else:
+                # Nothing sorts after null in the descending order
+                conditions = [] if value is None else [{'$lt': value}, None]
+
+            for condition in conditions:
+                clause = dict(prefix)
+                clause[key] = condition
+                clauses.append(clause)
+
+        if not clauses:
+            # Cursor points at the last possible position
+            return {'_id': {'$in': []}}
+
+        return {'$or': clauses}
+
     def distinct(self, *args, **kwargs):
         field = kwargs.pop('field')
-        return self.model.objects(**kwargs).distinct(field)
+        return self._get_queryset()(**kwargs).distinct(field)
 
     def aggregate(self, *args, **kwargs):
-        return self.model.objects(**kwargs)._collection.aggregate(*args, **kwargs)
+        profiler = profiling.get_query_profiler()
+        start_time = time.time()
+        result = self.model.objects(**kwargs)._collection.aggregate(*args, **kwargs)
+
+        if profiler:
+            pipeline = args[0] if args else kwargs.get('pipeline', [])
+            stages = pipeline if isinstance(pipeline, list) else [pipeline]
+            query = stages[0].get('$match', {}) if stages else {}
+            documents = len(result.get('result', [])) if isinstance(result, dict) else 0
+            profiler.record(model=self.model, operation='aggregate', query=query,
+                            duration=time.time() - start_time, documents=documents)
+
+        return result
 
     @staticmethod
     def add_or_update(instance):
@@ -138,10 +299,141 @@ class MongoDBAccess(object):
                 setattr(instance, attr, field.to_python(value))
         return instance
 
+    def add_or_update_many(self, instances):
+        """
+        Save the provided instances using a single unordered bulk write.
+
+        New instances (without an id) are inserted, existing ones are replaced as a whole.
+        A failure of one of the instances (e.g. unique index violation) doesn't prevent the
+        other instances from being saved.
+
+        :return: (saved instances, errors) where errors is a list of (instance, exception)
+                 tuples. Unique index violations are reported as ``NotUniqueError``.
+        :rtype: ``tuple``
+        """
+        if not instances:
+            return [], []
+
+        bulk = self.model._get_collection().initialize_unordered_bulk_op()
+        # Instances in the order in which they were added to the bulk operation
+        bulk_instances = []
+        inserted = set()
+        errors = []
+
+        for instance in instances:
+            try:
+                instance.validate()
+            except mongoengine.ValidationError as e:
+                errors.append((instance, e))
+                continue
+
+            if instance.id is None:
+                instance.id = bson.ObjectId()
+                inserted.add(id(instance))
+                bulk.insert(instance.to_mongo())
+            else:
+                bulk.find({'_id': instance.id}).upsert().replace_one(instance.to_mongo())
+
+            bulk_instances.append(instance)
+
+        if bulk_instances:
+            try:
+                bulk.execute()
+            except BulkWriteError as e:
+                for write_error in e.details.get('writeErrors', []):
+                    if write_error.get('code') in DUPLICATE_KEY_ERROR_CODES:
+                        exc = mongoengine.NotUniqueError(write_error['errmsg'])
+                    else:
+                        exc = mongoengine.OperationError(write_error['errmsg'])
+
+                    errors.append((bulk_instances[write_error['index']], exc))
+
+        failed = set([id(instance) for instance, _ in errors])
+        saved = []
+
+        for instance in bulk_instances:
+            if id(instance) in failed:
+                # Instance which failed to be inserted stays new.
+                if id(instance) in inserted:
+                    instance.id = None
+                continue
+
+            instance._clear_changed_fields()
+            instance._created = False
+            for attr, field in instance._fields.iteritems():
+                if isinstance(field, stormbase.EscapedDictField):
+                    value = getattr(instance, attr)
+                    setattr(instance, attr, field.to_python(value))
+            saved.append(instance)
+
+        return saved, errors
+
+    def update(self, conditions, **set_fields):
+        """
+        Atomically update the provided fields of the instance which matches the conditions.
+
+        Only the provided fields are written (fields with ``None`` value are unset), the rest of
+        the document is left as is.
+
+        :param conditions: Query filters which select the instance, e.g. ``{'id': ...}``.
+                           Can include other fields to do a compare-and-set.
+        :type conditions: ``dict``
+
+        :return: Updated instance or ``None`` if no instance matches the conditions.
+        """
+        query = self.model.objects(**conditions)._query
+        to_set = {}
+        to_unset = {}
+
+        for name, value in six.iteritems(set_fields):
+            field = self.model._fields[name]
+
+            if value is None:
+                to_unset[field.db_field] = 1
+                continue
+
+            field.validate(value)
+            to_set[field.db_field] = field.to_mongo(value)
+
+        document = {}
+        if to_set:
+            document['$set'] = to_set
+        if to_unset:
+            document['$unset'] = to_unset
+
+        son = self.model._get_collection().find_and_modify(query=query, update=document,
+                                                           new=True)
+        if not son:
+            return None
+
+        return self.model._from_son(son)
+
     @staticmethod
     def delete(instance):
         instance.delete()
 
+    def delete_many(self, instances):
+        """
+        Delete the provided instances using a single query.
+
+        :return: Number of deleted instances.
+        :rtype: ``int``
+        """
+        if not instances:
+            return 0
+
+        ids = [instance.id for instance in instances]
+        return self.model.objects(id__in=ids).delete()
+
+    def _get_queryset(self):
+        """
+        Return the query set of the model, instrumented when the query profiler is enabled.
+        """
+        if not profiling.get_query_profiler():
+            return self.model.objects
+
+        return profiling.ProfiledQuerySet(self.model, self.model._get_collection())
+
     def _process_null_filters(self, filters):
         result = copy.deepcopy(filters)
 
@@ -25,12 +25,18 @@ from st2common.util.secrets import get_secret_parameters
 from st2common.util.secrets import mask_secret_parameters
 
 __all__ = [
-    'ActionExecutionDB'
+    'ActionExecutionDB',
+    'ActionExecutionResultDB',
+    'SHARED_FIELDS'
 ]
 
 
 LOG = logging.getLogger(__name__)
 
+# Fields which can be stored only in the liveaction of the execution instead of being copied
+# into the execution (see "result_storage.deduplicate" config option)
+SHARED_FIELDS = ['parameters', 'result', 'context']
+
 
 class ActionExecutionDB(stormbase.StormFoundationDB):
     trigger = stormbase.EscapedDictField()
@@ -61,6 +67,13 @@ class ActionExecutionDB(stormbase.StormFoundationDB):
         help_text='Contextual information on the action execution.')
     parent = me.StringField()
     children = me.ListField(field=me.StringField())
+    result_ref = me.StringField(
+        help_text='Id of the separately stored result. When set, "result" only contains a '
+                  'preview of the result.')
+    shared_fields = me.ListField(
+        field=me.StringField(),
+        help_text='Fields which are not stored in the execution, their values are stored in the '
+                  'corresponding liveaction.')
 
     meta = {
         'indexes': [
@@ -71,12 +84,18 @@ class ActionExecutionDB(stormbase.StormFoundationDB):
             {'fields': ['end_timestamp']},
             {'fields': ['status']},
             {'fields': ['parent']},
-            {'fields': ['-start_timestamp', 'action.ref', 'status']}
+            {'fields': ['-start_timestamp', 'action.ref', 'status']},
+            # Matches the default sort order of the API (including the unique key which is used
+            # for cursor based pagination)
+            {'fields': ['-start_timestamp', 'action.ref', 'id']}
         ]
     }
 
-    def mask_secrets(self, value):
-        result = copy.deepcopy(value)
+    @classmethod
+    def mask_secrets(cls, value):
+        # Only the parameters are replaced so there is no need to copy the (potentially large)
+        # rest of the document
+        result = copy.copy(value)
 
         execution_parameters = value['parameters']
         parameters = {}
@@ -99,4 +118,24 @@ class ActionExecutionDB(stormbase.StormFoundationDB):
         return serializable_dict['parameters']
 
 
-MODELS = [ActionExecutionDB]
+class ActionExecutionResultDB(stormbase.StormFoundationDB):
+    """
+    Result of an action execution which is too large to be stored inline in the execution
+    document.
+
+    :param execution_id: Id of the execution the result belongs to.
+    :type execution_id: ``str``
+
+    :param data: JSON serialized result, zlib compressed if ``compressed`` is set.
+    :type data: ``str``
+
+    :param size: Size of the JSON serialized result in bytes.
+    :type size: ``int``
+    """
+    execution_id = me.StringField(required=True, unique=True)
+    data = me.BinaryField(required=True)
+    compressed = me.BooleanField(default=False)
+    size = me.IntField(min_value=0)
+
+
+MODELS = [ActionExecutionDB, ActionExecutionResultDB]
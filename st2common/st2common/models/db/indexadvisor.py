@@ -0,0 +1,208 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Suggests missing compound indexes based on the query shapes recorded by the query profiler
+(see ``st2common.models.db.profiling``) and the indexes declared in the models.
+
+Suggested indexes follow the equality, sort, range rule: fields matched by equality come first
+(in any order), followed by the sort fields and then the fields matched by a range.
+"""
+
+import six
+
+from st2common.models.db.profiling import MATCH_EQUALITY
+from st2common.models.db.profiling import MATCH_RANGE
+
+__all__ = [
+    'merge_query_profiles',
+    'get_model_indexes',
+    'get_suggested_index',
+    'is_index_covered',
+    'suggest_indexes'
+]
+
+
+def merge_query_profiles(profiles):
+    """
+    Merge the shapes of the provided query profile dumps (e.g. of multiple processes).
+
+    :rtype: ``list`` of ``dict``
+    """
+    merged = {}
+
+    for profile in profiles:
+        for shape in profile.get('shapes', []):
+            key = (shape['model'], shape['operation'], repr(shape['filter']), repr(shape['sort']),
+                   repr(shape['projection']))
+            stats = merged.get(key, None)
+
+            if stats is None:
+                merged[key] = dict(shape)
+                continue
+
+            for name in ['count', 'total_time', 'documents', 'slow_count']:
+                stats[name] += shape[name]
+            stats['max_time'] = max(stats['max_time'], shape['max_time'])
+            stats['explain'] = stats['explain'] or shape['explain']
+
+    return sorted(merged.values(), key=lambda stats: stats['total_time'], reverse=True)
+
+
+def get_model_indexes(model):
+    """
+    Return the indexes declared in the model meta (and the implicit ``_id`` index).
+
+    :return: List of indexes, each a list of [field, direction] pairs.
+    :rtype: ``list``
+    """
+    indexes = [[['_id', 1]]]
+
+    for spec in model._meta['index_specs'] or []:
+        indexes.append([[field, direction] for field, direction in spec['fields']])
+
+    return indexes
+
+
+def get_suggested_index(shape):
+    """
+    Return the index which supports the provided query shape.
+
+    :return: List of [field, direction] pairs or ``None`` if the shape doesn't need an index.
+    :rtype: ``list``
+    """
+    equality_fields, sort, range_fields = _get_index_parts(shape)
+    index = ([[field, 1] for field in equality_fields] + sort +
+             [[field, 1] for field in range_fields])
+
+    # Queries by id are served by the implicit _id index
+    if not index or index[0][0] == '_id':
+        return None
+
+    return index
+
+
+def is_index_covered(shape, existing_indexes):
+    """
+    Return True if one of the existing indexes supports the queries of the provided shape: it
+    starts with the equality fields (in any order) followed by the sort fields (in the same or
+    the reverse direction) and the range fields.
+    """
+    equality_fields, sort, range_fields = _get_index_parts(shape)
+
+    for existing_index in existing_indexes:
+        fields = [field for field, _ in existing_index]
+        directions = [direction for _, direction in existing_index]
+        sort_start = len(equality_fields)
+        range_start = sort_start + len(sort)
+
+        if len(existing_index) < range_start + len(range_fields):
+            continue
+
+        if sorted(fields[:sort_start]) != equality_fields:
+            continue
+
+        if fields[sort_start:range_start] != [field for field, _ in sort]:
+            continue
+
+        sort_directions = [direction for _, direction in sort]
+        existing_directions = directions[sort_start:range_start]
+        if (sort_directions != existing_directions and
+                sort_directions != [-direction for direction in existing_directions]):
+            continue
+
+        if sorted(fields[range_start:range_start + len(range_fields)]) != range_fields:
+            continue
+
+        return True
+
+    return False
+
+
+def suggest_indexes(shapes, models, slow_only=True):
+    """
+    Suggest the missing indexes for the provided query shapes.
+
+    :param shapes: Recorded query shapes (see ``QueryProfiler.get_shapes``).
+    :type shapes: ``list``
+
+    :param models: Model classes by the collection name.
+    :type models: ``dict``
+
+    :param slow_only: True to only consider the shapes with slow queries.
+    :type slow_only: ``bool``
+
+    :return: Suggestions ordered by the total time of the queries which would use the index.
+    :rtype: ``list`` of ``dict``
+    """
+    suggestions = {}
+
+    for shape in shapes:
+        model = models.get(shape['collection'], None)
+
+        if not model or (slow_only and not shape['slow_count']):
+            continue
+
+        index = get_suggested_index(shape)
+
+        if not index or is_index_covered(shape, get_model_indexes(model)):
+            continue
+
+        key = (shape['collection'], repr(index))
+        suggestion = suggestions.get(key, None)
+
+        if suggestion is None:
+            suggestion = {
+                'collection': shape['collection'],
+                'model': model.__name__,
+                'index': index,
+                'count': 0,
+                'total_time': 0.0,
+                'shapes': []
+            }
+            suggestions[key] = suggestion
+
+        suggestion['count'] += shape['count']
+        suggestion['total_time'] += shape['total_time']
+        suggestion['shapes'].append(shape)
+
+    # Indexes whose queries are supported by the other (longer) suggested indexes are not needed
+    result = []
+    for suggestion in six.itervalues(suggestions):
+        others = [other['index'] for other in six.itervalues(suggestions)
+                  if other['collection'] == suggestion['collection'] and
+                  len(other['index']) > len(suggestion['index'])]
+
+        if all([is_index_covered(shape, others) for shape in suggestion['shapes']]):
+            continue
+
+        result.append(suggestion)
+
+    return sorted(result, key=lambda suggestion: suggestion['total_time'], reverse=True)
+
+
+def _get_index_parts(shape):
+    """
+    Return the equality fields, sort and range fields of the index for the provided shape.
+    """
+    equality_fields = sorted([field for field, match in shape['filter']
+                              if match == MATCH_EQUALITY])
+    sort = [[field, direction] for field, direction in shape['sort']
+            if field not in equality_fields]
+    sort_fields = [field for field, _ in sort]
+    range_fields = sorted([field for field, match in shape['filter']
+                           if match == MATCH_RANGE and field not in sort_fields])
+
+    return equality_fields, sort, range_fields
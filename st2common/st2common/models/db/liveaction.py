@@ -89,7 +89,7 @@ class LiveActionDB(stormbase.StormFoundationDB):
     def mask_secrets(self, value):
         from st2common.util import action_db
 
-        result = copy.deepcopy(value)
+        result = copy.copy(value)
         execution_parameters = value['parameters']
 
         # TODO: This results into two DB looks, we should cache action and runner type object
@@ -0,0 +1,57 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mongoengine as me
+
+from st2common.fields import ComplexDateTimeField
+from st2common.models.db import stormbase
+from st2common.util import date as date_utils
+
+__all__ = [
+    'OutboxEventDB'
+]
+
+
+class OutboxEventDB(stormbase.StormFoundationDB):
+    """
+    Message bus event which has been recorded together with a model change and is waiting to be
+    published by the outbox flusher. Events are removed once they have been published.
+
+    :param resource: Import path of the persistence class which publishes the event.
+    :type resource: ``str``
+
+    :param operation: Event type (create, update, delete, status).
+    :type operation: ``str``
+
+    :param payload: Model object encoded with the st2 wire format.
+    :type payload: ``str``
+    """
+    resource = me.StringField(required=True)
+    operation = me.StringField(required=True)
+    payload = me.BinaryField(required=True)
+    created_at = ComplexDateTimeField(
+        default=date_utils.get_datetime_utc_now,
+        help_text='The timestamp when the event was recorded.')
+    lease_expires_at = ComplexDateTimeField(
+        default=date_utils.get_datetime_utc_now,
+        help_text='The event can be claimed by a flusher after this timestamp.')
+
+    meta = {
+        'indexes': [
+            {'fields': ['lease_expires_at']}
+        ]
+    }
+
+MODELS = [OutboxEventDB]
@@ -0,0 +1,422 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Optional instrumentation of the database queries (``query_profiler`` config section).
+
+Queries issued through ``MongoDBAccess`` are recorded by their shape - model, operation, filter
+fields (without the values), sort and projection - together with the latency and the number of
+returned documents. Queries slower than the threshold are explained (once per shape) so it's
+visible which index, if any, has been used. The profile is periodically dumped to a JSON file
+which is included by st2debug and used by ``tools/suggest_indexes.py``.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import time
+
+import eventlet
+import six
+from mongoengine.queryset import QuerySet
+
+from st2common import log as logging
+
+__all__ = [
+    'QueryProfiler',
+    'ProfiledQuerySet',
+
+    'get_query_shape',
+    'summarize_explain',
+
+    'get_query_profiler',
+    'enable_query_profiler',
+    'disable_query_profiler'
+]
+
+LOG = logging.getLogger(__name__)
+
+RANGE_OPERATORS = ['$gt', '$gte', '$lt', '$lte']
+
+# Operators which are matched as an equality in the index
+EQUALITY_OPERATORS = ['$eq', '$in']
+
+MATCH_EQUALITY = 'eq'
+MATCH_RANGE = 'range'
+MATCH_EXPRESSION = 'expr'
+
+_QUERY_PROFILER = None
+
+
+def get_query_profiler():
+    """
+    Return the query profiler of this process or ``None`` if the profiling is not enabled.
+
+    :rtype: :class:`QueryProfiler`
+    """
+    return _QUERY_PROFILER
+
+
+def enable_query_profiler(slow_threshold=0.1, max_shapes=500, explain=True):
+    global _QUERY_PROFILER
+
+    if not _QUERY_PROFILER:
+        _QUERY_PROFILER = QueryProfiler(slow_threshold=slow_threshold, max_shapes=max_shapes,
+                                        explain=explain)
+
+    return _QUERY_PROFILER
+
+
+def disable_query_profiler():
+    global _QUERY_PROFILER
+
+    if _QUERY_PROFILER:
+        _QUERY_PROFILER.stop_dumping()
+
+    _QUERY_PROFILER = None
+
+
+def get_query_shape(query):
+    """
+    Return the shape of the provided MongoDB query: sorted list of [field, match] pairs where
+    match is "eq", "range", "expr" (for $or, $and, ...) or the other used operators.
+
+    :param query: MongoDB query (e.g. ``QuerySet._query``).
+    :type query: ``dict``
+
+    :rtype: ``list``
+    """
+    shape = []
+
+    for key, value in six.iteritems(query or {}):
+        # Inheritance condition added by mongoengine
+        if key == '_cls':
+            continue
+
+        if key.startswith('$'):
+            shape.append([key, MATCH_EXPRESSION])
+            continue
+
+        operators = []
+        if isinstance(value, dict):
+            operators = sorted([name for name in value.keys() if name.startswith('$')])
+
+        if not operators or all(operator in EQUALITY_OPERATORS for operator in operators):
+            match = MATCH_EQUALITY
+        elif all(operator in RANGE_OPERATORS for operator in operators):
+            match = MATCH_RANGE
+        else:
+            match = ','.join(operators)
+
+        shape.append([key, match])
+
+    return sorted(shape)
+
+
+def summarize_explain(plan):
+    """
+    Return the interesting parts of the provided explain output (MongoDB 2.x and 3.x formats).
+
+    :rtype: ``dict``
+    """
+    if 'queryPlanner' not in plan:
+        keys = ['cursor', 'n', 'nscanned', 'nscannedObjects', 'scanAndOrder', 'indexOnly',
+                'millis']
+        summary = dict([(key, plan[key]) for key in keys if key in plan])
+        summary['collection_scan'] = plan.get('cursor', '').startswith('BasicCursor')
+        return summary
+
+    stages = []
+    indexes = []
+    nodes = [plan['queryPlanner'].get('winningPlan', {})]
+
+    while nodes:
+        node = nodes.pop(0)
+        stages.append(node.get('stage'))
+
+        if 'indexName' in node:
+            indexes.append(node['indexName'])
+
+        if 'inputStage' in node:
+            nodes.append(node['inputStage'])
+        nodes.extend(node.get('inputStages', []))
+
+    summary = {
+        'stages': stages,
+        'indexes': indexes,
+        'collection_scan': 'COLLSCAN' in stages
+    }
+
+    execution_stats = plan.get('executionStats', {})
+    for key in ['nReturned', 'totalKeysExamined', 'totalDocsExamined', 'executionTimeMillis']:
+        if key in execution_stats:
+            summary[key] = execution_stats[key]
+
+    return summary
+
+
+class QueryProfiler(object):
+    """
+    Records the latency of the queries aggregated by the query shape.
+    """
+
+    def __init__(self, slow_threshold=0.1, max_shapes=500, explain=True):
+        """
+        :param slow_threshold: Latency in seconds above which a query is considered slow.
+        :type slow_threshold: ``float``
+
+        :param max_shapes: Max number of recorded shapes. When reached, the shape with the lowest
+                           total time is dropped.
+        :type max_shapes: ``int``
+
+        :param explain: True to explain the first slow query of each shape.
+        :type explain: ``bool``
+        """
+        self._slow_threshold = slow_threshold
+        self._max_shapes = max_shapes
+        self._explain = explain
+
+        self._shapes = {}
+        self._dump_path = None
+        self._dump_thread = None
+
+    def record(self, model, operation, query=None, ordering=None, projection=None,
+               duration=0.0, documents=0, explain_func=None):
+        """
+        Record a query.
+
+        :param model: Queried model class.
+
+        :param operation: Name of the operation (find, find_one, count, distinct, aggregate).
+        :type operation: ``str``
+
+        :param ordering: Sort as a list of (field, direction) tuples.
+        :type ordering: ``list``
+
+        :param projection: Names of the retrieved fields.
+        :type projection: ``list``
+
+        :param explain_func: Function which returns the explain output of the query. Only called
+                             for the slow queries.
+        :type explain_func: ``callable``
+        """
+        filter_shape = get_query_shape(query)
+        sort = [[key, direction] for key, direction in ordering or []]
+        projection = sorted(projection or [])
+
+        key = (model.__name__, operation, tuple([tuple(item) for item in filter_shape]),
+               tuple([tuple(item) for item in sort]), tuple(projection))
+        stats = self._shapes.get(key, None)
+
+        if stats is None:
+            if len(self._shapes) >= self._max_shapes:
+                self._evict()
+
+            stats = {
+                'model': model.__name__,
+                'collection': model._get_collection_name(),
+                'operation': operation,
+                'filter': filter_shape,
+                'sort': sort,
+                'projection': projection,
+                'count': 0,
+                'total_time': 0.0,
+                'max_time': 0.0,
+                'documents': 0,
+                'slow_count': 0,
+                'explain': None
+            }
+            self._shapes[key] = stats
+
+        stats['count'] += 1
+        stats['total_time'] += duration
+        stats['max_time'] = max(stats['max_time'], duration)
+        stats['documents'] += documents
+
+        if duration < self._slow_threshold:
+            return
+
+        stats['slow_count'] += 1
+
+        if self._explain and explain_func and stats['explain'] is None:
+            try:
+                stats['explain'] = summarize_explain(explain_func())
+            except Exception as e:
+                LOG.debug('Failed to explain query on "%s": %s', stats['collection'], str(e))
+
+    def get_shapes(self, limit=None, slow_only=False):
+        """
+        Return the recorded shapes ordered by the total time.
+
+        :rtype: ``list`` of ``dict``
+        """
+        shapes = [dict(stats) for stats in self._shapes.values()
+                  if not slow_only or stats['slow_count']]
+        shapes = sorted(shapes, key=lambda stats: stats['total_time'], reverse=True)
+
+        return shapes[:limit] if limit else shapes
+
+    def reset(self):
+        self._shapes = {}
+
+    def dump(self, file_path=None):
+        """
+        Write the recorded shapes to a JSON file.
+
+        :param file_path: Path to the file. Defaults to the path passed to ``start_dumping``.
+        :type file_path: ``str``
+        """
+        file_path = file_path or self._dump_path
+        directory = os.path.dirname(file_path)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        data = {
+            'hostname': socket.gethostname(),
+            'pid': os.getpid(),
+            'timestamp': time.time(),
+            'slow_threshold': self._slow_threshold,
+            'shapes': self.get_shapes()
+        }
+
+        # Written to a temporary file first so readers never see a partially written dump
+        fd, temp_path = tempfile.mkstemp(dir=directory or None, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(data, fp, indent=2)
+        os.rename(temp_path, file_path)
+
+    def start_dumping(self, file_path, interval=60):
+        """
+        Periodically dump the recorded shapes to the provided file.
+        """
+        self._dump_path = file_path
+
+        if not self._dump_thread:
+            self._dump_thread = eventlet.spawn(self._dump_forever, interval)
+
+    def stop_dumping(self):
+        """
+        Stop the periodical dumping and dump the recorded shapes for the last time.
+        """
+        if not self._dump_thread:
+            return
+
+        self._dump_thread.kill()
+        self._dump_thread = None
+        self._safe_dump()
+
+    def _dump_forever(self, interval):
+        while True:
+            eventlet.sleep(interval)
+            self._safe_dump()
+
+    def _safe_dump(self):
+        try:
+            self.dump()
+        except Exception:
+            LOG.exception('Failed to dump the query profile to "%s".', self._dump_path)
+
+    def _evict(self):
+        key = min(self._shapes, key=lambda key: self._shapes[key]['total_time'])
+        del self._shapes[key]
+
+
+class ProfiledQuerySet(QuerySet):
+    """
+    Query set which records the executed queries in the query profiler.
+
+    Note: Queries are recorded once all their results have been retrieved, queries whose results
+    are only partially consumed are not recorded.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ProfiledQuerySet, self).__init__(*args, **kwargs)
+        self._profile_time = 0.0
+        self._profile_documents = 0
+
+    def next(self):
+        start_time = time.time()
+
+        try:
+            document = super(ProfiledQuerySet, self).next()
+        except StopIteration:
+            self._profile_time += time.time() - start_time
+
+            # No query is executed for the empty query sets
+            if self._cursor_obj is not None:
+                self._record('find', duration=self._profile_time,
+                             documents=self._profile_documents, explain_func=self.explain)
+            raise
+
+        self._profile_time += time.time() - start_time
+        self._profile_documents += 1
+        return document
+
+    def __getitem__(self, key):
+        if not isinstance(key, int):
+            return super(ProfiledQuerySet, self).__getitem__(key)
+
+        start_time = time.time()
+        documents = 0
+
+        try:
+            result = super(ProfiledQuerySet, self).__getitem__(key)
+            documents = 1
+        finally:
+            self._record('find_one', duration=time.time() - start_time, documents=documents,
+                         explain_func=self.explain)
+
+        return result
+
+    def count(self, with_limit_and_skip=True):
+        # Cached count, no query is executed
+        if with_limit_and_skip and self._len is not None:
+            return self._len
+
+        start_time = time.time()
+        result = super(ProfiledQuerySet, self).count(with_limit_and_skip)
+        self._record('count', duration=time.time() - start_time, documents=0,
+                     explain_func=self._explain_find)
+        return result
+
+    def distinct(self, field):
+        start_time = time.time()
+        result = super(ProfiledQuerySet, self).distinct(field)
+        self._record('distinct', duration=time.time() - start_time, documents=len(result),
+                     explain_func=self._explain_find)
+        return result
+
+    def _explain_find(self):
+        return self._collection.find(self._query).explain()
+
+    def _record(self, operation, duration, documents, explain_func):
+        profiler = get_query_profiler()
+        if not profiler:
+            return
+
+        ordering = self._ordering
+        if not ordering and self._document._meta['ordering']:
+            ordering = self._get_order_by(self._document._meta['ordering'])
+
+        projection = self._loaded_fields.as_dict().keys() if self._loaded_fields else []
+
+        # Sort and projection don't apply to the commands
+        if operation in ['count', 'distinct']:
+            ordering, projection = [], []
+        profiler.record(model=self._document, operation=operation, query=self._query,
+                        ordering=ordering, projection=projection, duration=duration,
+                        documents=documents, explain_func=explain_func)
@@ -63,10 +63,14 @@ class StormFoundationDB(me.Document, DictSerializableClassMixin):
             attrs.append('%s=%s' % (k, v))
         return '%s(%s)' % (self.__class__.__name__, ', '.join(attrs))
 
-    def mask_secrets(self, value):
+    @classmethod
+    def mask_secrets(cls, value):
         """
         Process the model dictionary and mask secret values.
 
+        Note: This is a class method so it can also be used on raw documents which have been
+        retrieved without constructing the model instances.
+
         :type value: ``dict``
         :param value: Document dictionary.
 
@@ -69,6 +69,16 @@ class TriggerInstanceDB(stormbase.StormFoundationDB):
     payload = stormbase.EscapedDictField()
     occurrence_time = me.DateTimeField()
 
+    meta = {
+        'indexes': [
+            {'fields': ['occurrence_time']},
+            {'fields': ['trigger']},
+            # Matches the default sort order of the API (including the unique key which is used
+            # for cursor based pagination)
+            {'fields': ['-occurrence_time', 'trigger', 'id']}
+        ]
+    }
+
 # specialized access objects
 triggertype_access = MongoDBAccess(TriggerTypeDB)
 trigger_access = MongoDBAccess(TriggerDB)
@@ -14,14 +14,17 @@
 # limitations under the License.
 
 import abc
+import copy
 
 import six
 from mongoengine import NotUniqueError
+from oslo_config import cfg
 
 from st2common import log as logging
 from st2common.exceptions.db import StackStormDBObjectConflictError
 from st2common.models.system.common import ResourceReference
 from st2common.transport.reactor import TriggerDispatcher
+from st2common.util import cache as cache_utils
 
 
 __all__ = [
@@ -50,6 +53,10 @@ class Access(object):
     # used when dispatching a trigger
     operation_to_trigger_ref_map = {}
 
+    # True to cache lookups by id, name and ref. Meant for the metadata resources which are read
+    # on every execution, but change rarely.
+    cache_lookups = False
+
     @classmethod
     @abc.abstractmethod
     def _get_impl(cls):
@@ -77,15 +84,15 @@ class Access(object):
 
     @classmethod
     def get_by_name(cls, value):
-        return cls._get_impl().get_by_name(value)
+        return cls._get_cached(('name', value), cls._get_impl().get_by_name, value)
 
     @classmethod
     def get_by_id(cls, value):
-        return cls._get_impl().get_by_id(value)
+        return cls._get_cached(('id', str(value)), cls._get_impl().get_by_id, value)
 
     @classmethod
     def get_by_ref(cls, value):
-        return cls._get_impl().get_by_ref(value)
+        return cls._get_cached(('ref', value), cls._get_impl().get_by_ref, value)
 
     @classmethod
     def get(cls, *args, **kwargs):
@@ -103,6 +110,10 @@ class Access(object):
     def query(cls, *args, **kwargs):
         return cls._get_impl().query(*args, **kwargs)
 
+    @classmethod
+    def get_pagination_cursor(cls, queryset, instance):
+        return cls._get_impl().get_pagination_cursor(queryset=queryset, instance=instance)
+
     @classmethod
     def distinct(cls, *args, **kwargs):
         return cls._get_impl().distinct(*args, **kwargs)
@@ -126,6 +137,8 @@ class Access(object):
             raise StackStormDBObjectConflictError(message=message, conflict_id=conflict_id,
                                                   model_object=model_object)
 
+        cls.invalidate_cache()
+
         is_update = str(pre_persist_id) == str(model_object.id)
 
         # Publish internal event on the message bus
@@ -150,9 +163,126 @@ class Access(object):
 
         return model_object
 
+    @classmethod
+    def add_or_update_many(cls, model_objects, publish=True, dispatch_trigger=True):
+        """
+        Save multiple objects using a single bulk write.
+
+        Objects which fail to save don't prevent the other objects from being saved. The
+        failures are returned instead of raised.
+
+        :return: (saved objects, errors) where errors is a list of (object, exception) tuples, one
+                 for each object which failed to save. Unique index violations are reported as
+                 ``StackStormDBObjectConflictError``.
+        :rtype: ``tuple``
+        """
+        pre_persist_ids = dict([(id(model_object), model_object.id)
+                                for model_object in model_objects])
+        saved_objects, errors = cls._get_impl().add_or_update_many(model_objects)
+
+        if saved_objects:
+            cls.invalidate_cache()
+
+        created_objects = []
+        updated_objects = []
+        for model_object in saved_objects:
+            pre_persist_id = pre_persist_ids[id(model_object)]
+            if str(pre_persist_id) == str(model_object.id):
+                updated_objects.append(model_object)
+            else:
+                created_objects.append(model_object)
+
+        if publish:
+            try:
+                cls.publish_many('create', created_objects)
+                cls.publish_many('update', updated_objects)
+            except:
+                LOG.exception('Publish failed.')
+
+        if dispatch_trigger:
+            for model_object in created_objects:
+                try:
+                    cls.dispatch_create_trigger(model_object)
+                except:
+                    LOG.exception('Trigger dispatch failed.')
+
+            for model_object in updated_objects:
+                try:
+                    cls.dispatch_update_trigger(model_object)
+                except:
+                    LOG.exception('Trigger dispatch failed.')
+
+        errors = [(model_object, cls._get_save_error(model_object=model_object, error=error))
+                  for model_object, error in errors]
+        return saved_objects, errors
+
+    @classmethod
+    def _get_save_error(cls, model_object, error):
+        if not isinstance(error, NotUniqueError):
+            return error
+
+        LOG.warning('Conflict while trying to save in DB: %s', error)
+        conflict_object = cls._get_by_object(model_object)
+        conflict_id = str(conflict_object.id) if conflict_object else None
+        return StackStormDBObjectConflictError(message=str(error), conflict_id=conflict_id,
+                                               model_object=model_object)
+
+    @classmethod
+    def update(cls, model_id, expected_status=None, publish=True, dispatch_trigger=True,
+               **set_fields):
+        """
+        Atomically update only the provided fields of an object.
+
+        :param model_id: Id of the object to update.
+
+        :param expected_status: If provided, the object is only updated if its current status
+                                matches (compare-and-set).
+        :type expected_status: ``str``
+
+        :return: Updated object or ``None`` if the object doesn't exist or its status doesn't
+                 match ``expected_status``.
+        """
+        conditions = {'id': model_id}
+        if expected_status is not None:
+            conditions['status'] = expected_status
+
+        return cls.update_by_query(conditions, publish=publish, dispatch_trigger=dispatch_trigger,
+                                   **set_fields)
+
+    @classmethod
+    def update_by_query(cls, conditions, publish=True, dispatch_trigger=True, **set_fields):
+        """
+        Atomically update only the provided fields of the object which matches the conditions.
+
+        :param conditions: Query filters which select the object.
+        :type conditions: ``dict``
+
+        :return: Updated object or ``None`` if no object matches the conditions.
+        """
+        model_object = cls._get_impl().update(conditions, **set_fields)
+        if model_object is None:
+            return None
+
+        cls.invalidate_cache()
+
+        if publish:
+            try:
+                cls.publish_update(model_object)
+            except:
+                LOG.exception('Publish failed.')
+
+        if dispatch_trigger:
+            try:
+                cls.dispatch_update_trigger(model_object)
+            except:
+                LOG.exception('Trigger dispatch failed.')
+
+        return model_object
+
     @classmethod
     def delete(cls, model_object, publish=True, dispatch_trigger=True):
         persisted_object = cls._get_impl().delete(model_object)
+        cls.invalidate_cache()
 
         # Publish internal event on the message bus
         if publish:
@@ -170,27 +300,168 @@ class Access(object):
 
         return persisted_object
 
+    @classmethod
+    def delete_many(cls, model_objects, publish=True, dispatch_trigger=True):
+        """
+        Delete multiple objects using a single query.
+
+        :return: Number of deleted objects.
+        :rtype: ``int``
+        """
+        deleted_count = cls._get_impl().delete_many(model_objects)
+        cls.invalidate_cache()
+
+        if publish:
+            try:
+                cls.publish_many('delete', model_objects)
+            except Exception:
+                LOG.exception('Publish failed.')
+
+        if dispatch_trigger:
+            for model_object in model_objects:
+                try:
+                    cls.dispatch_delete_trigger(model_object)
+                except Exception:
+                    LOG.exception('Trigger dispatch failed.')
+
+        return deleted_count
+
+    ##############################
+    # Lookup cache related methods
+    ##############################
+
+    @classmethod
+    def get_cache_stats(cls):
+        """
+        Return lookup cache statistics (size, hits, misses, evictions) or ``None`` if lookups of
+        this resource are not cached.
+        """
+        cache = cls._get_cache()
+        return cache.get_stats() if cache is not None else None
+
+    @classmethod
+    def invalidate_cache(cls, *args, **kwargs):
+        # Note: Cache is keyed by id, name and ref so it's cleared on every change.
+        cache = cls.__dict__.get('_cache', None)
+        if cache is not None:
+            cache.clear()
+
+    @classmethod
+    def _get_cache(cls):
+        if not cls.cache_lookups or not cfg.CONF.metadata_cache.enabled:
+            return None
+
+        # Each resource class has its own cache.
+        cache = cls.__dict__.get('_cache', None)
+        if cache is not None:
+            return cache
+
+        cache = cache_utils.LRUCache(max_size=cfg.CONF.metadata_cache.size,
+                                     ttl=cfg.CONF.metadata_cache.ttl)
+        cls._cache = cache
+        cls._watch_cache()
+        return cache
+
+    @classmethod
+    def _watch_cache(cls):
+        """
+        Invalidate the cache on the CUD events published by other processes.
+        """
+        publisher = cls._get_publisher()
+        if not publisher:
+            # Entries of the resources without CUD events only expire.
+            return
+
+        from st2common.services import cachewatcher
+        watcher = cachewatcher.get_watcher()
+        watcher.watch(exchange=publisher._exchange, callback=cls.invalidate_cache)
+        watcher.start()
+
+    @classmethod
+    def _get_cached(cls, key, lookup_func, *args):
+        cache = cls._get_cache()
+        if cache is None:
+            return lookup_func(*args)
+
+        # Callers are free to modify the returned objects so the cache hands out copies.
+        model_object = cache.get(key, None)
+        if model_object is not None:
+            return copy.deepcopy(model_object)
+
+        model_object = lookup_func(*args)
+        if model_object is not None:
+            cache.set(key, copy.deepcopy(model_object))
+
+        return model_object
+
     ####################################################
     # Internal event bus message publish related methods
     ####################################################
 
     @classmethod
     def publish_create(cls, model_object):
-        publisher = cls._get_publisher()
-        if publisher:
-            publisher.publish_create(model_object)
+        cls.publish_event('create', model_object)
 
     @classmethod
     def publish_update(cls, model_object):
-        publisher = cls._get_publisher()
-        if publisher:
-            publisher.publish_update(model_object)
+        cls.publish_event('update', model_object)
 
     @classmethod
     def publish_delete(cls, model_object):
+        cls.publish_event('delete', model_object)
+
+    @classmethod
+    def publish_event(cls, operation, model_object, use_outbox=None):
+        """
+        Publish an internal event for the provided model object.
+
+        When the outbox is used, the event is recorded in the database and published in the
+        background by the outbox flusher.
+
+        :param operation: Event type (create, update, delete).
+        :type operation: ``str``
+
+        :param use_outbox: Record the event in the outbox. Defaults to the ``messaging.outbox``
+                           config option.
+        :type use_outbox: ``bool``
+        """
+        publisher = cls._get_publisher()
+        if not publisher:
+            return
+
+        if use_outbox is None:
+            use_outbox = cfg.CONF.messaging.outbox
+
+        if use_outbox:
+            from st2common.services import outbox as outbox_service
+            outbox_service.add_event(resource_cls=cls, operation=operation,
+                                     model_object=model_object)
+            return
+
+        cls._publish_event(publisher=publisher, operation=operation, model_object=model_object)
+
+    @classmethod
+    def publish_many(cls, operation, model_objects):
+        """
+        Publish an internal event for each of the provided model objects as a single batch.
+
+        :param operation: Event type (create, update, delete).
+        :type operation: ``str``
+        """
         publisher = cls._get_publisher()
-        if publisher:
-            publisher.publish_delete(model_object)
+        if not publisher or not model_objects:
+            return
+
+        if cfg.CONF.messaging.outbox:
+            for model_object in model_objects:
+                cls.publish_event(operation, model_object)
+            return
+
+        getattr(publisher, 'publish_%s_many' % (operation))(model_objects)
+
+    @classmethod
+    def _publish_event(cls, publisher, operation, model_object):
+        getattr(publisher, 'publish_%s' % (operation))(model_object)
 
     ############################################
     # Internal trigger dispatch related methods
@@ -256,6 +527,10 @@ class ContentPackResource(Access):
         if not ref:
             return None
 
+        return cls._get_cached(('ref', ref), cls._get_by_ref, ref)
+
+    @classmethod
+    def _get_by_ref(cls, ref):
         ref_obj = ResourceReference.from_string_reference(ref=ref)
         result = cls.query(name=ref_obj.name,
                            pack=ref_obj.pack).first()
@@ -282,6 +557,13 @@ class StatusBasedResource(Access):
         :param model_object: An instance of the model.
         :type model_object: ``object``
         """
-        publisher = cls._get_publisher()
-        if publisher:
+        cls.publish_event('status', model_object)
+
+    @classmethod
+    def _publish_event(cls, publisher, operation, model_object):
+        if operation == 'status':
             publisher.publish_state(model_object, getattr(model_object, 'status', None))
+            return
+
+        super(StatusBasedResource, cls)._publish_event(publisher=publisher, operation=operation,
+                                                       model_object=model_object)
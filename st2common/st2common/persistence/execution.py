@@ -16,10 +16,20 @@
 from st2common import transport
 from st2common.models.db import MongoDBAccess
 from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.execution import ActionExecutionResultDB
+from st2common.models.db.execution import SHARED_FIELDS
 from st2common.persistence.base import Access
+from st2common.persistence.liveaction import LiveAction
 from st2common.transport import utils as transport_utils
 
 
+def _get_value(obj, name):
+    if isinstance(obj, dict):
+        return obj.get(name, None)
+
+    return getattr(obj, name, None)
+
+
 class ActionExecution(Access):
     impl = MongoDBAccess(ActionExecutionDB)
     publisher = None
@@ -34,3 +44,93 @@ class ActionExecution(Access):
             cls.publisher = transport.execution.ActionExecutionPublisher(
                 urls=transport_utils.get_messaging_urls())
         return cls.publisher
+
+    @classmethod
+    def publish_event(cls, operation, model_object, use_outbox=None):
+        # Consumers of the events expect complete executions
+        if operation != 'delete':
+            cls.populate_shared_fields([model_object])
+
+        super(ActionExecution, cls).publish_event(operation, model_object, use_outbox=use_outbox)
+
+    @classmethod
+    def publish_many(cls, operation, model_objects):
+        if operation != 'delete':
+            cls.populate_shared_fields(model_objects)
+
+        super(ActionExecution, cls).publish_many(operation, model_objects)
+
+    @classmethod
+    def populate_shared_fields(cls, executions, fields=None):
+        """
+        Fill in the fields of the executions which are only stored in the corresponding
+        liveactions (see "result_storage.deduplicate" config option). All the liveactions are
+        retrieved with a single query.
+
+        :param executions: Execution model instances or raw documents.
+        :type executions: ``list``
+
+        :param fields: Fields to fill in. Defaults to all the shared fields.
+        :type fields: ``list``
+
+        :rtype: ``list``
+        """
+        if fields is None:
+            fields = SHARED_FIELDS
+        fields = [field for field in fields if field in SHARED_FIELDS]
+
+        pending = {}
+        for execution in executions:
+            if not _get_value(execution, 'shared_fields'):
+                continue
+
+            liveaction_id = (_get_value(execution, 'liveaction') or {}).get('id', None)
+            pending.setdefault(liveaction_id, []).append(execution)
+
+        if not pending:
+            return executions
+
+        if fields:
+            raw = isinstance(executions[0], dict)
+            liveaction_ids = [key for key in pending.keys() if key]
+            liveactions = LiveAction.query(id__in=liveaction_ids, include_fields=fields)
+            if raw:
+                liveactions = liveactions.as_pymongo()
+
+            for liveaction in liveactions:
+                liveaction_id = str(_get_value(liveaction, '_id' if raw else 'id'))
+                values = dict([(field, _get_value(liveaction, field)) for field in fields])
+
+                for execution in pending.pop(liveaction_id, []):
+                    cls.set_shared_fields(execution, values)
+
+        # Executions whose liveaction doesn't exist anymore are left with the default values
+        for pending_executions in pending.values():
+            for execution in pending_executions:
+                cls.set_shared_fields(execution, {})
+
+        return executions
+
+    @staticmethod
+    def set_shared_fields(execution, values):
+        """
+        Set the values of the shared fields on the execution (model instance or raw document)
+        and mark them as filled in.
+        """
+        if isinstance(execution, dict):
+            execution.update(values)
+            execution.pop('shared_fields', None)
+            return
+
+        for field, value in values.items():
+            setattr(execution, field, value)
+        execution.shared_fields = []
+
+
+class ActionExecutionResult(Access):
+    impl = MongoDBAccess(ActionExecutionResultDB)
+    publisher = None
+
+    @classmethod
+    def _get_impl(cls):
+        return cls.impl
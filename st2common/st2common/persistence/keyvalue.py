@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from st2common import transport
 from st2common.persistence.base import Access
 from st2common.models.db import keyvalue
 from st2common.models.api.keyvalue import KeyValuePairAPI
@@ -21,6 +22,7 @@ from st2common.constants.triggers import KEY_VALUE_PAIR_CREATE_TRIGGER
 from st2common.constants.triggers import KEY_VALUE_PAIR_UPDATE_TRIGGER
 from st2common.constants.triggers import KEY_VALUE_PAIR_VALUE_CHANGE_TRIGGER
 from st2common.constants.triggers import KEY_VALUE_PAIR_DELETE_TRIGGER
+from st2common.transport import utils as transport_utils
 
 
 class KeyValuePair(Access):
@@ -83,10 +85,26 @@ class KeyValuePair(Access):
 
         return cls._dispatch_trigger(operation=operation, trigger=trigger, payload=payload)
 
+    @classmethod
+    def invalidate_cache(cls, *args, **kwargs):
+        super(KeyValuePair, cls).invalidate_cache(*args, **kwargs)
+
+        # Values cached by this process are dropped right away, other processes drop them when
+        # they receive the CUD event.
+        from st2common.services import keyvalues
+        keyvalues.invalidate_cache()
+
     @classmethod
     def _get_impl(cls):
         return cls.impl
 
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.keyvalue.KeyValuePairCUDPublisher(
+                urls=transport_utils.get_messaging_urls())
+        return cls.publisher
+
     @classmethod
     def _get_by_object(cls, object):
         # For KeyValuePair name is unique.
@@ -0,0 +1,52 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from st2common.models.db import MongoDBAccess
+from st2common.models.db.outbox import OutboxEventDB
+from st2common.persistence.base import Access
+
+__all__ = [
+    'OutboxEvent'
+]
+
+
+class OutboxEvent(Access):
+    impl = MongoDBAccess(OutboxEventDB)
+    publisher = None
+
+    @classmethod
+    def _get_impl(cls):
+        return cls.impl
+
+    @classmethod
+    def claim(cls, event, lease_expires_at):
+        """
+        Atomically claim an event until the provided timestamp.
+
+        :return: ``True`` if the event has been claimed by the caller.
+        :rtype: ``bool``
+        """
+        updated = cls.impl.model.objects(id=event.id,
+                                         lease_expires_at=event.lease_expires_at).update_one(
+            set__lease_expires_at=lease_expires_at)
+        return bool(updated)
+
+    @classmethod
+    def delete_delivered(cls, event_ids):
+        """
+        Remove the events which have been published.
+        """
+        return cls.impl.model.objects(id__in=event_ids).delete()
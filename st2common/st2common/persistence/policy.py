@@ -20,6 +20,7 @@ from st2common.persistence.base import Access, ContentPackResource
 
 class PolicyType(Access):
     impl = MongoDBAccess(PolicyTypeDB)
+    cache_lookups = True
 
     @classmethod
     def _get_impl(cls):
@@ -28,12 +29,16 @@ class PolicyType(Access):
     @classmethod
     def get_by_ref(cls, ref):
         if ref:
-            ref_obj = PolicyTypeReference.from_string_reference(ref=ref)
-            result = cls.query(name=ref_obj.name, resource_type=ref_obj.resource_type).first()
-            return result
+            return cls._get_cached(('ref', ref), cls._get_by_ref, ref)
         else:
             return None
 
+    @classmethod
+    def _get_by_ref(cls, ref):
+        ref_obj = PolicyTypeReference.from_string_reference(ref=ref)
+        result = cls.query(name=ref_obj.name, resource_type=ref_obj.resource_type).first()
+        return result
+
     @classmethod
     def _get_by_object(cls, object):
         name = getattr(object, 'name', '')
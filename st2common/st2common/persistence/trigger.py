@@ -30,6 +30,7 @@ class TriggerType(ContentPackResource):
 class Trigger(ContentPackResource):
     impl = trigger_access
     publisher = None
+    cache_lookups = True
 
     @classmethod
     def _get_impl(cls):
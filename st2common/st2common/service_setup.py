@@ -20,15 +20,20 @@ This module contains common service setup and teardown code.
 from __future__ import absolute_import
 
 import os
+import time
 import logging as stdlib_logging
+from collections import OrderedDict
 
+import eventlet
 from oslo_config import cfg
 
 from st2common import log as logging
 from st2common.models import db
+from st2common.models.db import profiling
 from st2common.constants.logging import DEFAULT_LOGGING_CONF_PATH
 from st2common.logging.misc import set_log_level_for_all_loggers
 from st2common.transport.bootstrap_utils import register_exchanges
+from st2common.transport.publishers import flush_pending_updates
 from st2common.signal_handlers import register_common_signal_handlers
 
 __all__ = [
@@ -36,14 +41,21 @@ __all__ = [
     'teardown',
 
     'db_setup',
-    'db_teardown'
+    'db_teardown',
+
+    'setup_query_profiler',
+
+    'get_startup_timings'
 ]
 
 LOG = logging.getLogger(__name__)
 
+# Duration (in seconds) of the individual startup steps of the service
+STARTUP_TIMINGS = OrderedDict()
+
 
 def setup(service, config, setup_db=True, register_mq_exchanges=True,
-          register_signal_handlers=True):
+          register_signal_handlers=True, model_module_names=None):
     """
     Common setup function.
 
@@ -51,19 +63,27 @@ def setup(service, config, setup_db=True, register_mq_exchanges=True,
 
     1. Parses config and CLI arguments
     2. Establishes DB connection
-    3. Set log level for all the loggers to DEBUG if --debug flag is present
-    4. Registers RabbitMQ exchanges
-    5. Registers common signal handlers
+    3. Ensures the indexes of the models used by the service (see database.index_creation)
+    4. Set log level for all the loggers to DEBUG if --debug flag is present
+    5. Enables the query profiler if query_profiler.enabled is set
+    6. Registers RabbitMQ exchanges
+    7. Registers common signal handlers
 
     :param service: Name of the service.
     :param config: Config object to use to parse args.
+    :param model_module_names: Names of the modules with the models used by the service whose
+                               indexes are ensured. Defaults to all the models.
     """
+    start_time = time.time()
+
     # Set up logger which logs everything which happens during and before config
     # parsing to sys.stdout
     logging.setup(DEFAULT_LOGGING_CONF_PATH)
 
     # Parse args to setup config.
+    step_start_time = time.time()
     config.parse_args()
+    _record_timing('config', step_start_time)
 
     config_file_paths = cfg.CONF.config_file
     config_file_paths = [os.path.abspath(path) for path in config_file_paths]
@@ -79,33 +99,127 @@ def setup(service, config, setup_db=True, register_mq_exchanges=True,
     if cfg.CONF.debug:
         set_log_level_for_all_loggers(level=stdlib_logging.DEBUG)
 
+    if cfg.CONF.query_profiler.enabled:
+        setup_query_profiler(service=service)
+
     # All other setup which requires config to be parsed and logging to
     # be correctly setup.
     if setup_db:
-        db_setup()
+        step_start_time = time.time()
+        db_setup(ensure_indexes=False)
+        _record_timing('db_connect', step_start_time)
+
+        db_ensure_indexes(model_module_names=model_module_names)
 
     if register_mq_exchanges:
+        step_start_time = time.time()
         register_exchanges()
+        _record_timing('register_exchanges', step_start_time)
 
     if register_signal_handlers:
         register_common_signal_handlers()
 
+    _record_timing('total', start_time)
+    LOG.info('Service "%s" set up in %.3fs (%s).', service, STARTUP_TIMINGS['total'],
+             _format_timings(STARTUP_TIMINGS))
+
 
 def teardown():
     """
     Common teardown function.
     """
+    flush_pending_updates()
+    profiling.disable_query_profiler()
     db_teardown()
 
 
-def db_setup():
+def db_setup(ensure_indexes=True):
     username = getattr(cfg.CONF.database, 'username', None)
     password = getattr(cfg.CONF.database, 'password', None)
 
     connection = db.db_setup(db_name=cfg.CONF.database.db_name, db_host=cfg.CONF.database.host,
-                             db_port=cfg.CONF.database.port, username=username, password=password)
+                             db_port=cfg.CONF.database.port, username=username, password=password,
+                             ensure_indexes=ensure_indexes)
     return connection
 
 
+def db_ensure_indexes(model_module_names=None):
+    """
+    Ensure the indexes of the provided models as configured by database.index_creation.
+
+    Note: st2-register-content always ensures the indexes of all the models in the foreground so
+    the services can skip it or build them in the background.
+    """
+    index_creation = cfg.CONF.database.index_creation
+
+    if index_creation != 'foreground':
+        # Otherwise the first query of each model would build its indexes in the foreground.
+        db.db_set_auto_create_index(False)
+
+    if index_creation == 'none':
+        LOG.debug('Skipping the creation of the database indexes.')
+        return
+
+    if index_creation == 'background':
+        return eventlet.spawn(_ensure_indexes, model_module_names=model_module_names,
+                              background=True)
+
+    return _ensure_indexes(model_module_names=model_module_names, background=False)
+
+
 def db_teardown():
     return db.db_teardown()
+
+
+def setup_query_profiler(service):
+    """
+    Enable the query profiler and periodically dump its profile to a file of this process.
+    """
+    profiler = profiling.enable_query_profiler(
+        slow_threshold=cfg.CONF.query_profiler.slow_threshold,
+        max_shapes=cfg.CONF.query_profiler.max_shapes,
+        explain=cfg.CONF.query_profiler.explain)
+
+    file_name = '%s-%s.json' % (service, os.getpid())
+    file_path = os.path.join(cfg.CONF.query_profiler.dump_dir, file_name)
+    profiler.start_dumping(file_path=file_path, interval=cfg.CONF.query_profiler.dump_interval)
+
+    LOG.info('Query profiler enabled, profile is dumped to "%s".', file_path)
+    return profiler
+
+
+def get_startup_timings():
+    """
+    Return the duration (in seconds) of the startup steps of the service.
+
+    :rtype: ``dict``
+    """
+    return dict(STARTUP_TIMINGS)
+
+
+def _ensure_indexes(model_module_names, background):
+    start_time = time.time()
+
+    try:
+        db.db_ensure_indexes(model_module_names=model_module_names, background=background)
+    except Exception:
+        if not background:
+            raise
+
+        LOG.exception('Failed to create the database indexes in the background.')
+        return
+
+    _record_timing('db_ensure_indexes', start_time)
+
+    if background:
+        LOG.info('Database indexes ensured in the background in %.3fs.',
+                 STARTUP_TIMINGS['db_ensure_indexes'])
+
+
+def _record_timing(name, start_time):
+    STARTUP_TIMINGS[name] = time.time() - start_time
+
+
+def _format_timings(timings):
+    return ', '.join('%s=%.3fs' % (name, value) for name, value in timings.items()
+                     if name != 'total')
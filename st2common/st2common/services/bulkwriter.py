@@ -0,0 +1,145 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import eventlet
+from eventlet import event
+from eventlet import queue
+
+from st2common import log as logging
+
+__all__ = [
+    'BulkWriter'
+]
+
+LOG = logging.getLogger(__name__)
+
+# Queued after the last pending write to stop the flusher.
+_SHUTDOWN = object()
+
+
+class _PendingWrite(object):
+    def __init__(self, model_object):
+        self.model_object = model_object
+        self.result = event.Event()
+
+
+class BulkWriter(object):
+    """
+    Saves objects which are added by many greenthreads using bulk writes.
+
+    Objects are collected for up to ``batch_window`` seconds or until ``batch_size`` objects are
+    buffered, whichever comes first, and then saved with ``add_or_update_many`` of the provided
+    persistence class.
+
+    ``add_or_update`` blocks the calling greenthread until its own object is saved and raises if
+    saving of that object failed, so callers see the same behavior as with
+    ``Access.add_or_update``.
+
+    On shutdown, the pending writes are saved before the flusher exits and objects added after
+    that are saved right away.
+    """
+
+    def __init__(self, resource_cls, batch_size=100, batch_window=0.01):
+        self._resource_cls = resource_cls
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+
+        self._queue = queue.LightQueue()
+        self._flusher_thread = None
+        self._shutdown = False
+
+    def add_or_update(self, model_object):
+        if self._batch_size <= 1 or self._shutdown:
+            return self._resource_cls.add_or_update(model_object)
+
+        pending_write = _PendingWrite(model_object=model_object)
+        self._queue.put(pending_write)
+
+        if self._flusher_thread is None:
+            self._flusher_thread = eventlet.spawn(self._flush_forever)
+
+        return pending_write.result.wait()
+
+    def shutdown(self):
+        """
+        Stop batching and wait until all the pending writes are saved.
+        """
+        self._shutdown = True
+
+        if self._flusher_thread is not None:
+            self._queue.put(_SHUTDOWN)
+            self._flusher_thread.wait()
+            self._flusher_thread = None
+
+    def _flush_forever(self):
+        while True:
+            batch, stop = self._get_batch()
+
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    LOG.exception('Failed to write batch of %s %s objects.', len(batch),
+                                  self._resource_cls.__name__)
+
+                    for pending_write in batch:
+                        if not pending_write.result.ready():
+                            pending_write.result.send_exception(e)
+
+            if stop:
+                return
+
+    def _get_batch(self):
+        """
+        :return: Batch of pending writes and whether the flusher should stop after writing it.
+        :rtype: ``tuple``
+        """
+        # Block until there is at least one object, then linger for the rest of the batch.
+        pending_write = self._queue.get()
+        if pending_write is _SHUTDOWN:
+            return [], True
+
+        batch = [pending_write]
+        time_left = self._batch_window
+
+        while len(batch) < self._batch_size and time_left > 0:
+            start = time.time()
+
+            try:
+                pending_write = self._queue.get(timeout=time_left)
+            except queue.Empty:
+                break
+
+            if pending_write is _SHUTDOWN:
+                return batch, True
+
+            batch.append(pending_write)
+            time_left -= time.time() - start
+
+        return batch, False
+
+    def _write_batch(self, batch):
+        pending_writes = dict([(id(pending_write.model_object), pending_write)
+                               for pending_write in batch])
+        saved, errors = self._resource_cls.add_or_update_many(
+            [pending_write.model_object for pending_write in batch])
+
+        for model_object, error in errors:
+            pending_writes[id(model_object)].result.send_exception(error)
+
+        for model_object in saved:
+            pending_writes[id(model_object)].result.send(model_object)
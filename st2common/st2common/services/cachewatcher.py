@@ -0,0 +1,120 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Watcher which invalidates the in-process resource caches when the cached resources are changed
+by other processes.
+"""
+
+import uuid
+
+import eventlet
+from kombu import Connection, Queue, binding
+
+from st2common import log as logging
+from st2common.transport import action, reactor, serializers
+from st2common.transport.consumers import ConsumerMixin
+from st2common.transport.keyvalue import KEY_VALUE_PAIR_CUD_XCHG
+from st2common.transport import utils as transport_utils
+
+__all__ = [
+    'CacheWatcher',
+    'get_watcher'
+]
+
+LOG = logging.getLogger(__name__)
+
+# CUD exchanges of the resources which can be cached.
+WATCHED_EXCHANGES = [action.ACTION_CUD_XCHG, action.RUNNERTYPE_CUD_XCHG,
+                     reactor.TRIGGER_CUD_XCHG, KEY_VALUE_PAIR_CUD_XCHG]
+
+
+class CacheWatcher(ConsumerMixin):
+
+    def __init__(self, exchanges=None):
+        self._exchanges = exchanges or WATCHED_EXCHANGES
+        self._queue = self._get_queue(self._exchanges)
+
+        # exchange name -> list of invalidation callbacks
+        self._callbacks = {}
+
+        self.connection = None
+        self._updates_thread = None
+
+    def watch(self, exchange, callback):
+        """
+        Call the provided function on every CUD event published on the provided exchange.
+        """
+        self._callbacks.setdefault(exchange.name, []).append(callback)
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=[self._queue],
+                         accept=serializers.ACCEPTED_SERIALIZERS,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        exchange_name = message.delivery_info.get('exchange', '')
+
+        try:
+            for callback in self._callbacks.get(exchange_name, []):
+                try:
+                    callback(body)
+                except Exception:
+                    LOG.exception('Cache invalidation failed. Message body: %s', body)
+        finally:
+            message.ack()
+
+    def start(self):
+        if self._updates_thread is not None:
+            return
+
+        try:
+            self.connection = Connection(transport_utils.get_messaging_urls())
+            self._updates_thread = eventlet.spawn(self.run)
+        except:
+            LOG.exception('Failed to start cache watcher.')
+            self._release_connection()
+
+    def stop(self):
+        try:
+            if self._updates_thread is not None:
+                self._updates_thread = eventlet.kill(self._updates_thread)
+        finally:
+            self._release_connection()
+
+    def _release_connection(self):
+        if self.connection is not None:
+            self.connection.release()
+            self.connection = None
+
+    @staticmethod
+    def _get_queue(exchanges):
+        u_hex = uuid.uuid4().hex
+        queue_name = 'st2.cache.watch.%s' % (u_hex[len(u_hex) - 10:])
+        bindings = [binding(exchange, routing_key='#') for exchange in exchanges]
+        return Queue(queue_name, bindings=bindings, exclusive=True, auto_delete=True)
+
+
+_watcher = None
+
+
+def get_watcher():
+    global _watcher
+
+    if not _watcher:
+        _watcher = CacheWatcher()
+
+    return _watcher
@@ -28,7 +28,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import six
+from oslo_config import cfg
 
 from st2common.util import reference
 import st2common.util.action_db as action_utils
@@ -41,6 +41,8 @@ from st2common.models.api.action import RunnerTypeAPI, ActionAPI, LiveActionAPI
 from st2common.models.api.rule import RuleAPI
 from st2common.models.api.trigger import TriggerTypeAPI, TriggerAPI, TriggerInstanceAPI
 from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.execution import SHARED_FIELDS
+from st2common.services import resultstorage
 from st2common import log as logging
 
 __all__ = [
@@ -56,6 +58,9 @@ LOG = logging.getLogger(__name__)
 
 SKIPPED = ['id', 'callback', 'action', 'runner_info']
 
+# LiveAction fields which are updated after the execution has been created.
+UPDATED_FIELDS = ['status', 'end_timestamp', 'result', 'context']
+
 
 def _decompose_liveaction(liveaction_db):
     """
@@ -71,6 +76,20 @@ def _decompose_liveaction(liveaction_db):
     return decomposed
 
 
+def _get_liveaction_reference(liveaction_db):
+    """
+    Return the "liveaction" field of the execution without serializing the whole liveaction.
+    """
+    reference = {'id': str(liveaction_db.id)}
+
+    for field in SKIPPED[1:]:
+        value = getattr(liveaction_db, field, None)
+        if value is not None:
+            reference[field] = value
+
+    return reference
+
+
 def create_execution_object(liveaction, publish=True):
     action_db = action_utils.get_action_by_ref(liveaction.action)
     runner = RunnerType.get_by_name(action_db.runner_type['name'])
@@ -81,6 +100,12 @@ def create_execution_object(liveaction, publish=True):
     }
     attrs.update(_decompose_liveaction(liveaction))
 
+    deduplicate = cfg.CONF.result_storage.deduplicate
+    if deduplicate:
+        for field in SHARED_FIELDS:
+            attrs.pop(field, None)
+        attrs['shared_fields'] = SHARED_FIELDS
+
     if 'rule' in liveaction.context:
         rule = reference.get_model_from_ref(Rule, liveaction.context.get('rule', {}))
         attrs['rule'] = vars(RuleAPI.from_model(rule))
@@ -104,7 +129,13 @@ def create_execution_object(liveaction, publish=True):
         attrs['parent'] = str(parent.id)
 
     execution = ActionExecutionDB(**attrs)
-    execution = ActionExecution.add_or_update(execution, publish=publish)
+    execution = ActionExecution.add_or_update(execution, publish=publish and not deduplicate)
+
+    if deduplicate:
+        # The liveaction is at hand, no need to retrieve it again
+        _set_shared_fields(execution_db=execution, liveaction_db=liveaction)
+        if publish:
+            _publish_execution(execution_db=execution, operation='create')
 
     if parent:
         if str(execution.id) not in parent.children:
@@ -128,14 +159,70 @@ def _get_parent_execution(child_liveaction_db):
 
 
 def update_execution(liveaction_db, publish=True):
-    execution = ActionExecution.get(liveaction__id=str(liveaction_db.id))
-    decomposed = _decompose_liveaction(liveaction_db)
-    for k, v in six.iteritems(decomposed):
-        setattr(execution, k, v)
-    execution = ActionExecution.add_or_update(execution, publish=publish)
+    """
+    Copy the fields which change during the execution life cycle from the liveaction to the
+    corresponding execution. Only those fields are written.
+
+    Large results are stored outside of the execution (see ``resultstorage``). When the
+    deduplication is enabled, the shared fields aren't copied at all and they are removed from
+    the executions which have been created before it was enabled.
+    """
+    deduplicate = cfg.CONF.result_storage.deduplicate
+    set_fields = {}
+
+    for field in UPDATED_FIELDS:
+        value = getattr(liveaction_db, field, None)
+        if value is not None:
+            set_fields[field] = value
+
+    set_fields['liveaction'] = _get_liveaction_reference(liveaction_db)
+
+    if deduplicate:
+        set_fields.update(dict([(field, None) for field in SHARED_FIELDS]))
+        set_fields['shared_fields'] = SHARED_FIELDS
+        set_fields['result_ref'] = None
+    elif 'result' in set_fields:
+        set_fields.update(_get_result_fields(liveaction_db=liveaction_db,
+                                             result=set_fields['result']))
+
+    execution = ActionExecution.update_by_query({'liveaction__id': str(liveaction_db.id)},
+                                                publish=publish and not deduplicate,
+                                                **set_fields)
+
+    if execution and deduplicate:
+        _set_shared_fields(execution_db=execution, liveaction_db=liveaction_db)
+        if publish:
+            _publish_execution(execution_db=execution, operation='update')
+
     return execution
 
 
+def _set_shared_fields(execution_db, liveaction_db):
+    values = dict([(field, getattr(liveaction_db, field, None)) for field in SHARED_FIELDS])
+    ActionExecution.set_shared_fields(execution_db, values)
+
+
+def _publish_execution(execution_db, operation):
+    try:
+        ActionExecution.publish_event(operation, execution_db)
+    except:
+        LOG.exception('Publish failed.')
+
+
+def _get_result_fields(liveaction_db, result):
+    data = resultstorage.serialize_large_result(result)
+
+    if not data:
+        return {'result': result, 'result_ref': None}
+
+    execution_db = ActionExecution.query(liveaction__id=str(liveaction_db.id),
+                                         include_fields=['id']).first()
+    if not execution_db:
+        return {'result': result, 'result_ref': None}
+
+    return resultstorage.save_result(execution_id=str(execution_db.id), data=data)
+
+
 def is_execution_canceled(execution_id):
     try:
         execution = ActionExecution.get_by_id(execution_id)
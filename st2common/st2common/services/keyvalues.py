@@ -13,7 +13,221 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+"""
+Datastore lookups used when rendering the templates.
+
+Values are read through a process-wide cache (``datastore_cache`` config section). Looking up a
+key prefetches all the keys which start with it (e.g. ``a`` prefetches ``a.b`` and ``a.c``) so
+the dotted lookups which Jinja does one part at a time need a single query. The cache is
+invalidated on the key value pair CUD events and its entries expire after a short time as a
+safety net.
+"""
+
+import calendar
+import threading
+import time
+
+from oslo_config import cfg
+
+from st2common import log as logging
 from st2common.persistence.keyvalue import KeyValuePair
+from st2common.transport.keyvalue import KEY_VALUE_PAIR_CUD_XCHG
+from st2common.util.cache import LRUCache
+
+__all__ = [
+    'KeyValueLookup',
+    'KeyValueCache',
+
+    'get_cache',
+    'invalidate_cache'
+]
+
+LOG = logging.getLogger(__name__)
+
+
+class KeyValueCache(object):
+    """
+    Cache of the datastore values (and optionally of the missing keys).
+    """
+
+    def __init__(self, size=10000, ttl=10, cache_missing=True, prefetch_limit=100):
+        """
+        :param size: Max number of cached keys.
+        :type size: ``int``
+
+        :param ttl: Time in seconds after which a cached key expires.
+        :type ttl: ``int``
+
+        :param cache_missing: True to remember the keys which don't exist.
+        :type cache_missing: ``bool``
+
+        :param prefetch_limit: Max number of keys prefetched with a lookup. 0 disables the
+                               prefetch.
+        :type prefetch_limit: ``int``
+        """
+        self._ttl = ttl
+        self._cache_missing = cache_missing
+        self._prefetch_limit = prefetch_limit
+
+        # key name -> (exists, value, expires_at). expires_at is the key's own expiration.
+        self._values = LRUCache(max_size=size, ttl=ttl)
+        # Names of the looked up keys whose prefetch retrieved all the keys starting with them ->
+        # names of the retrieved keys. Values are evicted independently so only the names are
+        # trusted to tell that a key doesn't exist.
+        self._prefixes = LRUCache(max_size=size, ttl=ttl)
+
+        # Incremented on every invalidation so lookups which were in flight don't store stale
+        # values.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_value(self, name):
+        """
+        Retrieve the value of the provided key.
+
+        :return: Tuple of a flag which says if the key exists and the value of the key.
+        :rtype: ``tuple``
+        """
+        with self._lock:
+            entry = self._values.get(name, None)
+            prefetched_names = self._get_prefetched_names(name)
+
+        if entry is not None and (entry[2] is None or entry[2] > time.time()):
+            return entry[0], entry[1]
+
+        if self._cache_missing and prefetched_names is not None and \
+                name not in prefetched_names:
+            return False, None
+
+        return self._load(name)
+
+    def invalidate(self, kvp_db=None):
+        """
+        Drop the cached value of the provided key or of all the keys if not provided.
+        """
+        with self._lock:
+            self._generation += 1
+
+            if kvp_db is not None:
+                self._values.invalidate(kvp_db.name)
+            else:
+                self._values.clear()
+
+            # A created key makes the prefetched prefixes incomplete
+            self._prefixes.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'values': self._values.get_stats(),
+                'prefixes': self._prefixes.get_stats()
+            }
+
+    def _get_prefetched_names(self, name):
+        """
+        Return the names of all the keys which start with a completely prefetched prefix of the
+        provided key or ``None`` if no such prefix is cached.
+        """
+        parts = name.split('.')
+
+        for index in range(1, len(parts) + 1):
+            prefetched_names = self._prefixes.get('.'.join(parts[:index]), None)
+            if prefetched_names is not None:
+                return prefetched_names
+
+        return None
+
+    def _load(self, name):
+        generation = self._generation
+        kvp_dbs = []
+        complete = False
+
+        if self._prefetch_limit > 0:
+            # Note: Key sorts before all the other names with the prefix so it's always included
+            # if it exists.
+            kvp_dbs = list(KeyValuePair.query(name__startswith=name, order_by=['name'],
+                                              limit=self._prefetch_limit + 1))
+            complete = len(kvp_dbs) <= self._prefetch_limit
+            kvp_dbs = kvp_dbs[:self._prefetch_limit]
+
+        kvp_db = None
+        for prefetched_kvp_db in kvp_dbs:
+            if prefetched_kvp_db.name == name:
+                kvp_db = prefetched_kvp_db
+
+        if self._prefetch_limit <= 0:
+            try:
+                kvp_db = KeyValuePair.get_by_name(name)
+            except ValueError:
+                # ValueErrors are expected in case of partial lookups
+                pass
+
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated during the lookup, the result might be already stale
+                return self._get_result(kvp_db)
+
+            for prefetched_kvp_db in kvp_dbs:
+                self._values.set(prefetched_kvp_db.name, self._get_entry(prefetched_kvp_db))
+
+            if kvp_db is not None:
+                self._values.set(name, self._get_entry(kvp_db))
+            elif self._cache_missing:
+                self._values.set(name, (False, None, None))
+
+            if complete:
+                self._prefixes.set(name, frozenset([prefetched_kvp_db.name
+                                                    for prefetched_kvp_db in kvp_dbs]))
+
+        return self._get_result(kvp_db)
+
+    @staticmethod
+    def _get_entry(kvp_db):
+        expires_at = None
+
+        if kvp_db.expire_timestamp:
+            expires_at = calendar.timegm(kvp_db.expire_timestamp.utctimetuple())
+
+        return (True, kvp_db.value, expires_at)
+
+    @staticmethod
+    def _get_result(kvp_db):
+        return (True, kvp_db.value) if kvp_db is not None else (False, None)
+
+
+_cache = None
+
+
+def get_cache():
+    """
+    Return the process-wide datastore cache or ``None`` if caching is disabled.
+    """
+    global _cache
+
+    if not cfg.CONF.datastore_cache.enabled:
+        return None
+
+    if _cache is None:
+        _cache = KeyValueCache(size=cfg.CONF.datastore_cache.size,
+                               ttl=cfg.CONF.datastore_cache.ttl,
+                               cache_missing=cfg.CONF.datastore_cache.cache_missing,
+                               prefetch_limit=cfg.CONF.datastore_cache.prefetch_limit)
+
+        # Cache is invalidated on the changes made by the other processes
+        from st2common.services import cachewatcher
+        watcher = cachewatcher.get_watcher()
+        watcher.watch(exchange=KEY_VALUE_PAIR_CUD_XCHG, callback=_cache.invalidate)
+        watcher.start()
+
+    return _cache
+
+
+def invalidate_cache():
+    """
+    Drop all the values cached by this process.
+    """
+    if _cache is not None:
+        _cache.invalidate()
 
 
 class KeyValueLookup(object):
@@ -45,12 +259,19 @@ class KeyValueLookup(object):
         return KeyValueLookup(key, self._value_cache)
 
     def _get_kv(self, key):
-        kvp = None
-        try:
-            kvp = KeyValuePair.get_by_name(key)
-        except ValueError:
-            # ValueErrors are expected in case of partial lookups
-            pass
+        cache = get_cache()
+
+        if cache is not None:
+            exists, value = cache.get_value(key)
+        else:
+            kvp = None
+            try:
+                kvp = KeyValuePair.get_by_name(key)
+            except ValueError:
+                # ValueErrors are expected in case of partial lookups
+                pass
+            exists, value = (True, kvp.value) if kvp else (False, None)
+
         # A good default value for un-matched value is empty string since that will be used
         # for rendering templates.
-        return kvp.value if kvp else ''
+        return value if exists else ''
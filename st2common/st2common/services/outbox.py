@@ -0,0 +1,194 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Transactional outbox for the message bus events.
+
+When ``messaging.outbox`` is enabled, events are not published in the caller's thread. They are
+recorded in the database next to the model change and a background flusher publishes them in
+batches and removes them once they are delivered. Callers don't block on the message bus and an
+event which couldn't be published is retried until it's delivered.
+
+Events are claimed with a lease so multiple flushers (e.g. one per service process) can run at
+the same time. Events recorded by a process which went away are picked up by other flushers
+once the lease expires. Delivery is at least once.
+"""
+
+import datetime
+import importlib
+
+import eventlet
+from eventlet import queue
+from oslo_config import cfg
+
+from st2common import log as logging
+from st2common.models.db.outbox import OutboxEventDB
+from st2common.persistence.outbox import OutboxEvent
+from st2common.transport import serializers
+from st2common.util import date as date_utils
+
+__all__ = [
+    'is_enabled',
+    'add_event',
+
+    'OutboxFlusher',
+    'get_flusher'
+]
+
+LOG = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return cfg.CONF.messaging.outbox
+
+
+def _get_resource_path(resource_cls):
+    return '%s:%s' % (resource_cls.__module__, resource_cls.__name__)
+
+
+def _get_resource_cls(resource_path):
+    module_name, class_name = resource_path.split(':', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def add_event(resource_cls, operation, model_object):
+    """
+    Record a message bus event for the provided model object.
+
+    :param resource_cls: Persistence class which publishes the event.
+    :type resource_cls: :class:`st2common.persistence.base.Access`
+
+    :param operation: Event type (create, update, delete, status).
+    :type operation: ``str``
+    """
+    payload = serializers.encode(model_object)
+    event = OutboxEventDB(resource=_get_resource_path(resource_cls), operation=operation,
+                          payload=payload)
+    event = OutboxEvent.add_or_update(event, publish=False, dispatch_trigger=False)
+
+    flusher = get_flusher()
+    flusher.start()
+    flusher.notify()
+
+    return event
+
+
+class OutboxFlusher(object):
+    """
+    Publishes the recorded events in batches.
+    """
+
+    def __init__(self, batch_size=None, poll_interval=None, lease_time=None):
+        self._batch_size = batch_size or cfg.CONF.messaging.outbox_batch_size
+        self._poll_interval = poll_interval or cfg.CONF.messaging.outbox_poll_interval
+        self._lease_time = lease_time or cfg.CONF.messaging.outbox_lease_time
+
+        self._wakeup = queue.LightQueue(maxsize=1)
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = eventlet.spawn(self._flush_forever)
+
+    def shutdown(self):
+        self._running = False
+
+        if self._thread:
+            self._thread.kill()
+            self._thread = None
+
+    def notify(self):
+        """
+        Wake up the flusher because new events have been recorded.
+        """
+        try:
+            self._wakeup.put_nowait(True)
+        except queue.Full:
+            pass
+
+    def flush(self):
+        """
+        Claim and publish a batch of pending events.
+
+        :return: Number of events which have been published.
+        :rtype: ``int``
+        """
+        now = date_utils.get_datetime_utc_now()
+        lease_expires_at = now + datetime.timedelta(seconds=self._lease_time)
+
+        events = OutboxEvent.query(lease_expires_at__lte=now, order_by=['id'],
+                                   limit=self._batch_size)
+        delivered_ids = []
+
+        try:
+            for event in events:
+                if not OutboxEvent.claim(event, lease_expires_at=lease_expires_at):
+                    # Claimed by another flusher.
+                    continue
+
+                try:
+                    self._publish(event)
+                except Exception:
+                    # Stop here to preserve ordering, the event will be retried once the lease
+                    # expires.
+                    LOG.exception('Failed to publish outbox event %s.', event.id)
+                    break
+
+                delivered_ids.append(event.id)
+        finally:
+            if delivered_ids:
+                OutboxEvent.delete_delivered(delivered_ids)
+
+        return len(delivered_ids)
+
+    def _publish(self, event):
+        resource_cls = _get_resource_cls(event.resource)
+        model_object = serializers.decode(event.payload)
+        resource_cls.publish_event(event.operation, model_object, use_outbox=False)
+
+    def _flush_forever(self):
+        while self._running:
+            try:
+                published = self.flush()
+            except Exception:
+                LOG.exception('Failed to flush outbox events.')
+                published = 0
+
+            if published >= self._batch_size:
+                # There are probably more events waiting.
+                eventlet.sleep(0)
+                continue
+
+            try:
+                self._wakeup.get(timeout=self._poll_interval)
+            except queue.Empty:
+                pass
+
+
+_flusher = None
+
+
+def get_flusher():
+    global _flusher
+
+    if not _flusher:
+        _flusher = OutboxFlusher()
+
+    return _flusher
@@ -0,0 +1,152 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Storage of large execution results.
+
+Results which are larger than ``result_storage.offload_threshold`` are stored (optionally
+compressed) in a separate collection. The execution document only contains a reference to the
+stored result (``result_ref``) and a short preview of it in the ``result`` field, so the
+executions stay small for the listings and the status updates.
+"""
+
+import json
+import zlib
+
+import bson
+from oslo_config import cfg
+
+from st2common import log as logging
+from st2common.models.db.execution import ActionExecutionResultDB
+from st2common.persistence.execution import ActionExecutionResult
+from st2common.util.jsonify import json_encode
+
+__all__ = [
+    'serialize_large_result',
+    'save_result',
+    'load_result',
+    'iter_serialized_result',
+    'delete_results'
+]
+
+LOG = logging.getLogger(__name__)
+
+# Size of the chunks in which a stored result is decompressed when it's streamed
+STREAM_CHUNK_SIZE = 65536
+
+
+def serialize_large_result(result):
+    """
+    Serialize the provided result if it's large enough to be stored outside of the execution.
+
+    :return: JSON serialized result or ``None`` if the result should be stored inline.
+    :rtype: ``str``
+    """
+    threshold = cfg.CONF.result_storage.offload_threshold
+
+    if not threshold or result is None:
+        return None
+
+    data = json_encode(result, indent=None)
+
+    if len(data) <= threshold:
+        return None
+
+    return data
+
+
+def save_result(execution_id, data):
+    """
+    Store the serialized result of the provided execution.
+
+    :param execution_id: Execution id.
+    :type execution_id: ``str``
+
+    :param data: Result as returned by ``serialize_large_result``.
+    :type data: ``str``
+
+    :return: Values of the execution fields which reference the stored result.
+    :rtype: ``dict``
+    """
+    compressed = cfg.CONF.result_storage.compress
+    stored_data = zlib.compress(data) if compressed else data
+
+    existing = ActionExecutionResult.query(execution_id=execution_id,
+                                           include_fields=['id']).first()
+    result_db = ActionExecutionResultDB(id=existing.id if existing else None,
+                                        execution_id=execution_id,
+                                        data=bson.Binary(stored_data), compressed=compressed,
+                                        size=len(data))
+    result_db = ActionExecutionResult.add_or_update(result_db, publish=False,
+                                                    dispatch_trigger=False)
+
+    LOG.debug('Stored result of execution %s (%s bytes, %s bytes stored).', execution_id,
+              len(data), len(stored_data))
+
+    preview = {
+        'preview': data[:cfg.CONF.result_storage.preview_size],
+        'size': len(data)
+    }
+    return {'result': preview, 'result_ref': str(result_db.id)}
+
+
+def load_result(result_ref):
+    """
+    Retrieve the stored result.
+
+    :param result_ref: Value of the execution's ``result_ref`` field.
+    :type result_ref: ``str``
+    """
+    return json.loads(''.join(iter_serialized_result(result_ref=result_ref)))
+
+
+def iter_serialized_result(result_ref, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Retrieve the stored result as chunks of the JSON serialized result. Compressed results are
+    decompressed chunk by chunk.
+
+    :rtype: ``generator``
+    """
+    result_db = ActionExecutionResult.get_by_id(result_ref)
+    data = str(result_db.data)
+
+    if not result_db.compressed:
+        for index in range(0, len(data), chunk_size):
+            yield data[index:index + chunk_size]
+        return
+
+    decompressor = zlib.decompressobj()
+
+    for index in range(0, len(data), chunk_size):
+        chunk = decompressor.decompress(data[index:index + chunk_size])
+        if chunk:
+            yield chunk
+
+    chunk = decompressor.flush()
+    if chunk:
+        yield chunk
+
+
+def delete_results(execution_ids):
+    """
+    Delete the stored results of the provided executions.
+
+    :param execution_ids: Execution ids.
+    :type execution_ids: ``list``
+    """
+    result_dbs = ActionExecutionResult.query(execution_id__in=execution_ids,
+                                             include_fields=['id'])
+    return ActionExecutionResult.delete_many(list(result_dbs), publish=False,
+                                             dispatch_trigger=False)
@@ -0,0 +1,433 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Retention of the operational data (executions, trigger instances and traces).
+
+Old objects are deleted in batches which are selected with a range query on the indexed
+timestamp of the collection, oldest first. Objects which reference the deleted objects are
+cleaned up in the same batch:
+
+* executions - corresponding liveactions, stored results and trace components
+* trigger instances - trace components
+
+Traces which don't reference any execution or trigger instance anymore are deleted as well.
+"""
+
+import os
+import time
+
+import eventlet
+
+from st2common import log as logging
+from st2common.models.api.execution import ActionExecutionAPI
+from st2common.models.db.trace import TraceDB
+from st2common.persistence.execution import ActionExecution
+from st2common.persistence.liveaction import LiveAction
+from st2common.persistence.trace import Trace
+from st2common.persistence.trigger import TriggerInstance
+from st2common.services import resultstorage
+from st2common.util import date as date_utils
+from st2common.util.jsonify import json_encode
+
+__all__ = [
+    'RetentionPolicy',
+    'RetentionEngine',
+    'purge_executions',
+    'purge_trigger_instances',
+    'purge_traces'
+]
+
+LOG = logging.getLogger(__name__)
+
+RESOURCE_EXECUTIONS = 'executions'
+RESOURCE_TRIGGER_INSTANCES = 'trigger_instances'
+RESOURCE_TRACES = 'traces'
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Same file naming as st2exporter uses
+EXPORT_FILE_PREFIX = 'st2-executions-'
+
+
+class RetentionPolicy(object):
+    """
+    Objects of the resource which are older than ``ttl`` (and are in one of the ``statuses``, if
+    provided) are deleted.
+
+    :param resource: Name of the resource (executions, trigger_instances or traces).
+    :type resource: ``str``
+
+    :param ttl: Age after which the objects are deleted.
+    :type ttl: :class:`datetime.timedelta`
+
+    :param statuses: Only delete the objects in these statuses (executions only).
+    :type statuses: ``list``
+
+    :param export: Export the objects before they are deleted (executions only).
+    :type export: ``bool``
+    """
+
+    def __init__(self, resource, ttl, statuses=None, export=False):
+        if resource not in PURGE_FUNCTIONS:
+            raise ValueError('Unsupported resource "%s". Supported resources are: %s' %
+                             (resource, ', '.join(sorted(PURGE_FUNCTIONS.keys()))))
+
+        self.resource = resource
+        self.ttl = ttl
+        self.statuses = statuses
+        self.export = export
+
+    def __repr__(self):
+        return ('<RetentionPolicy resource=%s,ttl=%s,statuses=%s,export=%s>' %
+                (self.resource, self.ttl, self.statuses, self.export))
+
+
+class RetentionEngine(object):
+    """
+    Periodically applies the retention policies.
+    """
+
+    def __init__(self, policies, interval=600, batch_size=DEFAULT_BATCH_SIZE,
+                 max_deletes_per_second=None, export_dir=None):
+        """
+        :param interval: Time in seconds between the runs.
+        :type interval: ``int``
+
+        :param max_deletes_per_second: Max number of objects deleted per second. Unlimited if
+                                       not provided.
+        :type max_deletes_per_second: ``int``
+
+        :param export_dir: Directory the executions are exported to by the policies with export.
+        :type export_dir: ``str``
+        """
+        self._policies = policies
+        self._interval = interval
+        self._batch_size = batch_size
+        self._max_deletes_per_second = max_deletes_per_second
+        self._export_dir = export_dir
+
+        self._stats = dict([(policy.resource, _get_empty_stats()) for policy in policies])
+        self._thread = None
+        self._running = False
+
+    def start(self, wait=False):
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = eventlet.spawn(self._run_forever)
+
+        if wait:
+            self.wait()
+
+    def wait(self):
+        if self._thread:
+            self._thread.wait()
+
+    def shutdown(self):
+        self._running = False
+
+        if self._thread:
+            self._thread.kill()
+            self._thread = None
+
+    def run_once(self):
+        """
+        Apply all the policies once.
+
+        :return: Number of deleted objects for each resource.
+        :rtype: ``dict``
+        """
+        result = {}
+
+        for policy in self._policies:
+            try:
+                result[policy.resource] = self._apply_policy(policy)
+            except Exception:
+                LOG.exception('Failed to apply retention policy %s.', policy)
+                self._stats[policy.resource]['errors'] += 1
+
+        return result
+
+    def get_stats(self):
+        """
+        Return the progress of the current and the result of the previous runs for each resource.
+
+        :rtype: ``dict``
+        """
+        return dict([(resource, dict(stats)) for resource, stats in self._stats.items()])
+
+    def _apply_policy(self, policy):
+        stats = self._stats[policy.resource]
+        stats['running'] = True
+        start_time = time.time()
+        timestamp = date_utils.get_datetime_utc_now() - policy.ttl
+
+        LOG.info('Deleting %s older than %s.', policy.resource, timestamp)
+
+        kwargs = {
+            'timestamp': timestamp,
+            'batch_size': self._batch_size,
+            'max_deletes_per_second': self._max_deletes_per_second,
+            'stats': stats
+        }
+        if policy.resource == RESOURCE_EXECUTIONS:
+            kwargs['statuses'] = policy.statuses
+            kwargs['export_dir'] = self._export_dir if policy.export else None
+
+        try:
+            deleted_count = PURGE_FUNCTIONS[policy.resource](**kwargs)
+        finally:
+            stats['running'] = False
+            stats['last_run_at'] = date_utils.get_datetime_utc_now()
+            stats['last_run_duration'] = time.time() - start_time
+
+        stats['last_run_deleted'] = deleted_count
+        LOG.info('Deleted %s %s in %.2f seconds.', deleted_count, policy.resource,
+                 stats['last_run_duration'])
+
+        return deleted_count
+
+    def _run_forever(self):
+        while self._running:
+            self.run_once()
+            eventlet.sleep(self._interval)
+
+
+def purge_executions(timestamp, statuses=None, action_ref=None, batch_size=DEFAULT_BATCH_SIZE,
+                     max_deletes_per_second=None, export_dir=None, stats=None):
+    """
+    Delete the executions which have started before the provided timestamp together with their
+    liveactions, stored results and trace components.
+
+    :param statuses: Only delete the executions in these statuses.
+    :type statuses: ``list``
+
+    :param action_ref: Only delete the executions of this action.
+    :type action_ref: ``str``
+
+    :param export_dir: Export the executions to this directory (in the same format as
+                       st2exporter uses) before they are deleted.
+    :type export_dir: ``str``
+
+    :return: Number of deleted executions.
+    :rtype: ``int``
+    """
+    filters = {'start_timestamp__lt': timestamp}
+    if statuses:
+        filters['status__in'] = statuses
+    if action_ref:
+        filters['action__ref'] = action_ref
+
+    def delete_batch(execution_dbs):
+        execution_ids = [str(execution_db.id) for execution_db in execution_dbs]
+
+        if export_dir:
+            _export_executions(execution_ids=execution_ids, export_dir=export_dir)
+            _increment(stats, 'exported', len(execution_ids))
+
+        liveaction_ids = [execution_db.liveaction.get('id', None)
+                          for execution_db in execution_dbs]
+        liveaction_ids = [liveaction_id for liveaction_id in liveaction_ids if liveaction_id]
+
+        deleted_count = ActionExecution.delete_many(execution_dbs, publish=False,
+                                                    dispatch_trigger=False)
+
+        liveaction_dbs = list(LiveAction.query(id__in=liveaction_ids, include_fields=['id']))
+        LiveAction.delete_many(liveaction_dbs, publish=False, dispatch_trigger=False)
+
+        resultstorage.delete_results(execution_ids)
+        _remove_trace_components(field='action_executions', object_ids=execution_ids)
+
+        return deleted_count
+
+    return _purge_in_batches(access=ActionExecution, filters=filters,
+                             timestamp_field='start_timestamp', include_fields=['liveaction.id'],
+                             delete_batch=delete_batch, batch_size=batch_size,
+                             max_deletes_per_second=max_deletes_per_second, stats=stats)
+
+
+def purge_trigger_instances(timestamp, batch_size=DEFAULT_BATCH_SIZE, max_deletes_per_second=None,
+                            stats=None):
+    """
+    Delete the trigger instances which have occurred before the provided timestamp together with
+    their trace components.
+
+    :return: Number of deleted trigger instances.
+    :rtype: ``int``
+    """
+    def delete_batch(trigger_instance_dbs):
+        deleted_count = TriggerInstance.delete_many(trigger_instance_dbs, publish=False,
+                                                    dispatch_trigger=False)
+
+        object_ids = [str(trigger_instance_db.id) for trigger_instance_db in trigger_instance_dbs]
+        _remove_trace_components(field='trigger_instances', object_ids=object_ids)
+
+        return deleted_count
+
+    return _purge_in_batches(access=TriggerInstance, filters={'occurrence_time__lt': timestamp},
+                             timestamp_field='occurrence_time', include_fields=[],
+                             delete_batch=delete_batch, batch_size=batch_size,
+                             max_deletes_per_second=max_deletes_per_second, stats=stats)
+
+
+def purge_traces(timestamp, batch_size=DEFAULT_BATCH_SIZE, max_deletes_per_second=None,
+                 stats=None):
+    """
+    Delete the traces which have started before the provided timestamp.
+
+    :return: Number of deleted traces.
+    :rtype: ``int``
+    """
+    def delete_batch(trace_dbs):
+        return Trace.delete_many(trace_dbs, publish=False, dispatch_trigger=False)
+
+    return _purge_in_batches(access=Trace, filters={'start_timestamp__lt': timestamp},
+                             timestamp_field='start_timestamp', include_fields=[],
+                             delete_batch=delete_batch, batch_size=batch_size,
+                             max_deletes_per_second=max_deletes_per_second, stats=stats)
+
+
+PURGE_FUNCTIONS = {
+    RESOURCE_EXECUTIONS: purge_executions,
+    RESOURCE_TRIGGER_INSTANCES: purge_trigger_instances,
+    RESOURCE_TRACES: purge_traces
+}
+
+
+def _purge_in_batches(access, filters, timestamp_field, include_fields, delete_batch, batch_size,
+                      max_deletes_per_second=None, stats=None):
+    """
+    Repeatedly select the oldest batch of the matching objects (only the ids and the provided
+    fields are retrieved) and delete it until there is nothing left.
+    """
+    rate_limiter = _RateLimiter(max_per_second=max_deletes_per_second)
+    deleted_count = 0
+
+    while True:
+        instances = list(access.query(include_fields=include_fields or ['id'],
+                                      order_by=[timestamp_field], limit=batch_size, **filters))
+        if not instances:
+            break
+
+        batch_deleted_count = delete_batch(instances)
+        deleted_count += batch_deleted_count
+        _increment(stats, 'deleted', batch_deleted_count)
+        _increment(stats, 'batches', 1)
+        LOG.debug('Deleted batch of %s %s (%s in total).', batch_deleted_count,
+                  access.__name__, deleted_count)
+
+        # Nothing has been deleted, stop instead of selecting the same batch again
+        if len(instances) < batch_size or not batch_deleted_count:
+            break
+
+        rate_limiter.wait(count=len(instances))
+
+    return deleted_count
+
+
+def _remove_trace_components(field, object_ids):
+    """
+    Remove the components which reference the deleted objects from the traces and delete the
+    traces which don't reference any execution or trigger instance anymore.
+    """
+    collection = TraceDB._get_collection()
+    db_field = TraceDB._fields[field].db_field
+    query = {'%s.object_id' % (db_field): {'$in': object_ids}}
+
+    trace_ids = [trace['_id'] for trace in collection.find(query, fields=['_id'])]
+    if not trace_ids:
+        return
+
+    collection.update({'_id': {'$in': trace_ids}},
+                      {'$pull': {db_field: {'object_id': {'$in': object_ids}}}}, multi=True)
+
+    empty_field_queries = []
+    for name in ['action_executions', 'trigger_instances']:
+        name_db_field = TraceDB._fields[name].db_field
+        empty_field_queries.append({'$or': [{name_db_field: {'$size': 0}},
+                                            {name_db_field: {'$exists': False}}]})
+
+    collection.remove({'_id': {'$in': trace_ids}, '$and': empty_field_queries})
+
+
+def _export_executions(execution_ids, export_dir):
+    execution_dbs = list(ActionExecution.query(id__in=execution_ids))
+    ActionExecution.populate_shared_fields(execution_dbs)
+
+    executions = []
+    for execution_db in execution_dbs:
+        execution_api = ActionExecutionAPI.from_model(execution_db, mask_secrets=True)
+
+        if execution_db.result_ref:
+            execution_api.result = resultstorage.load_result(result_ref=execution_db.result_ref)
+
+        executions.append(execution_api)
+
+    now = date_utils.get_datetime_utc_now()
+    folder_path = os.path.join(export_dir, now.strftime('%Y-%m-%d'))
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+
+    file_name = '%s%s.json' % (EXPORT_FILE_PREFIX, now.strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
+    file_path = os.path.join(folder_path, file_name)
+
+    if os.path.exists(file_path):
+        raise Exception('File %s already exists.' % file_path)
+
+    with open(file_path, 'w') as fp:
+        fp.write(json_encode(executions))
+
+    LOG.debug('Exported %s executions to %s.', len(executions), file_path)
+
+
+class _RateLimiter(object):
+    def __init__(self, max_per_second=None):
+        self._max_per_second = max_per_second
+        self._start_time = time.time()
+        self._count = 0
+
+    def wait(self, count):
+        """
+        Account for ``count`` operations and sleep until the rate drops under the limit.
+        """
+        if not self._max_per_second:
+            eventlet.sleep(0)
+            return
+
+        self._count += count
+        expected_duration = float(self._count) / self._max_per_second
+        delay = expected_duration - (time.time() - self._start_time)
+
+        eventlet.sleep(max(delay, 0))
+
+
+def _get_empty_stats():
+    return {
+        'running': False,
+        'deleted': 0,
+        'exported': 0,
+        'batches': 0,
+        'errors': 0,
+        'last_run_at': None,
+        'last_run_duration': None,
+        'last_run_deleted': None
+    }
+
+
+def _increment(stats, name, count):
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + count
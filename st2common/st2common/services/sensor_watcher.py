@@ -18,11 +18,11 @@
 
 import eventlet
 import uuid
-from kombu.mixins import ConsumerMixin
 from kombu import Connection
 
 from st2common import log as logging
-from st2common.transport import reactor, publishers
+from st2common.transport import reactor, publishers, serializers
+from st2common.transport.consumers import ConsumerMixin
 from st2common.transport import utils as transport_utils
 
 LOG = logging.getLogger(__name__)
@@ -59,7 +59,7 @@ class SensorWatcher(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         consumers = [Consumer(queues=[self._sensor_watcher_q],
-                              accept=['pickle'],
+                              accept=serializers.ACCEPTED_SERIALIZERS,
                               callbacks=[self.process_task])]
         return consumers
 
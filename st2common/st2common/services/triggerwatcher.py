@@ -15,12 +15,12 @@
 
 import eventlet
 import uuid
-from kombu.mixins import ConsumerMixin
 from kombu import Connection
 
 from st2common import log as logging
 from st2common.persistence.trigger import Trigger
-from st2common.transport import reactor, publishers
+from st2common.transport import reactor, publishers, serializers
+from st2common.transport.consumers import ConsumerMixin
 from st2common.transport import utils as transport_utils
 
 LOG = logging.getLogger(__name__)
@@ -66,7 +66,7 @@ class TriggerWatcher(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         return [Consumer(queues=[self._trigger_watch_q],
-                         accept=['pickle'],
+                         accept=serializers.ACCEPTED_SERIALIZERS,
                          callbacks=[self.process_task])]
 
     def process_task(self, body, message):
@@ -14,11 +14,14 @@
 # limitations under the License.
 
 from st2common.transport import liveaction, actionexecutionstate, execution, publishers, reactor
-from st2common.transport import bootstrap_utils, utils, connection_retry_wrapper
+from st2common.transport import bootstrap_utils, utils, connection_retry_wrapper, serializers
+from st2common.transport import action, keyvalue, memory
 
 # TODO(manas) : Exchanges, Queues and RoutingKey design discussion pending.
 
 __all__ = [
+    'action',
+    'keyvalue',
     'liveaction',
     'actionexecutionstate',
     'execution',
@@ -26,5 +29,7 @@ __all__ = [
     'reactor',
     'bootstrap_utils',
     'utils',
-    'connection_retry_wrapper'
+    'connection_retry_wrapper',
+    'serializers',
+    'memory'
 ]
@@ -0,0 +1,59 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from kombu import Exchange, Queue
+
+from st2common.transport import publishers
+
+__all__ = [
+    'ActionCUDPublisher',
+    'RunnerTypeCUDPublisher',
+
+    'get_action_cud_queue',
+    'get_runnertype_cud_queue'
+]
+
+# Exchange for Action CUD events
+ACTION_CUD_XCHG = Exchange('st2.action', type='topic')
+
+# Exchange for RunnerType CUD events
+RUNNERTYPE_CUD_XCHG = Exchange('st2.runnertype', type='topic')
+
+
+class ActionCUDPublisher(publishers.CUDPublisher):
+    """
+    Publisher responsible for publishing Action model CUD events.
+    """
+
+    def __init__(self, urls):
+        super(ActionCUDPublisher, self).__init__(urls, ACTION_CUD_XCHG)
+
+
+class RunnerTypeCUDPublisher(publishers.CUDPublisher):
+    """
+    Publisher responsible for publishing RunnerType model CUD events.
+    """
+
+    def __init__(self, urls):
+        super(RunnerTypeCUDPublisher, self).__init__(urls, RUNNERTYPE_CUD_XCHG)
+
+
+def get_action_cud_queue(name, routing_key, exclusive=False):
+    return Queue(name, ACTION_CUD_XCHG, routing_key=routing_key, exclusive=exclusive)
+
+
+def get_runnertype_cud_queue(name, routing_key, exclusive=False):
+    return Queue(name, RUNNERTYPE_CUD_XCHG, routing_key=routing_key, exclusive=exclusive)
@@ -14,44 +14,159 @@
 # limitations under the License.
 
 import abc
+import collections
+import time
+
 import eventlet
 import six
-
-from kombu.mixins import ConsumerMixin
+from kombu import mixins
+from oslo_config import cfg
 
 from st2common import log as logging
+from st2common.transport import memory
+from st2common.transport import serializers
+from st2common.transport import utils as transport_utils
 from st2common.util.greenpooldispatch import BufferedDispatcher
 
 
 LOG = logging.getLogger(__name__)
 
 
+class ConsumerMixin(mixins.ConsumerMixin):
+    """
+    ``kombu.mixins.ConsumerMixin`` which consumes from the in-process message bus when it's
+    configured instead of a message broker.
+    """
+
+    def run(self, _tokens=1):
+        if transport_utils.is_in_memory_transport():
+            return memory.get_broker().consume(self)
+
+        return super(ConsumerMixin, self).run(_tokens=_tokens)
+
+
+class PrefetchWindow(object):
+    """
+    Keeps track of the prefetch window (max number of unacknowledged messages) of a consumer.
+
+    If adaptive, the window grows while handlers are fast (the consumer would otherwise spend
+    most of the time waiting on the broker round trip) and shrinks back to the size of the
+    dispatcher pool when handlers are slow (messages would otherwise sit in the buffer of
+    this consumer while other consumers are idle).
+    """
+
+    # Number of processed messages after which the window is re-evaluated.
+    ADJUST_INTERVAL = 50
+
+    # Smoothing factor for the exponentially weighted average of the handler latency.
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(self, size, max_size=None, adaptive=False, fast_latency=0.05,
+                 slow_latency=1.0):
+        self.size = size
+        self._min_size = size
+        self._max_size = max(max_size or size, size)
+        self._adaptive = adaptive
+        self._fast_latency = fast_latency
+        self._slow_latency = slow_latency
+
+        self.average_latency = None
+        self._processed_count = 0
+
+    def record_latency(self, latency):
+        """
+        Record handler latency and return the new window size if it should change.
+
+        :rtype: ``int`` or ``None``
+        """
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency += self.LATENCY_SMOOTHING * (latency - self.average_latency)
+
+        self._processed_count += 1
+        if not self._adaptive or self._processed_count % self.ADJUST_INTERVAL != 0:
+            return None
+
+        if self.average_latency < self._fast_latency:
+            size = min(self.size * 2, self._max_size)
+        elif self.average_latency > self._slow_latency:
+            size = self._min_size
+        else:
+            size = self.size
+
+        if size == self.size:
+            return None
+
+        self.size = size
+        return size
+
+
 class QueueConsumer(ConsumerMixin):
+    # Max time in seconds the consumer loop waits for new messages before it applies the
+    # acknowledgements and prefetch changes recorded by the dispatcher workers.
+    DRAIN_INTERVAL = 0.1
+
     def __init__(self, connection, queues, handler):
         self.connection = connection
         self._dispatcher = BufferedDispatcher()
         self._queues = queues
         self._handler = handler
 
+        # If enabled, messages are acknowledged only once the handler has processed them and
+        # a window of messages is prefetched to keep all the dispatcher workers busy.
+        self._ack_after_process = cfg.CONF.messaging.ack_after_process
+        self._prefetch_window = PrefetchWindow(
+            size=cfg.CONF.messaging.prefetch_count or self._dispatcher.pool_size,
+            max_size=cfg.CONF.messaging.max_prefetch_count,
+            adaptive=cfg.CONF.messaging.adaptive_prefetch)
+        self._consumer = None
+
+        # AMQP calls can't be made from the dispatcher workers since the consumer thread is
+        # reading from the same connection. Workers record the outcome of each message and
+        # the new prefetch window size which are then applied from the consumer loop.
+        self._pending_messages = collections.deque()
+        self._pending_prefetch_count = None
+
     def shutdown(self):
         self._dispatcher.shutdown()
 
     def get_consumers(self, Consumer, channel):
-        consumer = Consumer(queues=self._queues, accept=['pickle'], callbacks=[self.process])
+        consumer = Consumer(queues=self._queues, accept=serializers.ACCEPTED_SERIALIZERS,
+                            callbacks=[self.process])
 
-        # use prefetch_count=1 for fair dispatch. This way workers that finish an item get the next
-        # task and the work does not get queued behind any single large item.
-        consumer.qos(prefetch_count=1)
+        if self._ack_after_process:
+            consumer.qos(prefetch_count=self._prefetch_window.size)
+        else:
+            # use prefetch_count=1 for fair dispatch. This way workers that finish an item get
+            # the next task and the work does not get queued behind any single large item.
+            consumer.qos(prefetch_count=1)
 
+        self._consumer = consumer
         return [consumer]
 
+    def consume(self, *args, **kwargs):
+        kwargs.setdefault('safety_interval', self.DRAIN_INTERVAL)
+        return super(QueueConsumer, self).consume(*args, **kwargs)
+
+    def on_iteration(self):
+        self._apply_pending()
+
     def process(self, body, message):
+        self._apply_pending()
+
+        if self._ack_after_process:
+            self._dispatcher.dispatch(self._process_message, body, message)
+            return
+
         try:
             self._dispatcher.dispatch(self._process_message, body)
         finally:
             message.ack()
 
-    def _process_message(self, body):
+    def _process_message(self, body, message=None):
+        start = time.time()
+
         try:
             if not isinstance(body, self._handler.message_type):
                 raise TypeError('Received an unexpected type "%s" for payload.' % type(body))
@@ -59,6 +174,55 @@ class QueueConsumer(ConsumerMixin):
             self._handler.process(body)
         except:
             LOG.exception('%s failed to process message: %s', self.__class__.__name__, body)
+            if message:
+                self._complete_message(message, failed=True)
+        else:
+            if message:
+                self._complete_message(message, failed=False)
+        finally:
+            if message:
+                self._record_latency(time.time() - start)
+
+    def _complete_message(self, message, failed):
+        if transport_utils.is_in_memory_transport():
+            # There is no connection shared with the consumer thread.
+            self._ack_or_reject(message, failed)
+            return
+
+        self._pending_messages.append((message, failed))
+
+    def _apply_pending(self):
+        """
+        Acknowledge the processed messages and apply the new prefetch window size. Needs to
+        be called from the consumer thread.
+        """
+        while self._pending_messages:
+            message, failed = self._pending_messages.popleft()
+            self._ack_or_reject(message, failed)
+
+        prefetch_count = self._pending_prefetch_count
+        if prefetch_count and self._consumer:
+            self._pending_prefetch_count = None
+            LOG.debug('Adjusting prefetch window of %s to %s (average latency %.3fs).',
+                      self._handler.__class__.__name__, prefetch_count,
+                      self._prefetch_window.average_latency)
+            self._consumer.qos(prefetch_count=prefetch_count)
+
+    def _ack_or_reject(self, message, failed):
+        if not failed:
+            message.ack()
+            return
+
+        # Requeue a failed message once so it's not lost if the failure is transient, but
+        # don't requeue a message which already failed to avoid redelivering it forever.
+        requeue = not message.delivery_info.get('redelivered', False)
+        message.reject(requeue=requeue)
+
+    def _record_latency(self, latency):
+        prefetch_count = self._prefetch_window.record_latency(latency)
+
+        if prefetch_count:
+            self._pending_prefetch_count = prefetch_count
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -0,0 +1,285 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-process message bus backend.
+
+Used instead of RabbitMQ when ``messaging.url`` is ``memory://``, e.g. when all the services
+are hosted in a single process or to run the whole trigger -> rule -> execution pipeline in
+tests and benchmarks without a broker. Messages are routed with the same exchange semantics
+(topic, direct and fanout) as in RabbitMQ and delivered to the consumers over green queues
+without serialization or polling.
+"""
+
+import copy
+import uuid
+
+import eventlet
+from eventlet import queue
+
+from st2common import log as logging
+
+__all__ = [
+    'InMemoryBroker',
+    'InMemoryPublisher',
+
+    'get_broker'
+]
+
+LOG = logging.getLogger(__name__)
+
+# How often a consumer loop checks if it has been asked to stop.
+STOP_CHECK_INTERVAL = 1.0
+
+
+def _get_exchange_name(exchange):
+    return getattr(exchange, 'name', exchange)
+
+
+def _get_exchange_type(exchange):
+    return getattr(exchange, 'type', 'topic')
+
+
+class InMemoryMessage(object):
+    """
+    Message handed to the consumer callbacks. Mimics ``kombu.message.Message``.
+    """
+
+    def __init__(self, broker, queue_name, body, exchange, routing_key, redelivered=False):
+        self._broker = broker
+        self._queue_name = queue_name
+        self.body = body
+        self.delivery_info = {
+            'exchange': exchange,
+            'routing_key': routing_key,
+            'redelivered': redelivered
+        }
+        self.headers = {}
+        self.properties = {}
+        self.acknowledged = False
+
+    def ack(self):
+        self.acknowledged = True
+
+    def reject(self, requeue=False):
+        self.acknowledged = True
+
+        if requeue:
+            self._broker.requeue(queue_name=self._queue_name, message=self)
+
+    def requeue(self):
+        self.reject(requeue=True)
+
+
+class _Consumer(object):
+    """
+    Stand-in for ``kombu.Consumer`` which is passed to ``ConsumerMixin.get_consumers``.
+    """
+
+    def __init__(self, queues=None, callbacks=None, **kwargs):
+        self.queues = queues or []
+        self.callbacks = callbacks or []
+
+    def qos(self, **kwargs):
+        # Nothing is prefetched, messages stay in the queue until a consumer takes them.
+        pass
+
+
+class InMemoryBroker(object):
+    """
+    Process wide message broker with RabbitMQ-like exchange routing.
+    """
+
+    def __init__(self):
+        # queue name -> green queue
+        self._queues = {}
+        # (exchange name, queue name) -> set of binding keys
+        self._bindings = {}
+        self._exchange_types = {}
+
+    def declare_queue(self, kombu_queue):
+        """
+        Declare and bind the queue described by the provided ``kombu.Queue``.
+
+        :return: Name of the declared queue.
+        :rtype: ``str``
+        """
+        # Unnamed queues are private to the consumer which declares them.
+        queue_name = kombu_queue.name or 'amq.gen-%s' % (uuid.uuid4().hex)
+
+        if queue_name not in self._queues:
+            self._queues[queue_name] = queue.LightQueue()
+
+        if kombu_queue.exchange is not None and kombu_queue.exchange.name:
+            self.bind(exchange=kombu_queue.exchange, queue_name=queue_name,
+                      binding_key=kombu_queue.routing_key)
+
+        for binding in getattr(kombu_queue, 'bindings', None) or []:
+            self.bind(exchange=binding.exchange, queue_name=queue_name,
+                      binding_key=binding.routing_key)
+
+        return queue_name
+
+    def delete_queue(self, queue_name):
+        self._queues.pop(queue_name, None)
+
+        for key in list(self._bindings.keys()):
+            if key[1] == queue_name:
+                del self._bindings[key]
+
+    def bind(self, exchange, queue_name, binding_key):
+        exchange_name = _get_exchange_name(exchange)
+        self._exchange_types[exchange_name] = _get_exchange_type(exchange)
+        self._bindings.setdefault((exchange_name, queue_name), set()).add(binding_key or '')
+
+    def publish(self, payload, exchange, routing_key=''):
+        exchange_name = _get_exchange_name(exchange)
+        routing_key = routing_key or ''
+
+        for queue_name in self._get_matching_queues(exchange_name, routing_key):
+            # Each queue gets its own copy, same as with a real broker.
+            message = InMemoryMessage(broker=self, queue_name=queue_name,
+                                      body=copy.deepcopy(payload), exchange=exchange_name,
+                                      routing_key=routing_key)
+            self._queues[queue_name].put(message)
+
+    def requeue(self, queue_name, message):
+        if queue_name in self._queues:
+            message.delivery_info['redelivered'] = True
+            message.acknowledged = False
+            self._queues[queue_name].put(message)
+
+    def get_queue_depth(self, queue_name):
+        return self._queues[queue_name].qsize()
+
+    def consume(self, consumer_mixin):
+        """
+        Run the consumers of the provided ``kombu.mixins.ConsumerMixin`` until its
+        ``should_stop`` attribute is set.
+        """
+        threads = []
+        private_queues = []
+
+        for consumer in consumer_mixin.get_consumers(_Consumer, None):
+            for kombu_queue in consumer.queues:
+                queue_name = self.declare_queue(kombu_queue)
+                if not kombu_queue.name:
+                    private_queues.append(queue_name)
+
+                threads.append(eventlet.spawn(self._consume_queue, consumer_mixin, queue_name,
+                                              consumer.callbacks))
+
+        try:
+            for thread in threads:
+                thread.wait()
+        finally:
+            # Consumer threads need to go away together with the thread which runs the
+            # consumer (e.g. when it's killed).
+            for thread in threads:
+                thread.kill()
+
+            for queue_name in private_queues:
+                self.delete_queue(queue_name)
+
+    def _consume_queue(self, consumer_mixin, queue_name, callbacks):
+        green_queue = self._queues[queue_name]
+
+        while not consumer_mixin.should_stop:
+            try:
+                message = green_queue.get(timeout=STOP_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+
+            for callback in callbacks:
+                try:
+                    callback(message.body, message)
+                except Exception:
+                    LOG.exception('Failed to process message from queue %s.', queue_name)
+
+    def _get_matching_queues(self, exchange_name, routing_key):
+        exchange_type = self._exchange_types.get(exchange_name, 'topic')
+        matching_queues = []
+
+        for (bound_exchange_name, queue_name), binding_keys in self._bindings.items():
+            if bound_exchange_name != exchange_name:
+                continue
+
+            for binding_key in binding_keys:
+                if self._is_match(exchange_type, binding_key, routing_key):
+                    matching_queues.append(queue_name)
+                    break
+
+        return matching_queues
+
+    def _is_match(self, exchange_type, binding_key, routing_key):
+        if exchange_type == 'fanout':
+            return True
+
+        if exchange_type == 'direct':
+            return binding_key == routing_key
+
+        return _topic_match(binding_key.split('.'), routing_key.split('.'))
+
+
+def _topic_match(binding_words, routing_words):
+    """
+    Match routing key against a binding key of a topic exchange. "*" matches exactly one word
+    and "#" matches zero or more words.
+    """
+    if not binding_words:
+        return not routing_words
+
+    word = binding_words[0]
+
+    if word == '#':
+        return any([_topic_match(binding_words[1:], routing_words[index:])
+                    for index in range(len(routing_words) + 1)])
+
+    if not routing_words:
+        return False
+
+    if word == '*' or word == routing_words[0]:
+        return _topic_match(binding_words[1:], routing_words[1:])
+
+    return False
+
+
+class InMemoryPublisher(object):
+    """
+    Publisher with the same interface as ``PoolPublisher`` which publishes to the in-process
+    broker.
+    """
+
+    def __init__(self, broker=None):
+        self._broker = broker or get_broker()
+
+    def publish(self, payload, exchange, routing_key=''):
+        self._broker.publish(payload=payload, exchange=exchange, routing_key=routing_key)
+
+    def publish_many(self, payloads, exchange, routing_key=''):
+        for payload in payloads:
+            self.publish(payload=payload, exchange=exchange, routing_key=routing_key)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+
+    if not _broker:
+        _broker = InMemoryBroker()
+
+    return _broker
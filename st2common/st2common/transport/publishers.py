@@ -13,12 +13,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import copy
+import time
+import weakref
 
+import eventlet
+from eventlet import event
+from eventlet import queue
 from kombu import Connection
 from kombu.messaging import Producer
+from oslo_config import cfg
 
 from st2common import log as logging
+from st2common.transport import memory
+from st2common.transport import serializers
+from st2common.transport import utils as transport_utils
 from st2common.transport.connection_retry_wrapper import ConnectionRetryWrapper
 
 ANY_RK = '*'
@@ -29,6 +39,22 @@ DELETE_RK = 'delete'
 LOG = logging.getLogger(__name__)
 
 
+def get_publish_kwargs(payload, exchange, routing_key):
+    """
+    Serialize the payload with the configured serializer and return the arguments for
+    ``Producer.publish``.
+    """
+    content_type, content_encoding, body = serializers.dumps(payload)
+
+    return {
+        'body': body,
+        'exchange': exchange,
+        'routing_key': routing_key,
+        'content_type': content_type,
+        'content_encoding': content_encoding
+    }
+
+
 class PoolPublisher(object):
     def __init__(self, urls):
         self.pool = Connection(urls, failover_strategy='round-robin').Pool(limit=10)
@@ -47,12 +73,8 @@ class PoolPublisher(object):
                 # really solve any problems for us so better to create a Producer for each
                 # publish.
                 producer = Producer(channel)
-                kwargs = {
-                    'body': payload,
-                    'exchange': exchange,
-                    'routing_key': routing_key,
-                    'serializer': 'pickle'
-                }
+                kwargs = get_publish_kwargs(payload=payload, exchange=exchange,
+                                            routing_key=routing_key)
                 retry_wrapper.ensured(connection=connection,
                                       obj=producer,
                                       to_ensure_func=producer.publish,
@@ -60,6 +82,272 @@ class PoolPublisher(object):
 
             retry_wrapper.run(connection=connection, wrapped_callback=do_publish)
 
+    def publish_many(self, payloads, exchange, routing_key=''):
+        """
+        Publish multiple messages over a single pooled connection.
+        """
+        with self.pool.acquire(block=True) as connection:
+            retry_wrapper = ConnectionRetryWrapper(cluster_size=self.cluster_size, logger=LOG)
+            # Number of messages which were already published, used to resume on retry.
+            published = [0]
+
+            def do_publish(connection, channel):
+                producer = Producer(channel)
+
+                for payload in payloads[published[0]:]:
+                    kwargs = get_publish_kwargs(payload=payload, exchange=exchange,
+                                                routing_key=routing_key)
+                    retry_wrapper.ensured(connection=connection,
+                                          obj=producer,
+                                          to_ensure_func=producer.publish,
+                                          **kwargs)
+                    published[0] += 1
+
+            retry_wrapper.run(connection=connection, wrapped_callback=do_publish)
+
+
+class PublishNotConfirmedError(Exception):
+    """
+    Raised for a message which was negatively acknowledged (nack) by the broker.
+    """
+    pass
+
+
+class _PendingMessage(object):
+    def __init__(self, payload, exchange, routing_key):
+        self.payload = payload
+        self.exchange = exchange
+        self.routing_key = routing_key
+        # Delivery tag assigned by the channel once the message is published with confirms.
+        self.delivery_tag = None
+        self.result = event.Event()
+
+    @property
+    def done(self):
+        return self.result.ready()
+
+
+class _ConfirmTracker(object):
+    """
+    Keeps track of the publisher confirms for a single channel.
+
+    Once a channel is switched to confirm mode the broker numbers all the published messages
+    starting from 1 and acks (or nacks) them, possibly many at once.
+    """
+    def __init__(self, channel):
+        self.last_delivery_tag = 0
+        self.pending = {}
+
+        channel.confirm_select()
+        channel.events['basic_ack'].add(self._on_ack)
+        channel.events['basic_nack'].add(self._on_nack)
+
+    def track(self, message):
+        self.last_delivery_tag += 1
+        message.delivery_tag = self.last_delivery_tag
+        self.pending[message.delivery_tag] = message
+
+    def _get_messages(self, delivery_tag, multiple):
+        if not multiple:
+            message = self.pending.pop(delivery_tag, None)
+            return [message] if message else []
+
+        delivery_tags = [tag for tag in self.pending.keys() if tag <= delivery_tag]
+        return [self.pending.pop(tag) for tag in sorted(delivery_tags)]
+
+    def _on_ack(self, delivery_tag, multiple):
+        for message in self._get_messages(delivery_tag, multiple):
+            if not message.done:
+                message.result.send(True)
+
+    def _on_nack(self, delivery_tag, multiple, requeue):
+        for message in self._get_messages(delivery_tag, multiple):
+            if not message.done:
+                exc = PublishNotConfirmedError('Broker did not confirm message with delivery tag '
+                                               '%s.' % (message.delivery_tag))
+                message.result.send_exception(exc)
+        return True
+
+
+class BatchedPoolPublisher(PoolPublisher):
+    """
+    PoolPublisher which buffers messages and publishes them as a group.
+
+    Messages are collected for up to ``batch_window`` seconds or until ``batch_size`` messages
+    are buffered, whichever comes first. A batch is then published over a long lived channel
+    and producer of a pooled connection. If the transport supports it, publisher confirms are
+    used and the broker acknowledges the whole batch at once instead of each message separately.
+
+    ``publish`` still blocks the calling greenthread until its own message is sent (and
+    confirmed) and raises if publishing of that message failed, so callers see the same
+    behavior as with PoolPublisher.
+    """
+    def __init__(self, urls, batch_size=100, batch_window=0.01, confirm_publish=True):
+        super(BatchedPoolPublisher, self).__init__(urls=urls)
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._confirm_publish = confirm_publish
+
+        self._queue = queue.LightQueue()
+        self._flusher_thread = None
+        self._producers = weakref.WeakKeyDictionary()
+        self._confirm_trackers = weakref.WeakKeyDictionary()
+
+    def publish(self, payload, exchange, routing_key=''):
+        message = _PendingMessage(payload=payload, exchange=exchange, routing_key=routing_key)
+        self._queue.put(message)
+
+        if self._flusher_thread is None:
+            self._flusher_thread = eventlet.spawn(self._flush_forever)
+
+        # Raises if this particular message could not be published.
+        return message.result.wait()
+
+    def publish_many(self, payloads, exchange, routing_key=''):
+        """
+        Queue all the messages at once so they end up in as few batches as possible and wait
+        until all of them are published.
+
+        If any of the messages could not be published, the first error is raised once all the
+        messages have been processed.
+        """
+        messages = []
+        for payload in payloads:
+            message = _PendingMessage(payload=payload, exchange=exchange, routing_key=routing_key)
+            self._queue.put(message)
+            messages.append(message)
+
+        if self._flusher_thread is None:
+            self._flusher_thread = eventlet.spawn(self._flush_forever)
+
+        error = None
+        for message in messages:
+            try:
+                message.result.wait()
+            except Exception as e:
+                error = error or e
+
+        if error:
+            raise error
+
+    def shutdown(self):
+        if self._flusher_thread is not None:
+            self._flusher_thread.kill()
+            self._flusher_thread = None
+
+    def _flush_forever(self):
+        while True:
+            batch = self._get_batch()
+
+            try:
+                self._publish_batch(batch)
+            except Exception as e:
+                LOG.exception('Failed to publish batch of %s messages.', len(batch))
+
+                for message in batch:
+                    if not message.done:
+                        message.result.send_exception(e)
+
+    def _get_batch(self):
+        # Block until there is at least one message, then linger for the rest of the batch.
+        batch = [self._queue.get()]
+        time_left = self._batch_window
+
+        while len(batch) < self._batch_size and time_left > 0:
+            start = time.time()
+
+            try:
+                batch.append(self._queue.get(timeout=time_left))
+            except queue.Empty:
+                break
+
+            time_left -= time.time() - start
+
+        return batch
+
+    def _publish_batch(self, batch):
+        with self.pool.acquire(block=True) as connection:
+            retry_wrapper = ConnectionRetryWrapper(cluster_size=self.cluster_size, logger=LOG)
+
+            def do_publish(connection, channel):
+                producer = self._get_producer(channel=channel)
+                confirm_tracker = self._get_confirm_tracker(channel=channel)
+
+                for message in batch:
+                    # Messages which already failed or were confirmed on an earlier attempt
+                    # are not published again on retry.
+                    if message.done:
+                        continue
+
+                    try:
+                        kwargs = get_publish_kwargs(payload=message.payload,
+                                                    exchange=message.exchange,
+                                                    routing_key=message.routing_key)
+                        retry_wrapper.ensured(connection=connection,
+                                              obj=producer,
+                                              to_ensure_func=producer.publish,
+                                              **kwargs)
+                    except connection.connection_errors + connection.channel_errors:
+                        # Let the retry wrapper re-establish the connection and retry the
+                        # remainder of the batch.
+                        self._forget_channel(channel=channel)
+                        raise
+                    except Exception as e:
+                        # Errors which are specific to this message (e.g. serialization)
+                        # should not fail the rest of the batch.
+                        message.result.send_exception(e)
+                        continue
+
+                    if confirm_tracker:
+                        confirm_tracker.track(message)
+                    else:
+                        message.result.send(True)
+
+                if confirm_tracker:
+                    try:
+                        self._wait_for_confirms(channel=channel, confirm_tracker=confirm_tracker)
+                    except connection.connection_errors + connection.channel_errors:
+                        self._forget_channel(channel=channel)
+                        raise
+
+            retry_wrapper.run(connection=connection, wrapped_callback=do_publish,
+                              use_default_channel=True)
+
+    def _get_producer(self, channel):
+        producer = self._producers.get(channel, None)
+
+        if not producer:
+            producer = Producer(channel)
+            self._producers[channel] = producer
+
+        return producer
+
+    def _get_confirm_tracker(self, channel):
+        if not self._confirm_publish or not hasattr(channel, 'confirm_select'):
+            return None
+
+        confirm_tracker = self._confirm_trackers.get(channel, None)
+
+        if not confirm_tracker:
+            confirm_tracker = _ConfirmTracker(channel=channel)
+            self._confirm_trackers[channel] = confirm_tracker
+
+        return confirm_tracker
+
+    def _forget_channel(self, channel):
+        self._producers.pop(channel, None)
+        confirm_tracker = self._confirm_trackers.pop(channel, None)
+
+        if confirm_tracker:
+            # Delivery tags are per channel so unconfirmed messages need a new tag from the
+            # channel on which they are going to be re-published.
+            confirm_tracker.pending.clear()
+
+    def _wait_for_confirms(self, channel, confirm_tracker):
+        while confirm_tracker.pending:
+            # Basic.Ack / Basic.Nack
+            channel.wait([(60, 80), (60, 120)])
+
 
 class SharedPoolPublishers(object):
     """
@@ -79,25 +367,147 @@ class SharedPoolPublishers(object):
         publisher = self.shared_publishers.get(publisher_key, None)
         if not publisher:
             # Use original urls here to preserve order.
-            publisher = PoolPublisher(urls=urls)
+            publisher = self._create_publisher(urls=urls)
             self.shared_publishers[publisher_key] = publisher
         return publisher
 
+    def _create_publisher(self, urls):
+        if transport_utils.is_in_memory_transport(urls=urls):
+            return memory.InMemoryPublisher()
+
+        batch_size = cfg.CONF.messaging.publish_batch_size
+
+        if batch_size > 1:
+            return BatchedPoolPublisher(urls=urls, batch_size=batch_size,
+                                        batch_window=cfg.CONF.messaging.publish_batch_window,
+                                        confirm_publish=cfg.CONF.messaging.publish_confirm)
+
+        return PoolPublisher(urls=urls)
+
 
 class CUDPublisher(object):
-    def __init__(self, urls, exchange):
+    """
+    Publisher for the create, update and delete events of a resource.
+
+    When ``coalesce_window`` is set, updates are held back for up to that many seconds and only
+    the latest update of each object is published. An update which changes the object status
+    flushes the pending update first so consumers see every status transition.
+
+    Pending updates are a snapshot of the object at the time ``publish_update`` was called
+    since callers usually keep modifying and re-publishing the same object.
+    """
+
+    # Publishers with pending updates which need to be published on shutdown.
+    _coalescing_publishers = weakref.WeakSet()
+
+    def __init__(self, urls, exchange, coalesce_window=None):
         self._publisher = SharedPoolPublishers().get_publisher(urls=urls)
         self._exchange = exchange
 
+        if coalesce_window is None:
+            coalesce_window = cfg.CONF.messaging.update_coalesce_window
+
+        self._coalesce_window = coalesce_window
+        # object id -> latest pending update payload
+        self._pending_updates = collections.OrderedDict()
+        self._flush_timer = None
+
+        if self._coalesce_window:
+            CUDPublisher._coalescing_publishers.add(self)
+
     def publish_create(self, payload):
         self._publisher.publish(payload, self._exchange, CREATE_RK)
 
     def publish_update(self, payload):
-        self._publisher.publish(payload, self._exchange, UPDATE_RK)
+        object_id = self._get_object_id(payload)
+
+        if not self._coalesce_window or object_id is None:
+            self._publisher.publish(payload, self._exchange, UPDATE_RK)
+            return
+
+        pending_payload = self._pending_updates.get(object_id, None)
+        if pending_payload is not None and \
+                self._get_status(pending_payload) != self._get_status(payload):
+            self._flush_update(object_id)
+
+        self._pending_updates[object_id] = copy.deepcopy(payload)
+
+        if self._flush_timer is None:
+            self._flush_timer = eventlet.spawn_after(self._coalesce_window, self.flush)
+
+    def publish_create_many(self, payloads):
+        self._publisher.publish_many(payloads, self._exchange, CREATE_RK)
+
+    def publish_update_many(self, payloads):
+        if self._coalesce_window:
+            for payload in payloads:
+                self.publish_update(payload)
+            return
+
+        self._publisher.publish_many(payloads, self._exchange, UPDATE_RK)
+
+    def publish_delete_many(self, payloads):
+        for payload in payloads:
+            object_id = self._get_object_id(payload)
+            if object_id is not None and object_id in self._pending_updates:
+                self._flush_update(object_id)
+
+        self._publisher.publish_many(payloads, self._exchange, DELETE_RK)
 
     def publish_delete(self, payload):
+        # Pending update needs to go out before the object is reported as deleted.
+        object_id = self._get_object_id(payload)
+        if object_id is not None and object_id in self._pending_updates:
+            self._flush_update(object_id)
+
         self._publisher.publish(payload, self._exchange, DELETE_RK)
 
+    def flush(self):
+        """
+        Publish all the pending coalesced updates.
+        """
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        for object_id in list(self._pending_updates.keys()):
+            self._flush_update(object_id)
+
+    def _flush_update(self, object_id):
+        payload = self._pending_updates.pop(object_id, None)
+        if payload is None:
+            return
+
+        try:
+            self._publisher.publish(payload, self._exchange, UPDATE_RK)
+        except Exception:
+            LOG.exception('Failed to publish update for object %s.', object_id)
+
+    @staticmethod
+    def _get_object_id(payload):
+        if isinstance(payload, dict):
+            object_id = payload.get('id', None)
+        else:
+            object_id = getattr(payload, 'id', None)
+
+        return str(object_id) if object_id is not None else None
+
+    @staticmethod
+    def _get_status(payload):
+        if isinstance(payload, dict):
+            return payload.get('status', None)
+
+        return getattr(payload, 'status', None)
+
+
+def flush_pending_updates():
+    """
+    Publish the pending coalesced updates of all the CUD publishers. Called on service
+    shutdown so the updates are not lost.
+    """
+    for publisher in list(CUDPublisher._coalescing_publishers):
+        publisher.flush()
+
 
 class StatePublisherMixin(object):
     def __init__(self, urls, exchange):
@@ -13,7 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from kombu import Exchange, Queue
+import zlib
+
+import six
+from kombu import Exchange, Queue, binding
+from oslo_config import cfg
 
 from st2common import log as logging
 from st2common.constants.trace import TRACE_CONTEXT
@@ -22,14 +26,19 @@ from st2common.transport import publishers
 from st2common.transport import utils as transport_utils
 
 __all__ = [
+    'RuleCUDPublisher',
     'TriggerCUDPublisher',
     'TriggerInstancePublisher',
 
     'TriggerDispatcher',
 
+    'get_rule_cud_queue',
     'get_sensor_cud_queue',
     'get_trigger_cud_queue',
-    'get_trigger_instances_queue'
+    'get_trigger_instances_queue',
+    'get_trigger_instances_buckets_queue',
+    'get_trigger_bucket',
+    'get_trigger_instance_routing_key'
 ]
 
 LOG = logging.getLogger(__name__)
@@ -43,6 +52,13 @@ TRIGGER_INSTANCE_XCHG = Exchange('st2.trigger_instances_dispatch', type='topic')
 # Exchane for Sensor CUD events
 SENSOR_CUD_XCHG = Exchange('st2.sensor', type='topic')
 
+# Exchange for Rule CUD events
+RULE_CUD_XCHG = Exchange('st2.rule', type='topic')
+
+# Trigger instances are published with a routing key of the form
+# "trigger_instance.<bucket>.<trigger ref>" so consumers can bind to a subset of the buckets.
+TRIGGER_INSTANCE_RK_PREFIX = 'trigger_instance'
+
 
 class SensorCUDPublisher(publishers.CUDPublisher):
     """
@@ -62,12 +78,20 @@ class TriggerCUDPublisher(publishers.CUDPublisher):
         super(TriggerCUDPublisher, self).__init__(urls, TRIGGER_CUD_XCHG)
 
 
+class RuleCUDPublisher(publishers.CUDPublisher):
+    """
+    Publisher responsible for publishing Rule model CUD events.
+    """
+
+    def __init__(self, urls):
+        super(RuleCUDPublisher, self).__init__(urls, RULE_CUD_XCHG)
+
+
 class TriggerInstancePublisher(object):
     def __init__(self, urls):
-        self._publisher = publishers.PoolPublisher(urls=urls)
+        self._publisher = publishers.SharedPoolPublishers().get_publisher(urls=urls)
 
     def publish_trigger(self, payload=None, routing_key=None):
-        # TODO: We should use trigger reference as a routing key
         self._publisher.publish(payload, TRIGGER_INSTANCE_XCHG, routing_key)
 
 
@@ -101,7 +125,7 @@ class TriggerDispatcher(object):
             'payload': payload,
             TRACE_CONTEXT: trace_context
         }
-        routing_key = 'trigger_instance'
+        routing_key = get_trigger_instance_routing_key(trigger=trigger)
 
         self._logger.debug('Dispatching trigger (trigger=%s,payload=%s)', trigger, payload)
         self._publisher.publish_trigger(payload=payload, routing_key=routing_key)
@@ -115,5 +139,59 @@ def get_trigger_instances_queue(name, routing_key):
     return Queue(name, TRIGGER_INSTANCE_XCHG, routing_key=routing_key)
 
 
+def get_trigger_instances_buckets_queue(name, buckets):
+    """
+    Return a queue which only receives trigger instances for the provided buckets.
+
+    :param buckets: Buckets to bind the queue to.
+    :type buckets: ``list`` of ``int``
+    """
+    bindings = [binding(TRIGGER_INSTANCE_XCHG,
+                        routing_key='%s.%s.#' % (TRIGGER_INSTANCE_RK_PREFIX, bucket))
+                for bucket in buckets]
+    return Queue(name, bindings=bindings)
+
+
+def get_trigger_bucket(trigger_ref, bucket_count=None):
+    """
+    Return a stable (across processes and hosts) bucket for the provided trigger reference.
+
+    :rtype: ``int``
+    """
+    if bucket_count is None:
+        bucket_count = cfg.CONF.messaging.trigger_instance_buckets
+
+    if isinstance(trigger_ref, six.text_type):
+        trigger_ref = trigger_ref.encode('utf-8')
+
+    return (zlib.crc32(trigger_ref) & 0xffffffff) % bucket_count
+
+
+def get_trigger_instance_routing_key(trigger):
+    """
+    Return a routing key for the trigger instance of the provided trigger.
+
+    :param trigger: Full name / reference of the trigger or a dict with the trigger type and
+                    parameters.
+    :type trigger: ``str`` or ``dict``
+
+    :rtype: ``str``
+    """
+    if isinstance(trigger, dict):
+        if trigger.get('pack', None) and trigger.get('name', None):
+            trigger_ref = '%s.%s' % (trigger['pack'], trigger['name'])
+        else:
+            trigger_ref = trigger.get('type', None) or ''
+    else:
+        trigger_ref = trigger or ''
+
+    bucket = get_trigger_bucket(trigger_ref=trigger_ref)
+    return '%s.%s.%s' % (TRIGGER_INSTANCE_RK_PREFIX, bucket, trigger_ref)
+
+
 def get_sensor_cud_queue(name, routing_key):
     return Queue(name, SENSOR_CUD_XCHG, routing_key=routing_key)
+
+
+def get_rule_cud_queue(name, routing_key):
+    return Queue(name, RULE_CUD_XCHG, routing_key=routing_key)
@@ -0,0 +1,170 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Serializers for the messages which are sent over the message bus.
+
+Besides ``pickle`` this module provides a compact, versioned ``st2`` wire format. Database
+models are encoded as the document fields (same representation as stored in MongoDB) instead
+of the whole pickled object and large messages are compressed. Each message carries a
+content type so consumers which accept both formats can be rolled out before the publishers
+are switched over to the new format.
+
+Wire format of the ``st2`` serializer::
+
+    | version (1 byte) | flags (1 byte) | JSON body (optionally zlib compressed) |
+"""
+
+import json
+import struct
+import zlib
+
+import mongoengine as me
+from bson import json_util
+from kombu import serialization
+from mongoengine.base import get_document
+from oslo_config import cfg
+
+from st2common.models.api.trace import TraceContext
+
+__all__ = [
+    'PICKLE_SERIALIZER',
+    'ST2_SERIALIZER',
+    'ACCEPTED_SERIALIZERS',
+
+    'dumps',
+    'encode',
+    'decode'
+]
+
+PICKLE_SERIALIZER = 'pickle'
+ST2_SERIALIZER = 'st2'
+
+# Serializers which consumers accept. Consumers accept all the formats so publishers and
+# consumers can be upgraded independently.
+ACCEPTED_SERIALIZERS = [PICKLE_SERIALIZER, ST2_SERIALIZER]
+
+ST2_CONTENT_TYPE = 'application/x-st2'
+ST2_CONTENT_ENCODING = 'binary'
+
+WIRE_FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+
+_HEADER = struct.Struct('!BB')
+
+# Marker keys for the values which need special handling.
+DOCUMENT_KEY = '$st2doc'
+OBJECT_KEY = '$st2obj'
+FIELDS_KEY = '$fields'
+
+# Plain (non document) classes which can be sent over the wire. Maps class name to a tuple of
+# (class, function which converts an instance to dict, function which creates an instance
+# from dict).
+SERIALIZABLE_CLASSES = {
+    'TraceContext': (TraceContext, lambda obj: obj.__dict__,
+                     lambda fields: TraceContext(**fields))
+}
+
+
+def _default(obj):
+    if isinstance(obj, (me.Document, me.EmbeddedDocument)):
+        return {DOCUMENT_KEY: obj._class_name, FIELDS_KEY: obj.to_mongo()}
+
+    name = obj.__class__.__name__
+    if name in SERIALIZABLE_CLASSES and isinstance(obj, SERIALIZABLE_CLASSES[name][0]):
+        return {OBJECT_KEY: name, FIELDS_KEY: SERIALIZABLE_CLASSES[name][1](obj)}
+
+    # ObjectId, datetime, etc.
+    return json_util.default(obj)
+
+
+def _object_hook(dct):
+    if DOCUMENT_KEY in dct:
+        return get_document(dct[DOCUMENT_KEY])._from_son(dct[FIELDS_KEY])
+
+    if OBJECT_KEY in dct:
+        return SERIALIZABLE_CLASSES[dct[OBJECT_KEY]][2](dct[FIELDS_KEY])
+
+    return json_util.object_hook(dct)
+
+
+def encode(obj, compression_threshold=None):
+    """
+    Encode the provided object using the ``st2`` wire format.
+
+    :param compression_threshold: Size in bytes above which the body is compressed. Defaults to
+                                  the ``messaging.compression_threshold`` config option.
+    :type compression_threshold: ``int``
+
+    :rtype: ``str``
+    """
+    if compression_threshold is None:
+        compression_threshold = cfg.CONF.messaging.compression_threshold
+
+    body = json.dumps(obj, default=_default, separators=(',', ':'))
+    if isinstance(body, unicode):
+        body = body.encode('utf-8')
+
+    flags = 0
+    if compression_threshold and len(body) > compression_threshold:
+        body = zlib.compress(body)
+        flags |= FLAG_ZLIB
+
+    return _HEADER.pack(WIRE_FORMAT_VERSION, flags) + body
+
+
+def decode(data):
+    """
+    Decode a message encoded with the ``st2`` wire format.
+    """
+    version, flags = _HEADER.unpack_from(data)
+    if version > WIRE_FORMAT_VERSION:
+        raise ValueError('Unsupported wire format version: %s' % (version))
+
+    body = data[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    return json.loads(body, object_hook=_object_hook)
+
+
+def dumps(obj, serializer=None):
+    """
+    Serialize the provided object for publishing.
+
+    If the object contains values which can't be represented in the ``st2`` wire format, the
+    message falls back to ``pickle``.
+
+    :param serializer: Name of the serializer to use. Defaults to the ``messaging.serializer``
+                       config option.
+    :type serializer: ``str``
+
+    :return: (content_type, content_encoding, body)
+    :rtype: ``tuple``
+    """
+    if serializer is None:
+        serializer = cfg.CONF.messaging.serializer
+
+    if serializer == ST2_SERIALIZER:
+        try:
+            return ST2_CONTENT_TYPE, ST2_CONTENT_ENCODING, encode(obj)
+        except (TypeError, ValueError):
+            serializer = PICKLE_SERIALIZER
+
+    return serialization.dumps(obj, serializer=serializer)
+
+
+serialization.register(ST2_SERIALIZER, encode, decode, content_type=ST2_CONTENT_TYPE,
+                       content_encoding=ST2_CONTENT_ENCODING)
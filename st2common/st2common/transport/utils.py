@@ -16,11 +16,14 @@
 from oslo_config import cfg
 
 __all__ = [
-    'get_messaging_urls'
+    'get_messaging_urls',
+    'is_in_memory_transport'
 ]
 
 CONF = cfg.CONF
 
+MEMORY_TRANSPORT_URL = 'memory://'
+
 
 def get_messaging_urls():
     '''
@@ -32,3 +35,13 @@ def get_messaging_urls():
     if CONF.messaging.cluster_urls:
         return CONF.messaging.cluster_urls
     return [CONF.messaging.url]
+
+
+def is_in_memory_transport(urls=None):
+    """
+    Return True if the in-process message bus should be used instead of a message broker.
+
+    :rtype: ``bool``
+    """
+    urls = urls or get_messaging_urls()
+    return any([url.startswith(MEMORY_TRANSPORT_URL) for url in urls])
@@ -76,24 +76,18 @@ def get_runnertype_by_name(runnertype_name):
         Get an runnertype by name.
         On error, raise ST2ObjectNotFoundError.
     """
+    # Note: Name is unique and lookups by name are cached.
     try:
-        runnertypes = RunnerType.query(name=runnertype_name)
-    except (ValueError, ValidationError) as e:
+        return RunnerType.get_by_name(runnertype_name)
+    except ValidationError as e:
         LOG.error('Database lookup for name="%s" resulted in exception: %s',
                   runnertype_name, e)
         raise StackStormDBObjectNotFoundError('Unable to find runnertype with name="%s"'
                                               % runnertype_name)
-
-    if not runnertypes:
+    except ValueError:
         raise StackStormDBObjectNotFoundError('Unable to find RunnerType with name="%s"'
                                               % runnertype_name)
 
-    if len(runnertypes) > 1:
-        LOG.warning('More than one RunnerType returned from DB lookup by name. '
-                    'Result list is: %s', runnertypes)
-
-    return runnertypes[0]
-
 
 def get_action_by_id(action_id):
     """
@@ -178,21 +172,27 @@ def update_liveaction_status(status=None, result=None, context=None, end_timesta
               extra=extra)
 
     old_status = liveaction_db.status
-    liveaction_db.status = status
+
+    # Only the changed fields are written.
+    set_fields = {'status': status}
 
     if result:
-        liveaction_db.result = result
+        set_fields['result'] = result
 
     if context:
-        liveaction_db.context.update(context)
+        set_fields['context'] = dict(liveaction_db.context or {}, **context)
 
     if end_timestamp:
-        liveaction_db.end_timestamp = end_timestamp
+        set_fields['end_timestamp'] = end_timestamp
 
     if runner_info:
-        liveaction_db.runner_info = runner_info
+        set_fields['runner_info'] = runner_info
 
-    liveaction_db = LiveAction.add_or_update(liveaction_db)
+    updated_liveaction_db = LiveAction.update(liveaction_db.id, **set_fields)
+    if not updated_liveaction_db:
+        raise StackStormDBObjectNotFoundError('Unable to find LiveAction with id="%s"'
+                                              % (liveaction_db.id))
+    liveaction_db = updated_liveaction_db
 
     LOG.debug('Updated status for LiveAction object.', extra=extra)
 
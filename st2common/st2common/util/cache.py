@@ -0,0 +1,95 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+In-process caching utilities.
+"""
+
+import collections
+import time
+
+__all__ = [
+    'LRUCache'
+]
+
+# Returned by LRUCache.get when no default is provided and the key is not cached.
+MISSING = object()
+
+
+class LRUCache(object):
+    """
+    Least recently used cache with an optional time to live for the entries.
+
+    Cache keeps hit, miss and eviction counters which can be retrieved using ``get_stats``.
+    """
+
+    def __init__(self, max_size=1000, ttl=None):
+        """
+        :param max_size: Maximum number of cached entries.
+        :type max_size: ``int``
+
+        :param ttl: Time in seconds after which an entry expires. ``None`` means never.
+        :type ttl: ``float``
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # key -> (value, expires_at)
+        self._entries = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        entry = self._entries.pop(key, None)
+
+        if entry is None or (entry[1] is not None and entry[1] < time.time()):
+            self.misses += 1
+            return default
+
+        # Move to the end, most recently used entries are at the end.
+        self._entries[key] = entry
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        self._entries.pop(key, None)
+
+        expires_at = time.time() + self.ttl if self.ttl else None
+        self._entries[key] = (value, expires_at)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -13,39 +13,110 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 import eventlet
-import Queue
+from eventlet import queue
+from eventlet import semaphore
+
+from st2common import log as logging
+
+__all__ = [
+    'BufferedDispatcher'
+]
+
+LOG = logging.getLogger(__name__)
 
 
 class BufferedDispatcher(object):
+    """
+    Dispatches work items to a pool of green threads.
+
+    Work items are buffered in a bounded queue and handed to the pool the moment a worker slot
+    frees up. When the pool is saturated and the buffer is full, ``dispatch`` blocks the caller
+    until there is room in the buffer. Callers such as the message bus consumers rely on this to
+    stop pulling new messages instead of dropping them.
+    """
 
-    def __init__(self, dispatch_pool_size=50, monitor_thread_empty_q_sleep_time=5,
-                 monitor_thread_no_workers_sleep_time=1):
+    def __init__(self, dispatch_pool_size=50, buffer_size=None):
+        """
+        :param dispatch_pool_size: Max number of work items processed concurrently.
+        :type dispatch_pool_size: ``int``
+
+        :param buffer_size: Max number of work items waiting for a free worker. Defaults to
+                            ``dispatch_pool_size``.
+        :type buffer_size: ``int``
+        """
         self._pool_limit = dispatch_pool_size
-        self._dispatcher_pool = eventlet.GreenPool(dispatch_pool_size)
-        self._dispatch_monitor_thread = eventlet.greenthread.spawn(self._flush)
-        self._monitor_thread_empty_q_sleep_time = monitor_thread_empty_q_sleep_time
-        self._monitor_thread_no_workers_sleep_time = monitor_thread_no_workers_sleep_time
-        self._work_buffer = Queue.Queue()
+        self._workers = semaphore.Semaphore(dispatch_pool_size)
+        self._work_buffer = queue.LightQueue(maxsize=buffer_size or dispatch_pool_size)
+        self._dispatch_thread = eventlet.greenthread.spawn(self._dispatch_forever)
+
+        self._dispatched_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @property
+    def queue_depth(self):
+        """
+        Number of work items waiting for a free worker.
+        """
+        return self._work_buffer.qsize()
+
+    @property
+    def pool_size(self):
+        return self._pool_limit
+
+    @property
+    def free_workers(self):
+        return self._workers.balance
 
     def dispatch(self, handler, *args):
-        self._work_buffer.put((handler, args), block=True, timeout=1)
-        self._flush_now()
+        if self._work_buffer.full():
+            LOG.debug('Dispatch buffer is full (depth=%s), waiting for a free worker.',
+                      self.queue_depth)
+
+        # Blocks until there is room in the buffer which pushes back on the caller.
+        self._work_buffer.put((handler, args, time.time()))
+
+    def get_stats(self):
+        """
+        Return queue depth and the time work items spent waiting for a worker.
+
+        :rtype: ``dict``
+        """
+        dispatched_count = self._dispatched_count
+        average_wait_time = (self._total_wait_time / dispatched_count) if dispatched_count else 0
+
+        return {
+            'queue_depth': self.queue_depth,
+            'running': self._pool_limit - self.free_workers,
+            'dispatched': dispatched_count,
+            'average_wait_time': average_wait_time,
+            'max_wait_time': self._max_wait_time
+        }
 
     def shutdown(self):
-        self._dispatch_monitor_thread.kill()
+        self._dispatch_thread.kill()
 
-    def _flush(self):
+    def _dispatch_forever(self):
         while True:
-            while self._work_buffer.empty():
-                eventlet.greenthread.sleep(self._monitor_thread_empty_q_sleep_time)
-            while self._dispatcher_pool.free() <= 0:
-                eventlet.greenthread.sleep(self._monitor_thread_no_workers_sleep_time)
-            self._flush_now()
-
-    def _flush_now(self):
-        if self._dispatcher_pool.free() <= 0:
-            return
-        while not self._work_buffer.empty() and self._dispatcher_pool.free() > 0:
-            (handler, args) = self._work_buffer.get_nowait()
-            self._dispatcher_pool.spawn(handler, *args)
+            # Wait for a free worker before taking work out of the buffer so the buffer holds
+            # all the waiting work. The semaphore wakes us up as soon as a worker finishes so
+            # there is no polling involved.
+            self._workers.acquire()
+            handler, args, enqueued_at = self._work_buffer.get()
+
+            self._record_wait_time(time.time() - enqueued_at)
+            eventlet.greenthread.spawn_n(self._run, handler, args)
+
+    def _run(self, handler, args):
+        try:
+            handler(*args)
+        finally:
+            self._workers.release()
+
+    def _record_wait_time(self, wait_time):
+        self._dispatched_count += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
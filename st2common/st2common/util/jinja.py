@@ -17,8 +17,24 @@ import json
 import jinja2
 import six
 import re
+import threading
 
 import semver
+from jinja2 import meta
+
+from st2common.util.cache import LRUCache
+
+# Maximum number of compiled templates (and parsed template variables) kept in memory.
+TEMPLATE_CACHE_SIZE = 1000
+
+# allow_undefined -> shared jinja2.Environment
+_ENVIRONMENTS = {}
+
+# (kind, allow_undefined, source) -> compiled template or the set of the template variables
+_TEMPLATE_CACHE = LRUCache(max_size=TEMPLATE_CACHE_SIZE)
+
+# Guards the shared environments and the cache which are used by multiple threads and greenlets
+_LOCK = threading.Lock()
 
 
 class CustomFilters(object):
@@ -124,6 +140,100 @@ def get_jinja_environment(allow_undefined=False):
     return env
 
 
+def get_shared_jinja_environment(allow_undefined=False):
+    """
+    Return the jinja2.Environment with the custom filters which is shared by the whole process.
+
+    The shared environment must not be modified, use ``get_jinja_environment`` to get an
+    environment which can be customized.
+
+    :param allow_undefined: If should allow undefined variables in templates
+    :type allow_undefined: ``bool``
+    """
+    with _LOCK:
+        env = _ENVIRONMENTS.get(allow_undefined, None)
+
+        if env is None:
+            env = get_jinja_environment(allow_undefined=allow_undefined)
+            _ENVIRONMENTS[allow_undefined] = env
+
+    return env
+
+
+def get_template(source, allow_undefined=False):
+    """
+    Return the compiled template of the provided source. Compiled templates are cached.
+
+    :param source: Template string.
+    :type source: ``str``
+
+    :param allow_undefined: If should allow undefined variables in templates
+    :type allow_undefined: ``bool``
+
+    :rtype: :class:`jinja2.Template`
+    """
+    key = ('template', allow_undefined, source)
+
+    with _LOCK:
+        template = _TEMPLATE_CACHE.get(key, None)
+
+    if template is None:
+        env = get_shared_jinja_environment(allow_undefined=allow_undefined)
+        template = env.from_string(source)
+
+        with _LOCK:
+            _TEMPLATE_CACHE.set(key, template)
+
+    return template
+
+
+def get_undeclared_variables(source):
+    """
+    Return names of the variables which the provided template expects in the context. The result
+    is cached.
+
+    :rtype: ``frozenset``
+    """
+    key = ('variables', False, source)
+
+    with _LOCK:
+        variables = _TEMPLATE_CACHE.get(key, None)
+
+    if variables is None:
+        env = get_shared_jinja_environment()
+        variables = frozenset(meta.find_undeclared_variables(env.parse(source)))
+
+        with _LOCK:
+            _TEMPLATE_CACHE.set(key, variables)
+
+    return variables
+
+
+def get_template_cache_stats():
+    """
+    Return statistics (size, hits, misses, evictions and hit rate) of the compiled templates
+    cache.
+
+    :rtype: ``dict``
+    """
+    with _LOCK:
+        stats = _TEMPLATE_CACHE.get_stats()
+
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = float(stats['hits']) / lookups if lookups else 0.0
+    return stats
+
+
+def clear_template_cache():
+    """
+    Remove all the cached templates and reset the cache statistics.
+    """
+    global _TEMPLATE_CACHE
+
+    with _LOCK:
+        _TEMPLATE_CACHE = LRUCache(max_size=TEMPLATE_CACHE_SIZE)
+
+
 def render_values(mapping=None, context=None, allow_undefined=False):
     """
     Render an incoming mapping using context provided in context using Jinja2. Returns a dict
@@ -141,7 +251,6 @@ def render_values(mapping=None, context=None, allow_undefined=False):
     if not context or not mapping:
         return mapping
 
-    env = get_jinja_environment(allow_undefined=allow_undefined)
     rendered_mapping = {}
     for k, v in six.iteritems(mapping):
         # jinja2 works with string so transform list and dict to strings.
@@ -151,7 +260,7 @@ def render_values(mapping=None, context=None, allow_undefined=False):
             reverse_json_dumps = True
         else:
             v = str(v)
-        rendered_v = env.from_string(v).render(context)
+        rendered_v = get_template(v, allow_undefined=allow_undefined).render(context)
         # no change therefore no templatization so pick params from original to retain
         # original type
         if rendered_v == v:
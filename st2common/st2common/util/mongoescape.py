@@ -13,7 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import copy
+import itertools
+
 import six
 
 # http://docs.mongodb.org/manual/faq/developers/#faq-dollar-sign-escaping
@@ -30,49 +31,97 @@ RULE_CRITERIA_ESCAPE_TRANSLATION = dict(zip(RULE_CRITERIA_UNESCAPED,
 RULE_CRITERIA_UNESCAPE_TRANSLATION = dict(zip(RULE_CRITERIA_ESCAPED,
                                               RULE_CRITERIA_UNESCAPED))
 
+# Both unescape translations are applied in the same pass
+COMBINED_UNESCAPE_TRANSLATION = dict(UNESCAPE_TRANSLATION)
+COMBINED_UNESCAPE_TRANSLATION.update(RULE_CRITERIA_UNESCAPE_TRANSLATION)
 
-def _prep_work_items(d):
-    return [(k, v, d) for k, v in six.iteritems(d)]
+ESCAPE_ITEMS = list(ESCAPE_TRANSLATION.items())
+UNESCAPE_ITEMS = list(COMBINED_UNESCAPE_TRANSLATION.items())
 
 
-def _translate_chars(field, translation):
-    # Only translate the fields of a dict
-    if not isinstance(field, dict):
-        return field
+def _translate_key(key, items):
+    for char, replacement in items:
+        if char in key:
+            break
+    else:
+        return key
+
+    for char, replacement in items:
+        key = key.replace(char, replacement)
+
+    return key
+
+
+def _translate_list(value, items):
+    translated = None
+
+    for index, item in enumerate(value):
+        # Only the dicts which are directly in the list are translated
+        if not isinstance(item, dict):
+            continue
+
+        new_item = _translate_dict(item, items)
+
+        if new_item is not item:
+            if translated is None:
+                translated = list(value)
+            translated[index] = new_item
 
-    work_items = _prep_work_items(field)
+    return value if translated is None else translated
 
-    while len(work_items) > 0:
-        work_item = work_items.pop(0)
-        oldkey = work_item[0]
-        value = work_item[1]
-        work_field = work_item[2]
-        newkey = oldkey
 
-        for t_k, t_v in six.iteritems(translation):
-            newkey = newkey.replace(t_k, t_v)
+def _translate_dict(value, items):
+    """
+    Translate the keys of the dict and of the nested dicts in a single pass.
 
-        if newkey != oldkey:
-            work_field[newkey] = value
-            del work_field[oldkey]
+    Containers in which nothing changes are returned as is, only the containers which (or whose
+    descendants) have keys with the special characters are copied. Provided value is never
+    modified.
+    """
+    translated = None
 
-        if isinstance(value, dict):
-            work_items.extend(_prep_work_items(value))
-        elif isinstance(value, list):
-            for item in value:
-                if isinstance(item, dict):
-                    work_items.extend(_prep_work_items(item))
+    for index, (key, item) in enumerate(six.iteritems(value)):
+        new_key = _translate_key(key, items)
 
-    return field
+        if isinstance(item, dict):
+            new_item = _translate_dict(item, items)
+        elif isinstance(item, list):
+            new_item = _translate_list(item, items)
+        else:
+            new_item = item
+
+        if translated is None:
+            if new_key is key and new_item is item:
+                continue
+
+            # First change, copy the items which have been processed so far
+            translated = dict(itertools.islice(six.iteritems(value), index))
+
+        translated[new_key] = new_item
+
+    return value if translated is None else translated
+
+
+def _translate_chars(field, items):
+    # Only translate the fields of a dict
+    if not isinstance(field, dict):
+        return field
+
+    return _translate_dict(field, items)
 
 
 def escape_chars(field):
-    value = copy.deepcopy(field)
-    return _translate_chars(value, ESCAPE_TRANSLATION)
+    """
+    Escape the special characters in the keys of the provided dict (and of the nested dicts).
+
+    The value is returned as is when there is nothing to escape, otherwise the changed
+    containers are copied (the provided value is never modified).
+    """
+    return _translate_chars(field, ESCAPE_ITEMS)
 
 
 def unescape_chars(field):
-    value = copy.deepcopy(field)
-    translated = _translate_chars(value, UNESCAPE_TRANSLATION)
-    translated = _translate_chars(value, RULE_CRITERIA_UNESCAPE_TRANSLATION)
-    return translated
+    """
+    Reverse of ``escape_chars``. Also unescapes the old rule criteria dot escaping.
+    """
+    return _translate_chars(field, UNESCAPE_ITEMS)
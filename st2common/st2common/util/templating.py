@@ -14,10 +14,10 @@
 # limitations under the License.
 
 import six
-from jinja2 import Environment, StrictUndefined
 
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
+from st2common.util import jinja as jinja_utils
 
 __all__ = [
     'render_template',
@@ -38,8 +38,7 @@ def render_template(value, context=None):
     assert isinstance(value, six.string_types)
     context = context or {}
 
-    env = Environment(undefined=StrictUndefined)
-    template = env.from_string(value)
+    template = jinja_utils.get_template(value)
     rendered = template.render(context)
 
     return rendered
@@ -0,0 +1,112 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import unittest2
+
+from st2common.exceptions.db import StackStormDBObjectConflictError
+from st2common.services.bulkwriter import BulkWriter
+
+
+class FakeResource(object):
+    batches = []
+
+    @classmethod
+    def add_or_update(cls, model_object):
+        cls.batches.append([model_object])
+        return model_object
+
+    @classmethod
+    def add_or_update_many(cls, model_objects):
+        cls.batches.append(list(model_objects))
+
+        saved = [model_object for model_object in model_objects if model_object != 'conflict']
+        errors = [(model_object, StackStormDBObjectConflictError('conflict', None, model_object))
+                  for model_object in model_objects if model_object == 'conflict']
+        return saved, errors
+
+
+class BulkWriterTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(BulkWriterTest, self).setUp()
+        FakeResource.batches = []
+
+    def _get_writer(self, batch_size=10, batch_window=0.1):
+        writer = BulkWriter(resource_cls=FakeResource, batch_size=batch_size,
+                            batch_window=batch_window)
+        self.addCleanup(writer.shutdown)
+        return writer
+
+    def _add_or_update(self, writer, model_object):
+        try:
+            return writer.add_or_update(model_object)
+        except StackStormDBObjectConflictError as e:
+            return e
+
+    def test_concurrent_writes_are_grouped(self):
+        writer = self._get_writer()
+        pool = eventlet.GreenPool()
+
+        threads = [pool.spawn(self._add_or_update, writer, 'obj-%s' % (i)) for i in range(5)]
+        pool.waitall()
+
+        self.assertEqual([thread.wait() for thread in threads], ['obj-%s' % (i) for i in range(5)])
+        self.assertEqual(len(FakeResource.batches), 1)
+
+    def test_batch_size_is_respected(self):
+        writer = self._get_writer(batch_size=2)
+        pool = eventlet.GreenPool()
+
+        for i in range(5):
+            pool.spawn(self._add_or_update, writer, 'obj-%s' % (i))
+        pool.waitall()
+
+        self.assertEqual([len(batch) for batch in FakeResource.batches], [2, 2, 1])
+
+    def test_per_object_errors(self):
+        writer = self._get_writer()
+        pool = eventlet.GreenPool()
+
+        good = pool.spawn(self._add_or_update, writer, 'good')
+        bad = pool.spawn(self._add_or_update, writer, 'conflict')
+
+        self.assertEqual(good.wait(), 'good')
+        self.assertTrue(isinstance(bad.wait(), StackStormDBObjectConflictError))
+        self.assertEqual(len(FakeResource.batches), 1)
+
+    def test_batching_disabled(self):
+        writer = self._get_writer(batch_size=1)
+
+        self.assertEqual(writer.add_or_update('obj'), 'obj')
+        self.assertEqual(writer._flusher_thread, None)
+
+    def test_shutdown_saves_pending_writes(self):
+        writer = self._get_writer(batch_size=2, batch_window=10)
+        pool = eventlet.GreenPool()
+
+        threads = [pool.spawn(self._add_or_update, writer, 'obj-%s' % (i)) for i in range(3)]
+        eventlet.sleep(0)
+
+        writer.shutdown()
+        pool.waitall()
+
+        self.assertEqual([thread.wait() for thread in threads], ['obj-%s' % (i) for i in range(3)])
+        self.assertEqual([len(batch) for batch in FakeResource.batches], [2, 1])
+        self.assertEqual(writer._flusher_thread, None)
+
+        # Objects added after shutdown are saved right away.
+        self.assertEqual(writer.add_or_update('obj-3'), 'obj-3')
+        self.assertEqual(FakeResource.batches[-1], ['obj-3'])
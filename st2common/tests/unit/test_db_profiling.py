@@ -0,0 +1,149 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import tempfile
+
+import unittest2
+
+from st2common.models.db import profiling
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.keyvalue import KeyValuePairDB
+from st2common.persistence.keyvalue import KeyValuePair
+
+from st2tests import DbTestCase
+
+
+class QueryShapeTestCase(unittest2.TestCase):
+    def test_get_query_shape(self):
+        query = {
+            'status': 'succeeded',
+            'action.ref': {'$in': ['core.local', 'core.remote']},
+            'start_timestamp': {'$gte': 1, '$lt': 2},
+            'parent': {'$exists': False},
+            '$or': [{'a': 1}, {'b': 2}],
+            '_cls': 'ActionExecutionDB'
+        }
+
+        shape = profiling.get_query_shape(query)
+
+        self.assertEqual(shape, [['$or', 'expr'], ['action.ref', 'eq'], ['parent', '$exists'],
+                                 ['start_timestamp', 'range'], ['status', 'eq']])
+
+    def test_summarize_explain(self):
+        plan = {'cursor': 'BasicCursor', 'n': 1, 'nscanned': 1000, 'allPlans': []}
+        self.assertEqual(profiling.summarize_explain(plan),
+                         {'cursor': 'BasicCursor', 'n': 1, 'nscanned': 1000,
+                          'collection_scan': True})
+
+        plan = {
+            'queryPlanner': {
+                'winningPlan': {
+                    'stage': 'FETCH',
+                    'inputStage': {'stage': 'IXSCAN', 'indexName': 'status_1'}
+                }
+            },
+            'executionStats': {'nReturned': 5, 'totalDocsExamined': 5}
+        }
+        self.assertEqual(profiling.summarize_explain(plan),
+                         {'stages': ['FETCH', 'IXSCAN'], 'indexes': ['status_1'],
+                          'collection_scan': False, 'nReturned': 5, 'totalDocsExamined': 5})
+
+
+class QueryProfilerTestCase(unittest2.TestCase):
+    def test_record_aggregates_by_shape(self):
+        profiler = profiling.QueryProfiler(slow_threshold=0.5)
+        explain_calls = []
+
+        def explain():
+            explain_calls.append(1)
+            return {'cursor': 'BtreeCursor status_1'}
+
+        for duration, status in [(0.1, 'failed'), (1.0, 'succeeded'), (2.0, 'failed')]:
+            profiler.record(model=ActionExecutionDB, operation='find', query={'status': status},
+                            ordering=[('start_timestamp', -1)], duration=duration, documents=2,
+                            explain_func=explain)
+        profiler.record(model=ActionExecutionDB, operation='count', query={'status': 'failed'},
+                        duration=0.2)
+
+        shapes = profiler.get_shapes()
+        self.assertEqual(len(shapes), 2)
+        self.assertEqual(shapes[0]['operation'], 'find')
+        self.assertEqual(shapes[0]['collection'], ActionExecutionDB._get_collection_name())
+        self.assertEqual(shapes[0]['filter'], [['status', 'eq']])
+        self.assertEqual(shapes[0]['sort'], [['start_timestamp', -1]])
+        self.assertEqual(shapes[0]['count'], 3)
+        self.assertEqual(shapes[0]['documents'], 6)
+        self.assertEqual(shapes[0]['slow_count'], 2)
+        self.assertEqual(shapes[0]['max_time'], 2.0)
+        self.assertEqual(shapes[0]['explain']['cursor'], 'BtreeCursor status_1')
+
+        # Only the first slow query of a shape is explained
+        self.assertEqual(len(explain_calls), 1)
+        self.assertEqual(len(profiler.get_shapes(slow_only=True)), 1)
+
+    def test_max_shapes(self):
+        profiler = profiling.QueryProfiler(max_shapes=2)
+        profiler.record(model=ActionExecutionDB, operation='find', query={'a': 1}, duration=0.3)
+        profiler.record(model=ActionExecutionDB, operation='find', query={'b': 1}, duration=0.1)
+        profiler.record(model=ActionExecutionDB, operation='find', query={'c': 1}, duration=0.2)
+
+        filters = [shape['filter'] for shape in profiler.get_shapes()]
+        self.assertEqual(filters, [[['a', 'eq']], [['c', 'eq']]])
+
+    def test_dump(self):
+        profiler = profiling.QueryProfiler()
+        profiler.record(model=ActionExecutionDB, operation='find', query={'a': 1}, duration=0.3)
+
+        dump_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dump_dir)
+        file_path = os.path.join(dump_dir, 'profiles', 'api-1.json')
+
+        profiler.dump(file_path)
+
+        with open(file_path, 'r') as fp:
+            data = json.load(fp)
+
+        self.assertEqual(data['pid'], os.getpid())
+        self.assertEqual(len(data['shapes']), 1)
+        self.assertEqual(os.listdir(os.path.dirname(file_path)), ['api-1.json'])
+
+
+class ProfiledQueriesTestCase(DbTestCase):
+    def setUp(self):
+        super(ProfiledQueriesTestCase, self).setUp()
+        self.profiler = profiling.enable_query_profiler(slow_threshold=0)
+        self.addCleanup(profiling.disable_query_profiler)
+
+    def test_queries_are_recorded(self):
+        for index in range(3):
+            KeyValuePair.add_or_update(KeyValuePairDB(name='key%s' % (index), value='value'))
+
+        self.profiler.reset()
+
+        self.assertEqual(len(list(KeyValuePair.query(value='value', order_by=['name']))), 3)
+        self.assertEqual(KeyValuePair.count(value='value'), 3)
+        KeyValuePair.get_by_name('key1')
+
+        shapes = dict([(shape['operation'], shape) for shape in self.profiler.get_shapes()])
+        self.assertEqual(sorted(shapes.keys()), ['count', 'find', 'find_one'])
+
+        self.assertEqual(shapes['find']['filter'], [['value', 'eq']])
+        self.assertEqual(shapes['find']['sort'], [['name', 1]])
+        self.assertEqual(shapes['find']['documents'], 3)
+        self.assertTrue(shapes['find']['explain'])
+        self.assertEqual(shapes['find_one']['filter'], [['name', 'eq']])
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import six
+from oslo_config import cfg
 
 from st2common.constants import action as action_constants
 from st2common.models.api.action import RunnerTypeAPI, ActionAPI, LiveActionAPI
@@ -22,7 +23,9 @@ from st2common.models.api.rule import RuleAPI
 from st2common.persistence.liveaction import LiveAction
 from st2common.persistence.runner import RunnerType
 from st2common.persistence.execution import ActionExecution
+from st2common.persistence.execution import ActionExecutionResult
 import st2common.services.executions as executions_util
+from st2common.services import resultstorage
 import st2common.util.action_db as action_utils
 
 from st2tests.base import CleanDbTestCase
@@ -119,6 +122,69 @@ class ExecutionsUtilTestCase(CleanDbTestCase):
         child_execs = parent_execution.children
         self.assertTrue(str(child_exec.id) in child_execs)
 
+    def test_update_execution_large_result(self):
+        liveaction = self.MODELS['liveactions']['liveaction1.yaml']
+        execution = executions_util.create_execution_object(liveaction)
+
+        cfg.CONF.set_override(name='offload_threshold', override=100, group='result_storage')
+        self.addCleanup(cfg.CONF.clear_override, name='offload_threshold',
+                        group='result_storage')
+
+        liveaction.result = {'stdout': 'a' * 1000}
+        executions_util.update_execution(liveaction)
+        execution = ActionExecution.get_by_id(str(execution.id))
+
+        self.assertTrue(execution.result_ref)
+        self.assertEqual(execution.result['size'], len('{"stdout": "%s"}' % ('a' * 1000)))
+        self.assertEqual(resultstorage.load_result(execution.result_ref), liveaction.result)
+
+        # Same stored result is updated
+        result_ref = execution.result_ref
+        liveaction.result = {'stdout': 'b' * 1000}
+        executions_util.update_execution(liveaction)
+        execution = ActionExecution.get_by_id(str(execution.id))
+
+        self.assertEqual(execution.result_ref, result_ref)
+        self.assertEqual(resultstorage.load_result(execution.result_ref), liveaction.result)
+
+        # Small result is stored inline
+        liveaction.result = {'stdout': 'c'}
+        executions_util.update_execution(liveaction)
+        execution = ActionExecution.get_by_id(str(execution.id))
+
+        self.assertEqual(execution.result_ref, None)
+        self.assertEqual(execution.result, liveaction.result)
+
+        resultstorage.delete_results([str(execution.id)])
+        self.assertEqual(ActionExecutionResult.count(), 0)
+
+    def test_deduplicate_liveaction_fields(self):
+        cfg.CONF.set_override(name='deduplicate', override=True, group='result_storage')
+        self.addCleanup(cfg.CONF.clear_override, name='deduplicate', group='result_storage')
+
+        liveaction = self.MODELS['liveactions']['liveaction1.yaml']
+        execution = executions_util.create_execution_object(liveaction)
+        self.assertEqual(execution.parameters, liveaction.parameters)
+
+        liveaction.result = {'stdout': 'done'}
+        liveaction = LiveAction.add_or_update(liveaction, publish=False)
+        execution = executions_util.update_execution(liveaction)
+        self.assertEqual(execution.result, liveaction.result)
+
+        # Shared fields are only stored in the liveaction
+        collection = ActionExecution._get_impl().model._get_collection()
+        raw_execution = collection.find_one({'_id': execution.id})
+        self.assertNotIn('result', raw_execution)
+        self.assertNotIn('parameters', raw_execution)
+
+        execution = ActionExecution.get_by_id(str(execution.id))
+        ActionExecution.populate_shared_fields([execution])
+        ActionExecution.populate_shared_fields([raw_execution])
+        self.assertEqual(execution.result, liveaction.result)
+        self.assertEqual(execution.parameters, liveaction.parameters)
+        self.assertEqual(raw_execution['result'], liveaction.result)
+        self.assertNotIn('shared_fields', raw_execution)
+
     def _get_action_execution(self, **kwargs):
         return ActionExecution.get(**kwargs)
 
@@ -36,9 +36,7 @@ class TestGreenPoolDispatch(TestCase):
         self.assertItemsEqual(expected, call_args_list)
 
     def test_dispatch_starved(self):
-        dispatcher = BufferedDispatcher(dispatch_pool_size=2,
-                                        monitor_thread_empty_q_sleep_time=0.01,
-                                        monitor_thread_no_workers_sleep_time=0.01)
+        dispatcher = BufferedDispatcher(dispatch_pool_size=2)
         mock_handler = mock.MagicMock()
         expected = []
         for i in range(10):
@@ -49,3 +47,50 @@ class TestGreenPoolDispatch(TestCase):
         dispatcher.shutdown()
         call_args_list = [(args[0][0], args[0][1]) for args in mock_handler.call_args_list]
         self.assertItemsEqual(expected, call_args_list)
+
+    def test_dispatch_starts_work_when_worker_frees_up(self):
+        dispatcher = BufferedDispatcher(dispatch_pool_size=1)
+        release = eventlet.event.Event()
+        started = []
+
+        def blocking_handler(i):
+            started.append(i)
+            if i == 0:
+                release.wait()
+
+        dispatcher.dispatch(blocking_handler, 0)
+        dispatcher.dispatch(blocking_handler, 1)
+        eventlet.sleep(0)
+        self.assertEqual(started, [0])
+
+        release.send(True)
+        while len(started) < 2:
+            eventlet.sleep(0.01)
+        self.assertEqual(started, [0, 1])
+        dispatcher.shutdown()
+
+    def test_dispatch_blocks_when_buffer_is_full(self):
+        dispatcher = BufferedDispatcher(dispatch_pool_size=1, buffer_size=1)
+        release = eventlet.event.Event()
+        mock_handler = mock.MagicMock(side_effect=lambda i: release.wait())
+
+        # First item occupies the only worker, second one waits in the buffer.
+        dispatcher.dispatch(mock_handler, 0)
+        eventlet.sleep(0)
+        dispatcher.dispatch(mock_handler, 1)
+
+        producer = eventlet.spawn(dispatcher.dispatch, mock_handler, 2)
+        eventlet.sleep(0.01)
+        self.assertFalse(producer.dead)
+        self.assertEqual(dispatcher.queue_depth, 1)
+
+        release.send(True)
+        producer.wait()
+        while mock_handler.call_count < 3:
+            eventlet.sleep(0.01)
+
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['dispatched'], 3)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertTrue(stats['max_wait_time'] > 0)
+        dispatcher.shutdown()
@@ -0,0 +1,112 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+from st2common.models.db import indexadvisor
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.liveaction import LiveActionDB
+
+COLLECTION = ActionExecutionDB._get_collection_name()
+MODELS = {
+    COLLECTION: ActionExecutionDB,
+    LiveActionDB._get_collection_name(): LiveActionDB
+}
+
+
+def _get_shape(filter, sort=None, slow_count=1, total_time=1.0, collection=COLLECTION):
+    return {
+        'model': 'ActionExecutionDB',
+        'collection': collection,
+        'operation': 'find',
+        'filter': filter,
+        'sort': sort or [],
+        'projection': [],
+        'count': 1,
+        'total_time': total_time,
+        'max_time': total_time,
+        'documents': 1,
+        'slow_count': slow_count,
+        'explain': None
+    }
+
+
+class IndexAdvisorTestCase(unittest2.TestCase):
+    def test_get_suggested_index(self):
+        shape = _get_shape(filter=[['end_timestamp', 'range'], ['status', 'eq'],
+                                   ['action.ref', 'eq'], ['parent', '$exists']],
+                           sort=[['start_timestamp', -1]])
+        self.assertEqual(indexadvisor.get_suggested_index(shape),
+                         [['action.ref', 1], ['status', 1], ['start_timestamp', -1],
+                          ['end_timestamp', 1]])
+
+        # Range on the sort field and queries by id
+        shape = _get_shape(filter=[['start_timestamp', 'range']], sort=[['start_timestamp', 1]])
+        self.assertEqual(indexadvisor.get_suggested_index(shape), [['start_timestamp', 1]])
+        self.assertEqual(indexadvisor.get_suggested_index(_get_shape(filter=[['_id', 'eq']])),
+                         None)
+        self.assertEqual(indexadvisor.get_suggested_index(_get_shape(filter=[])), None)
+
+    def test_is_index_covered(self):
+        shape = _get_shape(filter=[['status', 'eq'], ['action.ref', 'eq']],
+                           sort=[['start_timestamp', -1]])
+
+        self.assertTrue(indexadvisor.is_index_covered(
+            shape, [[['status', 1], ['action.ref', -1], ['start_timestamp', -1], ['_id', 1]]]))
+        self.assertTrue(indexadvisor.is_index_covered(
+            shape, [[['action.ref', 1], ['status', 1], ['start_timestamp', 1]]]))
+        self.assertFalse(indexadvisor.is_index_covered(
+            shape, [[['start_timestamp', -1], ['action.ref', 1], ['status', 1]]]))
+        self.assertFalse(indexadvisor.is_index_covered(shape, [[['status', 1]]]))
+
+    def test_suggest_indexes(self):
+        shapes = [
+            # Covered by the existing (start_timestamp, action.ref, ...) index
+            _get_shape(filter=[], sort=[['start_timestamp', -1]]),
+            # Missing index
+            _get_shape(filter=[['status', 'eq']], sort=[['start_timestamp', -1]],
+                       total_time=2.0),
+            # Supported by the index suggested for the previous shape
+            _get_shape(filter=[['status', 'eq']]),
+            # No slow queries
+            _get_shape(filter=[['context.user', 'eq']], slow_count=0),
+            # Unknown collection
+            _get_shape(filter=[['name', 'eq']], collection='unknown')
+        ]
+
+        suggestions = indexadvisor.suggest_indexes(shapes=shapes, models=MODELS)
+
+        self.assertEqual(len(suggestions), 1)
+        self.assertEqual(suggestions[0]['model'], 'ActionExecutionDB')
+        self.assertEqual(suggestions[0]['index'], [['status', 1], ['start_timestamp', -1]])
+        self.assertEqual(suggestions[0]['total_time'], 2.0)
+
+        suggestions = indexadvisor.suggest_indexes(shapes=shapes, models=MODELS, slow_only=False)
+        self.assertEqual([suggestion['index'] for suggestion in suggestions],
+                         [[['status', 1], ['start_timestamp', -1]], [['context.user', 1]]])
+
+    def test_merge_query_profiles(self):
+        profiles = [
+            {'shapes': [_get_shape(filter=[['status', 'eq']], total_time=1.0)]},
+            {'shapes': [_get_shape(filter=[['status', 'eq']], total_time=2.0),
+                        _get_shape(filter=[['parent', 'eq']], total_time=0.5)]}
+        ]
+
+        shapes = indexadvisor.merge_query_profiles(profiles)
+
+        self.assertEqual(len(shapes), 2)
+        self.assertEqual(shapes[0]['count'], 2)
+        self.assertEqual(shapes[0]['total_time'], 3.0)
+        self.assertEqual(shapes[0]['max_time'], 2.0)
@@ -0,0 +1,194 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+import mock
+import unittest2
+from oslo_config import cfg
+
+import st2tests.config as tests_config
+from st2common.models.db.keyvalue import KeyValuePairDB
+from st2common.persistence.keyvalue import KeyValuePair
+from st2common.services import cachewatcher
+from st2common.services import keyvalues
+from st2common.services.keyvalues import KeyValueCache
+
+KVP_DBS = [
+    KeyValuePairDB(name='a', value='v1'),
+    KeyValuePairDB(name='a.b', value='v2'),
+    KeyValuePairDB(name='a.b.c', value='v3'),
+    KeyValuePairDB(name='ab', value='v4'),
+    KeyValuePairDB(name='b.c', value=None)
+]
+
+
+def _query(name__startswith, order_by, limit):
+    kvp_dbs = sorted([kvp_db for kvp_db in KVP_DBS if kvp_db.name.startswith(name__startswith)],
+                     key=lambda kvp_db: kvp_db.name)
+    return kvp_dbs[:limit]
+
+
+def _get_by_name(name):
+    for kvp_db in KVP_DBS:
+        if kvp_db.name == name:
+            return kvp_db
+
+    raise ValueError('Key %s not found.' % (name))
+
+
+class KeyValueCacheTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(KeyValueCacheTestCase, self).setUp()
+
+        for name, side_effect in [('query', _query), ('get_by_name', _get_by_name)]:
+            patcher = mock.patch.object(KeyValuePair, name, mock.MagicMock(side_effect=side_effect))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_prefetch(self):
+        cache = KeyValueCache()
+
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(cache.get_value('a.b'), (True, 'v2'))
+        self.assertEqual(cache.get_value('a.b.c'), (True, 'v3'))
+        self.assertEqual(cache.get_value('ab'), (True, 'v4'))
+        # Missing keys under a prefetched prefix don't need a query
+        self.assertEqual(cache.get_value('a.x'), (False, None))
+        self.assertEqual(KeyValuePair.query.call_count, 1)
+
+        # Partial lookup of a dotted key
+        self.assertEqual(cache.get_value('b'), (False, None))
+        self.assertEqual(cache.get_value('b.c'), (True, None))
+        self.assertEqual(cache.get_value('b'), (False, None))
+        self.assertEqual(KeyValuePair.query.call_count, 2)
+        self.assertEqual(KeyValuePair.get_by_name.call_count, 0)
+
+    def test_prefetch_limit(self):
+        cache = KeyValueCache(prefetch_limit=1)
+
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(cache.get_value('a.b'), (True, 'v2'))
+        self.assertEqual(KeyValuePair.query.call_count, 2)
+
+        # Prefix wasn't retrieved completely so missing keys are looked up
+        self.assertEqual(cache.get_value('a.b.x'), (False, None))
+        self.assertEqual(KeyValuePair.query.call_count, 3)
+
+    def test_prefetch_larger_than_cache(self):
+        cache = KeyValueCache(size=2)
+
+        # Prefetched values of "a" don't fit into the cache
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(cache.get_value('a.b'), (True, 'v2'))
+        self.assertEqual(cache.get_value('a.b.c'), (True, 'v3'))
+        self.assertEqual(cache.get_value('a.x'), (False, None))
+
+    def test_prefix_outlives_values(self):
+        cache = KeyValueCache()
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+
+        cache._values.clear()
+        self.assertEqual(cache.get_value('a.b'), (True, 'v2'))
+        self.assertEqual(cache.get_value('a.x'), (False, None))
+
+    def test_prefetch_disabled(self):
+        cache = KeyValueCache(prefetch_limit=0)
+
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(cache.get_value('x'), (False, None))
+        self.assertEqual(cache.get_value('x'), (False, None))
+        self.assertEqual(KeyValuePair.query.call_count, 0)
+        self.assertEqual(KeyValuePair.get_by_name.call_count, 2)
+
+    def test_cache_missing_disabled(self):
+        cache = KeyValueCache(cache_missing=False, prefetch_limit=0)
+
+        self.assertEqual(cache.get_value('x'), (False, None))
+        self.assertEqual(cache.get_value('x'), (False, None))
+        self.assertEqual(KeyValuePair.get_by_name.call_count, 2)
+
+    def test_invalidate(self):
+        cache = KeyValueCache()
+        self.assertEqual(cache.get_value('a.x'), (False, None))
+
+        # Created key
+        KVP_DBS.append(KeyValuePairDB(name='a.x', value='v5'))
+        try:
+            cache.invalidate(KVP_DBS[-1])
+            self.assertEqual(cache.get_value('a.x'), (True, 'v5'))
+        finally:
+            deleted_kvp_db = KVP_DBS.pop()
+
+        # Deleted key
+        cache.invalidate(deleted_kvp_db)
+        self.assertEqual(cache.get_value('a.x'), (False, None))
+        self.assertEqual(KeyValuePair.query.call_count, 3)
+
+        cache.invalidate()
+        self.assertEqual(cache.get_value('a.b'), (True, 'v2'))
+        self.assertEqual(KeyValuePair.query.call_count, 4)
+
+    def test_expired_keys(self):
+        cache = KeyValueCache()
+
+        expire_timestamp = datetime.datetime.utcnow() - datetime.timedelta(seconds=10)
+        KVP_DBS.append(KeyValuePairDB(name='c', value='v6', expire_timestamp=expire_timestamp))
+        try:
+            self.assertEqual(cache.get_value('c'), (True, 'v6'))
+            self.assertEqual(cache.get_value('c'), (True, 'v6'))
+            self.assertEqual(KeyValuePair.query.call_count, 2)
+        finally:
+            KVP_DBS.pop()
+
+
+class KeyValueCacheInvalidationTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(KeyValueCacheInvalidationTestCase, self).setUp()
+        cfg.CONF.set_override(name='enabled', override=True, group='datastore_cache')
+        self.addCleanup(cfg.CONF.set_override, name='enabled', override=False,
+                        group='datastore_cache')
+
+        for target, name, value in [(KeyValuePair, 'query', mock.MagicMock(side_effect=_query)),
+                                    (cachewatcher.CacheWatcher, 'start', mock.MagicMock()),
+                                    (keyvalues, '_cache', None),
+                                    (cachewatcher, '_watcher', None)]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_cache_is_invalidated_by_cud_events_of_other_processes(self):
+        cache = keyvalues.get_cache()
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(KeyValuePair.query.call_count, 1)
+
+        watcher = cachewatcher.get_watcher()
+        self.assertTrue(watcher.start.called)
+        self.assertIn('st2.key_value_pair', [b.exchange.name for b in watcher._queue.bindings])
+
+        message = mock.MagicMock()
+        message.delivery_info = {'exchange': 'st2.key_value_pair', 'routing_key': 'update'}
+        watcher.process_task(KVP_DBS[0], message)
+
+        self.assertEqual(cache.get_value('a'), (True, 'v1'))
+        self.assertEqual(KeyValuePair.query.call_count, 2)
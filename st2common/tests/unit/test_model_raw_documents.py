@@ -0,0 +1,100 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import unittest2
+
+import st2tests.config as tests_config
+from st2common.constants.secrets import MASKED_ATTRIBUTE_VALUE
+from st2common.models.api.action import ActionAPI
+from st2common.models.api.execution import ActionExecutionAPI
+from st2common.models.api.notification import NotificationsHelper
+from st2common.models.api.trigger import TriggerInstanceAPI
+from st2tests.fixturesloader import FixturesLoader
+
+FIXTURES_PACK = 'generic'
+FIXTURES = {
+    'actions': ['local.yaml'],
+    'executions': ['execution1.yaml'],
+    'triggerinstances': ['trigger_instance_1.yaml']
+}
+
+
+class RawDocumentsTestCase(unittest2.TestCase):
+    """
+    Verify that the API objects created from the raw documents are the same as the ones created
+    from the model instances.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(RawDocumentsTestCase, self).setUp()
+        self.models = FixturesLoader().load_models(fixtures_pack=FIXTURES_PACK,
+                                                   fixtures_dict=FIXTURES)
+
+    def _assert_same_api_object(self, api_cls, model, **kwargs):
+        if not model.id:
+            model.id = bson.ObjectId()
+
+        raw_doc = model.to_mongo()
+        from_model = api_cls.from_model(model, **kwargs)
+        from_raw_document = api_cls.from_raw_document(raw_doc, **kwargs)
+
+        self.assertDictEqual(vars(from_raw_document), vars(from_model))
+        return from_raw_document
+
+    def test_action(self):
+        action_db = self.models['actions']['local.yaml']
+        action_db.notify = NotificationsHelper.to_model({
+            'on-complete': {'message': 'done', 'data': {'a.b': 1}}
+        })
+
+        action_api = self._assert_same_api_object(ActionAPI, action_db)
+        self.assertEqual(action_api.runner_type, 'local-shell-cmd')
+        self.assertEqual(action_api.notify['on-complete']['data'], {'a.b': 1})
+
+    def test_execution(self):
+        execution_db = self.models['executions']['execution1.yaml']
+        execution_db.result = {'key.with.dots': {'$key': 'value'}}
+        execution_db.action['parameters']['password'] = {'type': 'string', 'secret': True}
+        execution_db.parameters = {'password': 'secret', 'cmd': 'ls'}
+
+        execution_api = self._assert_same_api_object(ActionExecutionAPI, execution_db,
+                                                     mask_secrets=True)
+        self.assertEqual(execution_api.result, {'key.with.dots': {'$key': 'value'}})
+        self.assertEqual(execution_api.parameters['password'], MASKED_ATTRIBUTE_VALUE)
+        self.assertEqual(execution_api.start_timestamp, '2014-09-01T00:00:01.000000Z')
+
+    def test_execution_missing_fields(self):
+        execution_db = self.models['executions']['execution1.yaml']
+        execution_db.end_timestamp = None
+        execution_db.context = None
+
+        self._assert_same_api_object(ActionExecutionAPI, execution_db)
+
+    def test_trigger_instance(self):
+        trigger_instance_db = self.models['triggerinstances']['trigger_instance_1.yaml']
+        self._assert_same_api_object(TriggerInstanceAPI, trigger_instance_db)
+
+    def test_partial_raw_document(self):
+        execution_db = self.models['executions']['execution1.yaml']
+        raw_doc = {'_id': bson.ObjectId(), 'status': execution_db.status}
+
+        execution_api = ActionExecutionAPI.from_partial_raw_document(
+            raw_doc, include_fields=['status'])
+        self.assertItemsEqual(vars(execution_api).keys(), ['id', 'status'])
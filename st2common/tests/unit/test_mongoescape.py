@@ -89,3 +89,35 @@ class TestMongoEscape(unittest.TestCase):
 
         unescaped = mongoescape.unescape_chars(escaped)
         self.assertDictEqual(field, unescaped)
+
+    def test_unchanged_value_is_not_copied(self):
+        field = {'k1': {'k2': [{'k3': 'v3'}, ['a']]}, 'k4': 'v4'}
+
+        self.assertIs(mongoescape.escape_chars(field), field)
+        self.assertIs(mongoescape.unescape_chars(field), field)
+
+    def test_only_changed_containers_are_copied(self):
+        unchanged = {'l1': [{'l2': 'v2'}]}
+        field = {'k1': {'k2.k3': 'v1'}, 'k4': unchanged, 'k5': [{'k6$': 'v6'}, {'k7': 'v7'}]}
+
+        escaped = mongoescape.escape_chars(field)
+        self.assertIs(escaped['k4'], unchanged)
+        self.assertIs(escaped['k5'][1], field['k5'][1])
+        self.assertEqual(escaped['k5'][0], {u'k6\uff04': 'v6'})
+
+        # Original value is not modified
+        self.assertEqual(field['k1'], {'k2.k3': 'v1'})
+        self.assertEqual(field['k5'][0], {'k6$': 'v6'})
+
+        self.assertEqual(mongoescape.unescape_chars(escaped), field)
+
+    def test_mixed_unescaping(self):
+        escaped = {u'k1\u2024k2\uff0ek3\uff04': {u'k4\u2024': 'v4'}}
+        unescaped = mongoescape.unescape_chars(escaped)
+        self.assertEqual(unescaped, {'k1.k2.k3$': {'k4.': 'v4'}})
+
+    def test_non_dict_values(self):
+        value = [{'k1.k2': 'v1'}]
+        self.assertIs(mongoescape.escape_chars(value), value)
+        self.assertEqual(mongoescape.escape_chars('k1.k2'), 'k1.k2')
+        self.assertEqual(mongoescape.unescape_chars(None), None)
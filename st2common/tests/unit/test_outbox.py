@@ -0,0 +1,152 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import mock
+import unittest2
+from oslo_config import cfg
+
+import st2tests.config as tests_config
+from st2common.models.db.outbox import OutboxEventDB
+from st2common.persistence.execution import ActionExecution
+from st2common.persistence.liveaction import LiveAction
+from st2common.persistence.outbox import OutboxEvent
+from st2common.services import outbox as outbox_service
+from st2common.transport import serializers
+from st2common.transport.execution import ActionExecutionPublisher
+from st2common.transport.liveaction import LiveActionPublisher
+from st2tests.fixturesloader import FixturesLoader
+
+FIXTURES_PACK = 'generic'
+TEST_MODELS = {
+    'liveactions': ['liveaction1.yaml']
+}
+
+
+def _get_event(resource_cls, operation, model_object):
+    return OutboxEventDB(resource=outbox_service._get_resource_path(resource_cls),
+                         operation=operation, payload=serializers.encode(model_object))
+
+
+MOCK_PUBLISH_CREATE = mock.MagicMock()
+MOCK_PUBLISH_STATE = mock.MagicMock()
+
+
+@mock.patch.object(LiveActionPublisher, 'publish_create', MOCK_PUBLISH_CREATE)
+@mock.patch.object(LiveActionPublisher, 'publish_state', MOCK_PUBLISH_STATE)
+class OutboxTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+        models = FixturesLoader().load_models(fixtures_pack=FIXTURES_PACK,
+                                              fixtures_dict=TEST_MODELS)
+        cls.liveaction = models['liveactions']['liveaction1.yaml']
+
+    def setUp(self):
+        super(OutboxTest, self).setUp()
+        MOCK_PUBLISH_CREATE.reset_mock()
+        MOCK_PUBLISH_STATE.reset_mock()
+
+    def tearDown(self):
+        cfg.CONF.clear_override(name='outbox', group='messaging')
+        super(OutboxTest, self).tearDown()
+
+    @mock.patch.object(outbox_service, 'add_event', mock.MagicMock())
+    def test_publish_without_outbox(self):
+        LiveAction.publish_create(self.liveaction)
+        LiveAction.publish_status(self.liveaction)
+
+        LiveActionPublisher.publish_create.assert_called_once_with(self.liveaction)
+        LiveActionPublisher.publish_state.assert_called_once_with(self.liveaction,
+                                                                  self.liveaction.status)
+        self.assertFalse(outbox_service.add_event.called)
+
+    @mock.patch.object(outbox_service, 'add_event', mock.MagicMock())
+    def test_publish_with_outbox(self):
+        cfg.CONF.set_override(name='outbox', override=True, group='messaging')
+
+        LiveAction.publish_create(self.liveaction)
+        LiveAction.publish_status(self.liveaction)
+
+        self.assertFalse(LiveActionPublisher.publish_create.called)
+        self.assertFalse(LiveActionPublisher.publish_state.called)
+        outbox_service.add_event.assert_has_calls([
+            mock.call(resource_cls=LiveAction, operation='create', model_object=self.liveaction),
+            mock.call(resource_cls=LiveAction, operation='status', model_object=self.liveaction)
+        ])
+
+    @mock.patch.object(OutboxEvent, 'add_or_update', mock.MagicMock(side_effect=lambda e, **_: e))
+    @mock.patch.object(outbox_service, 'get_flusher', mock.MagicMock())
+    @mock.patch.object(serializers, 'encode', mock.MagicMock(wraps=serializers.encode))
+    def test_add_event_uses_configured_compression_threshold(self):
+        event = outbox_service.add_event(resource_cls=LiveAction, operation='create',
+                                         model_object=self.liveaction)
+
+        serializers.encode.assert_called_once_with(self.liveaction)
+        self.assertEqual(serializers.decode(event.payload).to_mongo(),
+                         self.liveaction.to_mongo())
+
+    @mock.patch.object(OutboxEvent, 'claim', mock.MagicMock(return_value=True))
+    @mock.patch.object(OutboxEvent, 'delete_delivered', mock.MagicMock())
+    def test_flush_publishes_events(self):
+        events = [_get_event(LiveAction, 'create', self.liveaction),
+                  _get_event(LiveAction, 'status', self.liveaction)]
+        for index, event in enumerate(events):
+            event.id = 'event-%s' % (index)
+
+        flusher = outbox_service.OutboxFlusher(batch_size=10, poll_interval=1, lease_time=10)
+        with mock.patch.object(OutboxEvent, 'query', mock.MagicMock(return_value=events)):
+            self.assertEqual(flusher.flush(), 2)
+
+        published = LiveActionPublisher.publish_create.call_args[0][0]
+        self.assertEqual(published.id, self.liveaction.id)
+        self.assertEqual(published.to_mongo(), self.liveaction.to_mongo())
+        LiveActionPublisher.publish_state.assert_called_once_with(mock.ANY,
+                                                                  self.liveaction.status)
+        self.assertEqual(OutboxEvent.delete_delivered.call_args[0][0], ['event-0', 'event-1'])
+
+    @mock.patch.object(OutboxEvent, 'delete_delivered', mock.MagicMock())
+    def test_flush_skips_events_claimed_by_others(self):
+        events = [_get_event(LiveAction, 'create', self.liveaction),
+                  _get_event(LiveAction, 'status', self.liveaction)]
+        for index, event in enumerate(events):
+            event.id = 'event-%s' % (index)
+
+        flusher = outbox_service.OutboxFlusher(batch_size=10, poll_interval=1, lease_time=10)
+        with mock.patch.object(OutboxEvent, 'query', mock.MagicMock(return_value=events)), \
+                mock.patch.object(OutboxEvent, 'claim', mock.MagicMock(side_effect=[False, True])):
+            self.assertEqual(flusher.flush(), 1)
+
+        self.assertFalse(LiveActionPublisher.publish_create.called)
+        self.assertEqual(OutboxEvent.delete_delivered.call_args[0][0], ['event-1'])
+
+    @mock.patch.object(OutboxEvent, 'claim', mock.MagicMock(return_value=True))
+    @mock.patch.object(OutboxEvent, 'delete_delivered', mock.MagicMock())
+    @mock.patch.object(ActionExecutionPublisher, 'publish_create',
+                       mock.MagicMock(side_effect=IOError('broker is down')))
+    def test_flush_stops_on_publish_failure(self):
+        events = [_get_event(LiveAction, 'create', self.liveaction),
+                  _get_event(ActionExecution, 'create', self.liveaction),
+                  _get_event(LiveAction, 'status', self.liveaction)]
+        for index, event in enumerate(events):
+            event.id = 'event-%s' % (index)
+
+        flusher = outbox_service.OutboxFlusher(batch_size=10, poll_interval=1, lease_time=10)
+        with mock.patch.object(OutboxEvent, 'query', mock.MagicMock(return_value=events)):
+            self.assertEqual(flusher.flush(), 1)
+
+        self.assertFalse(LiveActionPublisher.publish_state.called)
+        self.assertEqual(OutboxEvent.delete_delivered.call_args[0][0], ['event-0'])
@@ -17,8 +17,10 @@ import uuid
 import datetime
 
 import bson
+from mongoengine import ValidationError
 
 from st2tests import DbTestCase
+from st2common.exceptions.db import StackStormDBObjectConflictError
 from st2common.util import date as date_utils
 from tests.unit.base import FakeModel, FakeModelDB
 
@@ -161,6 +163,82 @@ class TestPersistence(DbTestCase):
                     self.assertEqual(objs[j].context['user'], user)
                     self.assertEqual(objs[j].index, (i * page_size) + j)
 
+    def test_pagination_cursor(self):
+        count = 60
+        page_size = 25
+        base = date_utils.add_utc_tz(datetime.datetime(2014, 12, 25, 0, 0, 0))
+        for i in range(count):
+            # Every two objects share the same timestamp
+            timestamp = base + datetime.timedelta(seconds=i / 2)
+            category = 'type1' if i % 2 else 'type2'
+            self.access.add_or_update(FakeModelDB(name=uuid.uuid4().hex, timestamp=timestamp,
+                                                  category=category))
+
+        order_by = ['-timestamp', 'id']
+        expected = [obj.id for obj in self.access.query(order_by=order_by)]
+
+        retrieved = []
+        cursor = None
+        while True:
+            queryset = self.access.query(order_by=order_by, after=cursor)
+            objs = list(queryset[0:page_size])
+            retrieved.extend([obj.id for obj in objs])
+
+            if len(objs) < page_size:
+                break
+
+            cursor = self.access.get_pagination_cursor(queryset=queryset, instance=objs[-1])
+
+        self.assertListEqual(retrieved, expected)
+
+        # Cursor can only be used with the same sort order
+        self.assertRaises(ValueError, self.access.query, order_by=['timestamp', 'id'],
+                          after=cursor)
+        self.assertRaises(ValueError, self.access.query, order_by=order_by, after='invalid')
+
+    def test_pagination_cursor_null_sort_values(self):
+        for i in range(9):
+            # Every third object has no category
+            category = None if i % 3 == 0 else 'type%s' % (i % 3)
+            self.access.add_or_update(FakeModelDB(name=uuid.uuid4().hex, category=category))
+
+        for order_by in [['category', 'id'], ['-category', 'id'], ['-category', '-id']]:
+            expected = [obj.id for obj in self.access.query(order_by=order_by)]
+
+            retrieved = []
+            cursor = None
+            while True:
+                queryset = self.access.query(order_by=order_by, after=cursor)
+                objs = list(queryset[0:2])
+                retrieved.extend([obj.id for obj in objs])
+
+                if len(objs) < 2:
+                    break
+
+                cursor = self.access.get_pagination_cursor(queryset=queryset,
+                                                           instance=objs[-1])
+
+            self.assertListEqual(retrieved, expected)
+
+    def test_include_fields(self):
+        base = date_utils.add_utc_tz(datetime.datetime(2014, 12, 25, 0, 0, 0))
+        obj = FakeModelDB(name=uuid.uuid4().hex, timestamp=base, category='type1',
+                          context={'user': 'system', 'key': 'value'})
+        obj = self.access.add_or_update(obj)
+
+        retrieved = self.access.query(include_fields=['category', 'context.user'],
+                                      order_by=['-timestamp'])[0]
+        self.assertEqual(retrieved.id, obj.id)
+        self.assertEqual(retrieved.category, 'type1')
+        self.assertDictEqual(retrieved.context, {'user': 'system'})
+        self.assertIsNone(retrieved.name)
+        # Sort keys are always retrieved
+        self.assertEqual(retrieved.timestamp, base)
+
+        retrieved = self.access.get(id=obj.id, include_fields=['name'])
+        self.assertEqual(retrieved.name, obj.name)
+        self.assertIsNone(retrieved.category)
+
     def test_sort_multiple(self):
         count = 60
         base = date_utils.add_utc_tz(datetime.datetime(2014, 12, 25, 0, 0, 0))
@@ -196,3 +274,64 @@ class TestPersistence(DbTestCase):
         self.assertIsNotNone(obj3)
         self.assertEqual(obj3.id, obj2.id)
         self.assertDictEqual(obj3.context, context)
+
+    def test_partial_update(self):
+        obj1 = FakeModelDB(name=uuid.uuid4().hex, context={'user': 'system'}, index=1,
+                           category='type1')
+        obj1 = self.access.add_or_update(obj1)
+
+        obj2 = self.access.update(obj1.id, index=2, context={'a.b.c': 'abc'}, category=None)
+        self.assertEqual(obj2.id, obj1.id)
+        self.assertEqual(obj2.name, obj1.name)
+        self.assertEqual(obj2.index, 2)
+        self.assertIsNone(obj2.category)
+        self.assertDictEqual(obj2.context, {'a.b.c': 'abc'})
+
+        obj3 = self.access.get_by_id(str(obj1.id))
+        self.assertEqual(obj3.index, 2)
+        self.assertDictEqual(obj3.context, {'a.b.c': 'abc'})
+
+        self.assertIsNone(self.access.update(bson.ObjectId(), index=3))
+
+    def test_partial_update_compare_and_set(self):
+        obj1 = FakeModelDB(name=uuid.uuid4().hex, index=1)
+        obj1 = self.access.add_or_update(obj1)
+
+        obj2 = self.access.update_by_query({'id': obj1.id, 'index': 1}, index=2)
+        self.assertEqual(obj2.index, 2)
+
+        # Index has already changed.
+        obj3 = self.access.update_by_query({'id': obj1.id, 'index': 1}, index=3)
+        self.assertIsNone(obj3)
+        self.assertEqual(self.access.get_by_id(str(obj1.id)).index, 2)
+
+    def test_add_or_update_many(self):
+        obj1 = self.access.add_or_update(FakeModelDB(name=uuid.uuid4().hex, index=1))
+        obj1.index = 2
+        obj2 = FakeModelDB(name=uuid.uuid4().hex, context={'a.b': 1})
+        # Name conflicts with obj1
+        obj3 = FakeModelDB(name=obj1.name)
+        # Invalid value
+        obj4 = FakeModelDB(name=uuid.uuid4().hex, index=-1)
+
+        saved, errors = self.access.add_or_update_many([obj1, obj2, obj3, obj4])
+        self.assertEqual(saved, [obj1, obj2])
+        self.assertIsNotNone(obj2.id)
+        self.assertDictEqual(obj2.context, {'a.b': 1})
+
+        self.assertEqual([model_object for model_object, _ in errors], [obj4, obj3])
+        self.assertIsInstance(errors[0][1], ValidationError)
+        self.assertIsInstance(errors[1][1], StackStormDBObjectConflictError)
+        self.assertIsNone(obj3.id)
+
+        self.assertEqual(self.access.get_by_id(str(obj1.id)).index, 2)
+        self.assertDictEqual(self.access.get_by_id(str(obj2.id)).context, {'a.b': 1})
+        self.assertEqual(self.access.count(), 2)
+
+    def test_delete_many(self):
+        obj1 = self.access.add_or_update(FakeModelDB(name=uuid.uuid4().hex))
+        obj2 = self.access.add_or_update(FakeModelDB(name=uuid.uuid4().hex))
+        obj3 = self.access.add_or_update(FakeModelDB(name=uuid.uuid4().hex))
+
+        self.assertEqual(self.access.delete_many([obj1, obj2]), 2)
+        self.assertEqual([obj.id for obj in self.access.get_all()], [obj3.id])
@@ -0,0 +1,188 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import mock
+import unittest2
+from eventlet import greenthread, hubs
+from oslo_config import cfg
+
+import st2tests.config as tests_config
+from st2common.persistence.base import Access
+from st2common.services import cachewatcher
+from st2common.transport import action as action_transport
+from st2common.transport import reactor
+
+
+class FakeModel(object):
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+class FakeImpl(object):
+    def __init__(self):
+        self.models = {}
+        self.lookups = 0
+
+    def get_by_name(self, value):
+        self.lookups += 1
+
+        for model in self.models.values():
+            if model.name == value:
+                return model
+
+        raise ValueError('Unable to find the instance.')
+
+    def get_by_id(self, value):
+        self.lookups += 1
+
+        if value not in self.models:
+            raise ValueError('Unable to find the instance.')
+
+        return self.models[value]
+
+    def add_or_update(self, model):
+        self.models[model.id] = model
+        return model
+
+
+class FakeResource(Access):
+    impl = FakeImpl()
+    cache_lookups = True
+
+    @classmethod
+    def _get_impl(cls):
+        return cls.impl
+
+
+class NotCachedFakeResource(FakeResource):
+    impl = FakeImpl()
+    cache_lookups = False
+
+
+class AccessCacheTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(AccessCacheTestCase, self).setUp()
+        cfg.CONF.set_override(name='enabled', override=True, group='metadata_cache')
+
+        for resource_cls in [FakeResource, NotCachedFakeResource]:
+            resource_cls.impl.models = {'1': FakeModel(id='1', name='a')}
+            resource_cls.impl.lookups = 0
+            resource_cls._cache = None
+
+    def tearDown(self):
+        cfg.CONF.clear_override(name='enabled', group='metadata_cache')
+        super(AccessCacheTestCase, self).tearDown()
+
+    def test_lookups_are_cached(self):
+        for _ in range(3):
+            self.assertEqual(FakeResource.get_by_name('a').id, '1')
+            self.assertEqual(FakeResource.get_by_id('1').name, 'a')
+
+        self.assertEqual(FakeResource.impl.lookups, 2)
+
+        stats = FakeResource.get_cache_stats()
+        self.assertEqual(stats['hits'], 4)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_cache_returns_copies(self):
+        FakeResource.get_by_name('a').name = 'changed'
+        self.assertEqual(FakeResource.get_by_name('a').name, 'a')
+
+    def test_not_found_is_not_cached(self):
+        self.assertRaises(ValueError, FakeResource.get_by_name, 'b')
+        FakeResource.impl.models['2'] = FakeModel(id='2', name='b')
+        self.assertEqual(FakeResource.get_by_name('b').id, '2')
+
+    def test_add_or_update_invalidates_cache(self):
+        FakeResource.get_by_name('a')
+        FakeResource.add_or_update(FakeModel(id='1', name='a2'), publish=False,
+                                   dispatch_trigger=False)
+
+        self.assertEqual(FakeResource.get_by_id('1').name, 'a2')
+        self.assertEqual(FakeResource.impl.lookups, 2)
+
+    def test_caching_is_opt_in(self):
+        for _ in range(3):
+            NotCachedFakeResource.get_by_name('a')
+
+        self.assertEqual(NotCachedFakeResource.impl.lookups, 3)
+        self.assertEqual(NotCachedFakeResource.get_cache_stats(), None)
+
+    def test_caching_can_be_disabled(self):
+        cfg.CONF.set_override(name='enabled', override=False, group='metadata_cache')
+
+        for _ in range(3):
+            FakeResource.get_by_name('a')
+
+        self.assertEqual(FakeResource.impl.lookups, 3)
+
+
+class CacheWatcherTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def _get_message(self, exchange):
+        message = mock.MagicMock()
+        message.delivery_info = {'exchange': exchange.name, 'routing_key': 'update'}
+        return message
+
+    def test_callbacks_are_called_for_the_exchange(self):
+        watcher = cachewatcher.CacheWatcher()
+        action_callback = mock.MagicMock()
+        trigger_callback = mock.MagicMock()
+        watcher.watch(exchange=action_transport.ACTION_CUD_XCHG, callback=action_callback)
+        watcher.watch(exchange=reactor.TRIGGER_CUD_XCHG, callback=trigger_callback)
+
+        message = self._get_message(action_transport.ACTION_CUD_XCHG)
+        watcher.process_task('body', message)
+
+        action_callback.assert_called_once_with('body')
+        self.assertFalse(trigger_callback.called)
+        self.assertTrue(message.ack.called)
+
+    def test_queue_is_bound_to_all_exchanges(self):
+        watcher = cachewatcher.CacheWatcher()
+        exchanges = sorted([b.exchange.name for b in watcher._queue.bindings])
+        self.assertEqual(exchanges, ['st2.action', 'st2.key_value_pair', 'st2.runnertype',
+                                     'st2.trigger'])
+
+    @mock.patch.object(cachewatcher.eventlet, 'spawn')
+    @mock.patch.object(cachewatcher, 'Connection', mock.MagicMock())
+    def test_start_spawns_single_thread(self, mock_spawn):
+        # Spawned thread which hasn't started yet is falsy
+        mock_spawn.return_value = greenthread.GreenThread(hubs.get_hub().greenlet)
+        self.assertFalse(mock_spawn.return_value)
+
+        watcher = cachewatcher.CacheWatcher()
+        watcher.start()
+        watcher.start()
+        self.assertEqual(mock_spawn.call_count, 1)
+
+    @mock.patch.object(cachewatcher, 'Connection',
+                       mock.MagicMock(side_effect=IOError('invalid messaging url')))
+    def test_start_failure(self):
+        watcher = cachewatcher.CacheWatcher()
+        watcher.start()
+        self.assertEqual(watcher.connection, None)
+        watcher.stop()
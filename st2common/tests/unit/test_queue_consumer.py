@@ -13,9 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
 import mock
+import unittest2
 from kombu import Connection, Exchange, Queue
+from oslo_config import cfg
 
+import st2tests.config as tests_config
 from st2common.transport import consumers
 from st2common.transport import utils as transport_utils
 from st2tests.base import DbTestCase
@@ -53,3 +57,125 @@ class QueueConsumerTest(DbTestCase):
         handler = get_handler()
         handler._queue_consumer._process_message(payload)
         self.assertFalse(FakeMessageHandler.process.called)
+
+
+class AckAfterProcessQueueConsumerTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(AckAfterProcessQueueConsumerTest, self).setUp()
+        cfg.CONF.set_override(name='ack_after_process', override=True, group='messaging')
+        self.handler = get_handler()
+        self.consumer = self.handler._queue_consumer
+
+    def tearDown(self):
+        self.consumer.shutdown()
+        cfg.CONF.clear_override(name='ack_after_process', group='messaging')
+        super(AckAfterProcessQueueConsumerTest, self).tearDown()
+
+    def _get_message(self, redelivered=False):
+        message = mock.MagicMock()
+        message.delivery_info = {'redelivered': redelivered}
+        return message
+
+    def test_prefetch_window_sized_to_dispatcher_pool(self):
+        consumer = self.consumer.get_consumers(mock.MagicMock(), mock.MagicMock())[0]
+        consumer.qos.assert_called_once_with(prefetch_count=self.consumer._dispatcher.pool_size)
+
+    @mock.patch.object(FakeMessageHandler, 'process', mock.MagicMock())
+    def test_ack_after_process(self):
+        message = self._get_message()
+        self.consumer._process_message(FakeModelDB(), message)
+
+        # Acknowledgements are sent from the consumer loop.
+        self.assertFalse(message.ack.called)
+        self.consumer.on_iteration()
+        message.ack.assert_called_once_with()
+        self.assertFalse(message.reject.called)
+
+    @mock.patch.object(FakeMessageHandler, 'process', mock.MagicMock(side_effect=Exception()))
+    def test_failed_message_is_requeued_once(self):
+        message = self._get_message()
+        self.consumer._process_message(FakeModelDB(), message)
+        self.consumer.on_iteration()
+        message.reject.assert_called_once_with(requeue=True)
+        self.assertFalse(message.ack.called)
+
+        message = self._get_message(redelivered=True)
+        self.consumer._process_message(FakeModelDB(), message)
+        self.consumer.on_iteration()
+        message.reject.assert_called_once_with(requeue=False)
+
+    def test_message_is_not_acked_before_processing(self):
+        message = self._get_message()
+        with mock.patch.object(self.consumer._dispatcher, 'dispatch') as dispatch:
+            self.consumer.process(FakeModelDB(), message)
+            self.assertTrue(dispatch.called)
+        self.assertFalse(message.ack.called)
+
+    @mock.patch.object(FakeMessageHandler, 'process', mock.MagicMock())
+    def test_adaptive_prefetch_is_applied_from_consumer_loop(self):
+        cfg.CONF.set_override(name='adaptive_prefetch', override=True, group='messaging')
+        cfg.CONF.set_override(name='max_prefetch_count', override=1000, group='messaging')
+        self.addCleanup(cfg.CONF.clear_override, name='adaptive_prefetch', group='messaging')
+        self.addCleanup(cfg.CONF.clear_override, name='max_prefetch_count', group='messaging')
+
+        handler = get_handler()
+        consumer = handler._queue_consumer
+        self.addCleanup(consumer.shutdown)
+
+        kombu_consumer = consumer.get_consumers(mock.MagicMock(), mock.MagicMock())[0]
+        pool_size = consumer._dispatcher.pool_size
+        kombu_consumer.qos.reset_mock()
+
+        # Only the consumer thread is allowed to talk to the broker.
+        consumer_thread = eventlet.getcurrent()
+        calling_threads = []
+
+        def record_calling_thread(*args, **kwargs):
+            calling_threads.append(eventlet.getcurrent())
+
+        kombu_consumer.qos.side_effect = record_calling_thread
+        messages = []
+        for _ in range(consumers.PrefetchWindow.ADJUST_INTERVAL):
+            message = self._get_message()
+            message.ack.side_effect = record_calling_thread
+            messages.append(message)
+            consumer.process(FakeModelDB(), message)
+
+        # Let the dispatcher workers process all the messages.
+        for _ in range(10):
+            eventlet.sleep(0)
+        self.assertTrue(all(not message.ack.called for message in messages))
+        self.assertFalse(kombu_consumer.qos.called)
+
+        consumer.on_iteration()
+        for message in messages:
+            message.ack.assert_called_once_with()
+        kombu_consumer.qos.assert_called_once_with(prefetch_count=pool_size * 2)
+        self.assertTrue(all(thread is consumer_thread for thread in calling_threads))
+
+
+class PrefetchWindowTest(unittest2.TestCase):
+
+    def _record(self, window, latency, count=consumers.PrefetchWindow.ADJUST_INTERVAL):
+        sizes = [window.record_latency(latency) for _ in range(count)]
+        return [size for size in sizes if size]
+
+    def test_static_window(self):
+        window = consumers.PrefetchWindow(size=10, max_size=100)
+        self.assertEqual(self._record(window, 0.001), [])
+        self.assertEqual(window.size, 10)
+
+    def test_adaptive_window_grows_and_shrinks(self):
+        window = consumers.PrefetchWindow(size=10, max_size=30, adaptive=True)
+
+        self.assertEqual(self._record(window, 0.001), [20])
+        self.assertEqual(self._record(window, 0.001), [30])
+        self.assertEqual(self._record(window, 0.001), [])
+
+        self.assertEqual(self._record(window, 5), [10])
+        self.assertEqual(window.size, 10)
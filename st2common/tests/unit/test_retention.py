@@ -0,0 +1,154 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import imp
+import os
+
+import mock
+
+from st2common.constants.action import LIVEACTION_STATUS_RUNNING
+from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.models.db.trace import TraceDB, TraceComponentDB
+from st2common.models.db.trigger import TriggerInstanceDB
+from st2common.persistence.execution import ActionExecution
+from st2common.persistence.liveaction import LiveAction
+from st2common.persistence.trace import Trace
+from st2common.persistence.trigger import TriggerInstance
+from st2common.services import retention
+from st2common.util import date as date_utils
+from st2tests.base import CleanDbTestCase
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PURGE_EXECUTIONS_TOOL_PATH = os.path.join(BASE_DIR, '../../../tools/purge_executions.py')
+
+
+class RetentionTestCase(CleanDbTestCase):
+    def setUp(self):
+        super(RetentionTestCase, self).setUp()
+        self.now = date_utils.get_datetime_utc_now()
+        self.old = self.now - datetime.timedelta(days=10)
+
+    def test_purge_executions(self):
+        old_execution = self._create_execution(start_timestamp=self.old)
+        running_execution = self._create_execution(start_timestamp=self.old,
+                                                   status=LIVEACTION_STATUS_RUNNING)
+        new_execution = self._create_execution(start_timestamp=self.now)
+
+        trace = self._create_trace(action_executions=[old_execution])
+        shared_trace = self._create_trace(action_executions=[old_execution, new_execution])
+
+        deleted_count = retention.purge_executions(
+            timestamp=self.now - datetime.timedelta(days=1),
+            statuses=[LIVEACTION_STATUS_SUCCEEDED], batch_size=1)
+        self.assertEqual(deleted_count, 1)
+
+        execution_ids = [str(execution.id) for execution in ActionExecution.get_all()]
+        self.assertItemsEqual(execution_ids, [str(running_execution.id),
+                                              str(new_execution.id)])
+        self.assertEqual(LiveAction.count(), 2)
+
+        # Trace which only referenced the deleted execution is deleted
+        self.assertIsNone(Trace.query(id=trace.id).first())
+        shared_trace = Trace.get_by_id(str(shared_trace.id))
+        self.assertEqual([component.object_id for component in shared_trace.action_executions],
+                         [str(new_execution.id)])
+
+    def test_purge_trigger_instances(self):
+        old_trigger_instance = TriggerInstance.add_or_update(
+            TriggerInstanceDB(trigger='dummy_pack.trigger', payload={},
+                              occurrence_time=self.old))
+        TriggerInstance.add_or_update(
+            TriggerInstanceDB(trigger='dummy_pack.trigger', payload={},
+                              occurrence_time=self.now))
+        trace = self._create_trace(trigger_instances=[old_trigger_instance])
+
+        deleted_count = retention.purge_trigger_instances(
+            timestamp=self.now - datetime.timedelta(days=1))
+        self.assertEqual(deleted_count, 1)
+        self.assertEqual(TriggerInstance.count(), 1)
+        self.assertIsNone(Trace.query(id=trace.id).first())
+
+    def test_engine(self):
+        self._create_execution(start_timestamp=self.old)
+        self._create_trace(start_timestamp=self.old)
+
+        policies = [
+            retention.RetentionPolicy(resource=retention.RESOURCE_EXECUTIONS,
+                                      ttl=datetime.timedelta(days=1),
+                                      statuses=[LIVEACTION_STATUS_SUCCEEDED]),
+            retention.RetentionPolicy(resource=retention.RESOURCE_TRACES,
+                                      ttl=datetime.timedelta(days=1))
+        ]
+        engine = retention.RetentionEngine(policies=policies, batch_size=10)
+
+        result = engine.run_once()
+        self.assertEqual(result, {'executions': 1, 'traces': 1})
+
+        stats = engine.get_stats()
+        self.assertEqual(stats['executions']['deleted'], 1)
+        self.assertEqual(stats['executions']['last_run_deleted'], 1)
+        self.assertFalse(stats['executions']['running'])
+
+    def test_invalid_policy(self):
+        self.assertRaises(ValueError, retention.RetentionPolicy, resource='rules',
+                          ttl=datetime.timedelta(days=1))
+
+    @mock.patch('st2common.services.retention.eventlet.sleep')
+    def test_rate_limit(self, mock_sleep):
+        for _ in range(3):
+            self._create_execution(start_timestamp=self.old)
+
+        retention.purge_executions(timestamp=self.now, batch_size=1, max_deletes_per_second=1)
+
+        self.assertEqual(ActionExecution.count(), 0)
+        delays = [call[0][0] for call in mock_sleep.call_args_list]
+        self.assertTrue(delays and all(delay > 0 for delay in delays))
+
+    def test_purge_executions_tool(self):
+        purge_executions = imp.load_source('purge_executions', PURGE_EXECUTIONS_TOOL_PATH)
+
+        self._create_execution(start_timestamp=self.old)
+        new_execution = self._create_execution(start_timestamp=self.now)
+
+        # Default timestamp
+        purge_executions._purge_executions(timestamp=purge_executions._get_timestamp())
+        self.assertEqual([execution.id for execution in ActionExecution.get_all()],
+                         [new_execution.id])
+
+        # Timestamp provided by the user
+        timestamp = (self.now + datetime.timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        purge_executions._purge_executions(timestamp=purge_executions._get_timestamp(timestamp))
+        self.assertEqual(ActionExecution.count(), 0)
+
+    def _create_execution(self, start_timestamp, status=LIVEACTION_STATUS_SUCCEEDED):
+        liveaction = LiveAction.add_or_update(
+            LiveActionDB(action='core.local', status=status, start_timestamp=start_timestamp),
+            publish=False)
+        execution = ActionExecutionDB(action={'ref': 'core.local'}, runner={'name': 'run-local'},
+                                      liveaction={'id': str(liveaction.id)}, status=status,
+                                      start_timestamp=start_timestamp)
+        return ActionExecution.add_or_update(execution, publish=False)
+
+    def _create_trace(self, action_executions=None, trigger_instances=None,
+                      start_timestamp=None):
+        trace = TraceDB(trace_tag='trace', start_timestamp=start_timestamp or self.now,
+                        action_executions=[TraceComponentDB(object_id=str(obj.id))
+                                           for obj in action_executions or []],
+                        trigger_instances=[TraceComponentDB(object_id=str(obj.id))
+                                           for obj in trigger_instances or []])
+        return Trace.add_or_update(trace)
@@ -0,0 +1,116 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import unittest2
+from oslo_config import cfg
+
+from st2common import service_setup
+from st2common.models import db
+import st2tests.config as tests_config
+
+MODEL_MODULE_NAMES = ['st2common.models.db.auth']
+
+
+class ServiceSetupIndexesTestCase(unittest2.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def setUp(self):
+        super(ServiceSetupIndexesTestCase, self).setUp()
+        service_setup.STARTUP_TIMINGS.clear()
+
+    def tearDown(self):
+        cfg.CONF.clear_override(name='index_creation', group='database')
+        super(ServiceSetupIndexesTestCase, self).tearDown()
+
+    @mock.patch.object(db, 'db_set_auto_create_index')
+    @mock.patch.object(db, 'db_ensure_indexes')
+    def test_foreground_index_creation(self, mock_ensure_indexes, mock_set_auto_create_index):
+        cfg.CONF.set_override(name='index_creation', override='foreground', group='database')
+
+        service_setup.db_ensure_indexes(model_module_names=MODEL_MODULE_NAMES)
+
+        mock_ensure_indexes.assert_called_once_with(model_module_names=MODEL_MODULE_NAMES,
+                                                    background=False)
+        self.assertFalse(mock_set_auto_create_index.called)
+        self.assertIn('db_ensure_indexes', service_setup.get_startup_timings())
+
+    @mock.patch.object(db, 'db_set_auto_create_index')
+    @mock.patch.object(db, 'db_ensure_indexes')
+    def test_background_index_creation(self, mock_ensure_indexes, mock_set_auto_create_index):
+        cfg.CONF.set_override(name='index_creation', override='background', group='database')
+
+        thread = service_setup.db_ensure_indexes(model_module_names=MODEL_MODULE_NAMES)
+        mock_set_auto_create_index.assert_called_once_with(False)
+        self.assertNotIn('db_ensure_indexes', service_setup.get_startup_timings())
+        thread.wait()
+
+        mock_ensure_indexes.assert_called_once_with(model_module_names=MODEL_MODULE_NAMES,
+                                                    background=True)
+        self.assertIn('db_ensure_indexes', service_setup.get_startup_timings())
+
+    @mock.patch.object(db, 'db_set_auto_create_index', mock.Mock())
+    @mock.patch.object(db, 'db_ensure_indexes', mock.Mock(side_effect=Exception('failure')))
+    def test_background_index_creation_failure_is_logged(self):
+        cfg.CONF.set_override(name='index_creation', override='background', group='database')
+
+        thread = service_setup.db_ensure_indexes(model_module_names=MODEL_MODULE_NAMES)
+        thread.wait()
+
+        self.assertNotIn('db_ensure_indexes', service_setup.get_startup_timings())
+
+    @mock.patch.object(db, 'db_set_auto_create_index')
+    @mock.patch.object(db, 'db_ensure_indexes')
+    def test_no_index_creation(self, mock_ensure_indexes, mock_set_auto_create_index):
+        cfg.CONF.set_override(name='index_creation', override='none', group='database')
+
+        service_setup.db_ensure_indexes(model_module_names=MODEL_MODULE_NAMES)
+
+        self.assertFalse(mock_ensure_indexes.called)
+        mock_set_auto_create_index.assert_called_once_with(False)
+
+
+class FakeModel(object):
+    _meta = {}
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.index_background = cls._meta.get('index_background', False)
+
+
+@mock.patch.object(db, '_get_model_classes', mock.Mock(return_value=[FakeModel]))
+class DbIndexesTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(DbIndexesTestCase, self).setUp()
+        FakeModel._meta = {}
+        FakeModel.index_background = None
+
+    def test_ensure_indexes_in_background(self):
+        db.db_ensure_indexes(background=True)
+        self.assertTrue(FakeModel.index_background)
+        self.assertFalse(FakeModel._meta['index_background'])
+
+        db.db_ensure_indexes(background=False)
+        self.assertFalse(FakeModel.index_background)
+
+    def test_set_auto_create_index(self):
+        db.db_set_auto_create_index(False)
+        self.assertFalse(FakeModel._meta['auto_create_index'])
+
+        db.db_set_auto_create_index(True)
+        self.assertTrue(FakeModel._meta['auto_create_index'])
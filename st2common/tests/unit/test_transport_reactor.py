@@ -0,0 +1,58 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import unittest2
+
+import st2tests.config as tests_config
+from st2common.transport import reactor
+
+
+class TriggerInstanceRoutingTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def test_bucket_is_stable(self):
+        self.assertEqual(reactor.get_trigger_bucket('core.st2.webhook', bucket_count=64),
+                         reactor.get_trigger_bucket(u'core.st2.webhook', bucket_count=64))
+
+        buckets = set([reactor.get_trigger_bucket('pack.trigger%s' % (i), bucket_count=8)
+                       for i in range(100)])
+        self.assertEqual(buckets, set(range(8)))
+
+    def test_routing_key(self):
+        bucket = reactor.get_trigger_bucket('core.st2.webhook')
+        expected = 'trigger_instance.%s.core.st2.webhook' % (bucket)
+
+        self.assertEqual(reactor.get_trigger_instance_routing_key('core.st2.webhook'), expected)
+        self.assertEqual(reactor.get_trigger_instance_routing_key(
+            {'pack': 'core', 'name': 'st2.webhook'}), expected)
+
+    def test_routing_key_for_type_and_parameters(self):
+        trigger = {'type': 'core.st2.webhook', 'parameters': {'url': 'foo'}}
+        bucket = reactor.get_trigger_bucket('core.st2.webhook')
+        self.assertEqual(reactor.get_trigger_instance_routing_key(trigger),
+                         'trigger_instance.%s.core.st2.webhook' % (bucket))
+
+    @mock.patch.object(reactor.TriggerInstancePublisher, 'publish_trigger')
+    def test_dispatch_uses_trigger_routing_key(self, mock_publish_trigger):
+        dispatcher = reactor.TriggerDispatcher()
+        dispatcher.dispatch('core.st2.webhook', payload={'a': 1})
+
+        routing_key = mock_publish_trigger.call_args[1]['routing_key']
+        self.assertEqual(routing_key,
+                         reactor.get_trigger_instance_routing_key('core.st2.webhook'))
@@ -0,0 +1,104 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import struct
+
+import unittest2
+from kombu import serialization
+
+import st2tests.config as tests_config
+from st2common.constants.trace import TRACE_CONTEXT
+from st2common.models.api.trace import TraceContext
+from st2common.models.db.execution import ActionExecutionDB
+from st2common.models.db.liveaction import LiveActionDB
+from st2common.transport import serializers
+from st2tests.fixturesloader import FixturesLoader
+
+FIXTURES_PACK = 'generic'
+TEST_MODELS = {
+    'executions': ['execution1.yaml'],
+    'liveactions': ['liveaction1.yaml', 'parentliveaction.yaml']
+}
+
+
+class St2SerializerTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+        cls.models = FixturesLoader().load_models(fixtures_pack=FIXTURES_PACK,
+                                                  fixtures_dict=TEST_MODELS)
+
+    def test_document_round_trip(self):
+        for models in self.models.values():
+            for model in models.values():
+                decoded = serializers.decode(serializers.encode(model))
+                self.assertEqual(type(decoded), type(model))
+                self.assertEqual(decoded.to_mongo(), model.to_mongo())
+
+    def test_execution_round_trip(self):
+        execution = self.models['executions']['execution1.yaml']
+        decoded = serializers.decode(serializers.encode(execution))
+        self.assertTrue(isinstance(decoded, ActionExecutionDB))
+        self.assertEqual(decoded.id, execution.id)
+        self.assertEqual(decoded.start_timestamp, execution.start_timestamp)
+        self.assertEqual(decoded.liveaction, execution.liveaction)
+
+    def test_trigger_instance_payload_round_trip(self):
+        payload = {
+            'trigger': 'core.st2.webhook',
+            'payload': {'a': 1, 'b': [1, 2, {'c': 'd'}]},
+            TRACE_CONTEXT: TraceContext(trace_tag='tag-1')
+        }
+        decoded = serializers.decode(serializers.encode(payload))
+        self.assertEqual(decoded['trigger'], payload['trigger'])
+        self.assertEqual(decoded['payload'], payload['payload'])
+        self.assertTrue(isinstance(decoded[TRACE_CONTEXT], TraceContext))
+        self.assertEqual(decoded[TRACE_CONTEXT].trace_tag, 'tag-1')
+        self.assertEqual(decoded[TRACE_CONTEXT].id_, None)
+
+    def test_compression(self):
+        liveaction = self.models['liveactions']['liveaction1.yaml']
+        liveaction.result = {'stdout': 'x' * 1000}
+
+        plain = serializers.encode(liveaction, compression_threshold=0)
+        compressed = serializers.encode(liveaction, compression_threshold=100)
+        self.assertEqual(struct.unpack('!BB', plain[:2]), (serializers.WIRE_FORMAT_VERSION, 0))
+        self.assertEqual(struct.unpack('!BB', compressed[:2]),
+                         (serializers.WIRE_FORMAT_VERSION, serializers.FLAG_ZLIB))
+        self.assertTrue(len(compressed) < len(plain))
+
+        decoded = serializers.decode(compressed)
+        self.assertTrue(isinstance(decoded, LiveActionDB))
+        self.assertEqual(decoded.result, liveaction.result)
+
+    def test_unsupported_version(self):
+        data = struct.pack('!BB', serializers.WIRE_FORMAT_VERSION + 1, 0) + '{}'
+        self.assertRaises(ValueError, serializers.decode, data)
+
+    def test_dumps_and_kombu_loads(self):
+        liveaction = self.models['liveactions']['liveaction1.yaml']
+        accept = serialization.prepare_accept_content(serializers.ACCEPTED_SERIALIZERS)
+
+        for serializer in serializers.ACCEPTED_SERIALIZERS:
+            content_type, content_encoding, body = serializers.dumps(liveaction,
+                                                                     serializer=serializer)
+            decoded = serialization.loads(body, content_type, content_encoding, accept=accept)
+            self.assertEqual(decoded.to_mongo(), liveaction.to_mongo())
+
+    def test_dumps_falls_back_to_pickle(self):
+        payload = {'values': set([1, 2])}
+        content_type, _, _ = serializers.dumps(payload, serializer=serializers.ST2_SERIALIZER)
+        self.assertEqual(content_type, 'application/x-python-serialize')
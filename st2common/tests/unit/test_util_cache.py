@@ -0,0 +1,72 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+
+import mock
+import unittest2
+
+from st2common.util.cache import LRUCache
+
+
+class LRUCacheTestCase(unittest2.TestCase):
+
+    def test_get_and_set(self):
+        cache = LRUCache(max_size=10)
+        self.assertEqual(cache.get('a', None), None)
+
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+        self.assertEqual(cache.get_stats()['misses'], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', None), None)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(max_size=10, ttl=10)
+        now = time.time()
+
+        with mock.patch.object(time, 'time', mock.MagicMock(return_value=now)):
+            cache.set('a', 1)
+            self.assertEqual(cache.get('a'), 1)
+
+        with mock.patch.object(time, 'time', mock.MagicMock(return_value=now + 11)):
+            self.assertEqual(cache.get('a', None), None)
+
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_and_clear(self):
+        cache = LRUCache(max_size=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        cache.invalidate('a')
+        self.assertEqual(cache.get('a', None), None)
+        self.assertEqual(cache.get('b'), 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
@@ -220,3 +220,38 @@ class JinjaUtilsVersionsFilterTestCase(unittest2.TestCase):
         actual = env.from_string(template).render({'version': '0.10.1'})
         expected = '0.10'
         self.assertEqual(actual, expected)
+
+
+class JinjaUtilsTemplateCacheTestCase(unittest2.TestCase):
+
+    def setUp(self):
+        super(JinjaUtilsTemplateCacheTestCase, self).setUp()
+        jinja_utils.clear_template_cache()
+
+    def test_get_shared_jinja_environment(self):
+        env = jinja_utils.get_shared_jinja_environment()
+        self.assertIs(jinja_utils.get_shared_jinja_environment(), env)
+        self.assertIn('regex_match', env.filters)
+
+        lenient_env = jinja_utils.get_shared_jinja_environment(allow_undefined=True)
+        self.assertIsNot(lenient_env, env)
+        self.assertEqual(lenient_env.from_string('{{a}}').render({}), '')
+        self.assertRaises(Exception, env.from_string('{{a}}').render, {})
+
+    def test_get_template(self):
+        template = jinja_utils.get_template('{{a}}')
+        self.assertIs(jinja_utils.get_template('{{a}}'), template)
+        self.assertIsNot(jinja_utils.get_template('{{a}}', allow_undefined=True), template)
+        self.assertEqual(template.render({'a': 'v1'}), 'v1')
+
+        stats = jinja_utils.get_template_cache_stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertAlmostEqual(stats['hit_rate'], 1.0 / 3)
+
+    def test_get_undeclared_variables(self):
+        variables = jinja_utils.get_undeclared_variables('{{a}} {{b.c}} {% set d = 1 %}{{d}}')
+        self.assertEqual(variables, frozenset(['a', 'b']))
+        self.assertIs(jinja_utils.get_undeclared_variables('{{a}} {{b.c}} {% set d = 1 %}{{d}}'),
+                      variables)
@@ -24,6 +24,7 @@ By default the following information is included:
 - All the content (integration packs).
 - Information about your system and StackStorm installation (Operating system,
   Python version, StackStorm version, Mistral version)
+- Database query profiles (if the query profiler is enabled)
 
 Note: This script currently assumes it's running on Linux.
 """
@@ -43,6 +44,7 @@ import six
 import yaml
 import gnupg
 import requests
+from oslo_config import cfg
 from distutils.spawn import find_executable
 
 import st2common
@@ -93,7 +95,8 @@ CONFIG_FILE_PATHS = [
 DIRECTORY_STRUCTURE = [
     'configs/',
     'logs/',
-    'content/'
+    'content/',
+    'query_profiles/'
 ]
 
 # Options which should be removed from the st2 config
@@ -213,7 +216,7 @@ def get_system_information():
 
 
 def create_archive(include_logs, include_configs, include_content, include_system_info,
-                   user_info=None, debug=False):
+                   include_query_profiles=False, user_info=None, debug=False):
     """
     Create an archive with debugging information.
 
@@ -234,6 +237,7 @@ def create_archive(include_logs, include_configs, include_content, include_syste
         'logs': os.path.join(temp_dir_path, 'logs/'),
         'configs': os.path.join(temp_dir_path, 'configs/'),
         'content': os.path.join(temp_dir_path, 'content/'),
+        'query_profiles': os.path.join(temp_dir_path, 'query_profiles/'),
         'system_info': os.path.join(temp_dir_path, 'system_info.yaml'),
         'user_info': os.path.join(temp_dir_path, 'user_info.yaml')
     }
@@ -271,6 +275,14 @@ def create_archive(include_logs, include_configs, include_content, include_syste
             except IOError:
                 continue
 
+    # Query profiles
+    if include_query_profiles:
+        LOG.debug('Including query profiles')
+
+        query_profiles_glob = os.path.join(cfg.CONF.query_profiler.dump_dir, '*.json')
+        query_profile_list = get_full_file_list(file_path_glob=query_profiles_glob)
+        copy_files(file_paths=query_profile_list, destination=output_paths['query_profiles'])
+
     # System information
     if include_system_info:
         LOG.debug('Including system info')
@@ -369,12 +381,13 @@ def upload_archive(archive_file_path):
 
 
 def create_and_review_archive(include_logs, include_configs, include_content, include_system_info,
-                              user_info=None, debug=False):
+                              include_query_profiles=False, user_info=None, debug=False):
     try:
         plain_text_output_path = create_archive(include_logs=include_logs,
                                                 include_configs=include_configs,
                                                 include_content=include_content,
                                                 include_system_info=include_system_info,
+                                                include_query_profiles=include_query_profiles,
                                                 user_info=user_info,
                                                 debug=debug)
     except Exception:
@@ -385,12 +398,13 @@ def create_and_review_archive(include_logs, include_configs, include_content, in
 
 
 def create_and_upload_archive(include_logs, include_configs, include_content, include_system_info,
-                              user_info=None, debug=False):
+                              include_query_profiles=False, user_info=None, debug=False):
     try:
         plain_text_output_path = create_archive(include_logs=include_logs,
                                                 include_configs=include_configs,
                                                 include_content=include_content,
                                                 include_system_info=include_system_info,
+                                                include_query_profiles=include_query_profiles,
                                                 user_info=user_info,
                                                 debug=debug)
         encrypted_output_path = encrypt_archive(archive_file_path=plain_text_output_path)
@@ -425,6 +439,8 @@ def main():
                         help='Don\'t include content packs in the generated tarball')
     parser.add_argument('--exclude-system-info', action='store_true', default=False,
                         help='Don\'t include system information in the generated tarball')
+    parser.add_argument('--exclude-query-profiles', action='store_true', default=False,
+                        help='Don\'t include database query profiles in the generated tarball')
     parser.add_argument('--yes', action='store_true', default=False,
                         help='Run in non-interactive mode and answer "yes" to all the questions')
     parser.add_argument('--review', action='store_true', default=False,
@@ -434,7 +450,7 @@ def main():
     args = parser.parse_args()
 
     arg_names = ['exclude_logs', 'exclude_configs', 'exclude_content',
-                 'exclude_system_info']
+                 'exclude_system_info', 'exclude_query_profiles']
 
     abort = True
     for arg_name in arg_names:
@@ -481,6 +497,7 @@ def main():
                                   include_configs=not args.exclude_configs,
                                   include_content=not args.exclude_content,
                                   include_system_info=not args.exclude_system_info,
+                                  include_query_profiles=not args.exclude_query_profiles,
                                   user_info=user_info,
                                   debug=args.debug)
     else:
@@ -488,5 +505,6 @@ def main():
                                   include_configs=not args.exclude_configs,
                                   include_content=not args.exclude_content,
                                   include_system_info=not args.exclude_system_info,
+                                  include_query_profiles=not args.exclude_query_profiles,
                                   user_info=user_info,
                                   debug=args.debug)
@@ -26,6 +26,12 @@ from st2exporter import worker
 
 LOG = logging.getLogger(__name__)
 
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.execution',
+    'st2common.models.db.marker'
+]
+
 
 eventlet.monkey_patch(
     os=True,
@@ -37,7 +43,8 @@ eventlet.monkey_patch(
 
 def _setup():
     common_setup(service='exporter', config=config, setup_db=True, register_mq_exchanges=True,
-                 register_signal_handlers=True)
+                 register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
 
 
 def _run_worker():
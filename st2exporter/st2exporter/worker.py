@@ -26,6 +26,7 @@ from st2common.models.api.execution import ActionExecutionAPI
 from st2common.models.db.execution import ActionExecutionDB
 from st2common.persistence.execution import ActionExecution
 from st2common.persistence.marker import DumperMarker
+from st2common.services import resultstorage
 from st2common.transport import consumers, execution, publishers
 from st2common.transport import utils as transport_utils
 from st2common.util import isotime
@@ -77,7 +78,7 @@ class ExecutionsExporter(consumers.MessageHandler):
         LOG.debug('Got execution from queue: %s', execution)
         if execution.status not in COMPLETION_STATUSES:
             return
-        execution_api = ActionExecutionAPI.from_model(execution, mask_secrets=True)
+        execution_api = self._get_execution_api(execution)
         self.pending_executions.put_nowait(execution_api)
         LOG.debug("Added execution to queue.")
 
@@ -90,7 +91,7 @@ class ExecutionsExporter(consumers.MessageHandler):
         for missed_execution in missed_executions:
             if missed_execution.status not in COMPLETION_STATUSES:
                 continue
-            execution_api = ActionExecutionAPI.from_model(missed_execution, mask_secrets=True)
+            execution_api = self._get_execution_api(missed_execution)
             try:
                 LOG.debug('Missed execution %s', execution_api)
                 self.pending_executions.put_nowait(execution_api)
@@ -99,6 +100,17 @@ class ExecutionsExporter(consumers.MessageHandler):
                 continue
         LOG.info('Bootstrapped executions...')
 
+    def _get_execution_api(self, execution):
+        # Executions received from the message bus are already complete
+        ActionExecution.populate_shared_fields([execution])
+        execution_api = ActionExecutionAPI.from_model(execution, mask_secrets=True)
+
+        # Exported executions include the whole result
+        if execution.result_ref:
+            execution_api.result = resultstorage.load_result(result_ref=execution.result_ref)
+
+        return execution_api
+
     def _get_export_marker_from_db(self):
         try:
             markers = DumperMarker.get_all()
@@ -22,7 +22,6 @@ from st2common.constants.meta import ALLOWED_EXTS
 from st2common.constants.pack import DEFAULT_PACK_NAME
 from st2common.bootstrap.base import ResourceRegistrar
 from st2common.models.api.rule import RuleAPI
-from st2common.models.system.common import ResourceReference
 from st2common.persistence.rule import Rule
 import st2common.content.utils as content_utils
 
@@ -92,63 +91,69 @@ class RulesRegistrar(ResourceRegistrar):
         return self.get_resources_from_pack(resources_dir=rules_dir)
 
     def _register_rules_from_pack(self, pack, rules):
-        registered_count = 0
+        existing_rules = self.get_existing_resources(resource_cls=Rule, pack=pack)
+
+        # Migration from rule without pack to rule with pack.
+        # There might be a rule with same name but in pack `default`
+        # generated in migration script. In this case, we want to
+        # delete so we don't have duplicates.
+        if pack != DEFAULT_PACK_NAME:
+            default_pack_rules = self.get_existing_resources(resource_cls=Rule,
+                                                             pack=DEFAULT_PACK_NAME)
+        else:
+            default_pack_rules = {}
+
+        models = []
+        migrated_rules = []
 
         for rule in rules:
             LOG.debug('Loading rule from %s.', rule)
             try:
-                content = self._meta_loader.load(rule)
-                pack_field = content.get('pack', None)
-                if not pack_field:
-                    content['pack'] = pack
-                    pack_field = pack
-                if pack_field != pack:
-                    raise Exception('Model is in pack "%s" but field "pack" is different: %s' %
-                                    (pack, pack_field))
-                rule_api = RuleAPI(**content)
-                rule_api.validate()
-                rule_db = RuleAPI.to_model(rule_api)
-
-                # Migration from rule without pack to rule with pack.
-                # There might be a rule with same name but in pack `default`
-                # generated in migration script. In this case, we want to
-                # delete so we don't have duplicates.
-                if pack_field != DEFAULT_PACK_NAME:
-                    try:
-                        rule_ref = ResourceReference.to_string_reference(name=content['name'],
-                                                                         pack=DEFAULT_PACK_NAME)
-                        LOG.debug('Looking for rule %s in pack %s', content['name'],
-                                  DEFAULT_PACK_NAME)
-                        existing = Rule.get_by_ref(rule_ref)
-                        LOG.debug('Existing = %s', existing)
-                        if existing:
-                            LOG.debug('Found rule in pack default: %s; Deleting.', rule_ref)
-                            Rule.delete(existing)
-                    except:
-                        LOG.exception('Exception deleting rule from %s pack.', DEFAULT_PACK_NAME)
-
-                try:
-                    rule_ref = ResourceReference.to_string_reference(name=content['name'],
-                                                                     pack=content['pack'])
-                    existing = Rule.get_by_ref(rule_ref)
-                    if existing:
-                        rule_db.id = existing.id
-                        LOG.debug('Found existing rule: %s with id: %s', rule_ref, existing.id)
-                except ValueError:
-                    LOG.debug('Rule %s not found. Creating new one.', rule)
-
-                try:
-                    rule_db = Rule.add_or_update(rule_db)
-                    extra = {'rule_db': rule_db}
-                    LOG.audit('Rule updated. Rule %s from %s.', rule_db, rule, extra=extra)
-                except Exception:
-                    LOG.exception('Failed to create rule %s.', rule_api.name)
+                rule_db = self._get_rule_model(pack=pack, rule=rule)
             except:
                 LOG.exception('Failed registering rule from %s.', rule)
+                continue
+
+            existing = default_pack_rules.get(rule_db.name, None)
+            if existing:
+                LOG.debug('Found rule in pack default: %s; Deleting.', existing.ref)
+                migrated_rules.append(existing)
+
+            existing = existing_rules.get(rule_db.name, None)
+            if existing:
+                rule_db.id = existing.id
+                LOG.debug('Found existing rule: %s with id: %s', existing.ref, existing.id)
             else:
-                registered_count += 1
+                LOG.debug('Rule %s not found. Creating new one.', rule)
 
-        return registered_count
+            models.append((rule, rule_db))
+
+        if migrated_rules:
+            try:
+                Rule.delete_many(migrated_rules)
+            except:
+                LOG.exception('Exception deleting rules from %s pack.', DEFAULT_PACK_NAME)
+
+        saved = self.save_resources(resource_cls=Rule, resources=models)
+
+        for rule, rule_db in saved:
+            extra = {'rule_db': rule_db}
+            LOG.audit('Rule updated. Rule %s from %s.', rule_db, rule, extra=extra)
+
+        return len(saved)
+
+    def _get_rule_model(self, pack, rule):
+        content = self._meta_loader.load(rule)
+        pack_field = content.get('pack', None)
+        if not pack_field:
+            content['pack'] = pack
+            pack_field = pack
+        if pack_field != pack:
+            raise Exception('Model is in pack "%s" but field "pack" is different: %s' %
+                            (pack, pack_field))
+        rule_api = RuleAPI(**content)
+        rule_api.validate()
+        return RuleAPI.to_model(rule_api)
 
 
 def register_rules(packs_base_paths=None, pack_dir=None):
@@ -99,20 +99,44 @@ class SensorsRegistrar(ResourceRegistrar):
         return self.get_resources_from_pack(resources_dir=sensors_dir)
 
     def _register_sensors_from_pack(self, pack, sensors):
-        registered_count = 0
+        existing_sensors = self.get_existing_resources(resource_cls=SensorType, pack=pack)
+        models = []
 
         for sensor in sensors:
             try:
-                self._register_sensor_from_pack(pack=pack, sensor=sensor)
+                sensor_model = self._get_sensor_model(pack=pack, sensor=sensor,
+                                                      existing_sensors=existing_sensors)
             except Exception as e:
                 LOG.debug('Failed to register sensor "%s": %s', sensor, str(e))
-            else:
-                LOG.debug('Sensor "%s" successfully registered', sensor)
-                registered_count += 1
+                continue
 
-        return registered_count
+            models.append((sensor, sensor_model))
+
+        saved = self.save_resources(resource_cls=SensorType, resources=models)
+
+        for sensor, _ in saved:
+            LOG.debug('Sensor "%s" successfully registered', sensor)
+
+        return len(saved)
 
     def _register_sensor_from_pack(self, pack, sensor):
+        sensor_model = self._get_sensor_model(pack=pack, sensor=sensor)
+
+        try:
+            sensor_model = SensorType.add_or_update(sensor_model)
+        except:
+            LOG.exception('Failed creating sensor model for %s', sensor)
+
+        return sensor_model
+
+    def _get_sensor_model(self, pack, sensor, existing_sensors=None):
+        """
+        Load the sensor from the provided metadata file.
+
+        :param existing_sensors: Sensors of this pack which are already in the database keyed by
+                                 name. If not provided, the sensor is looked up in the database.
+        :type existing_sensors: ``dict``
+        """
         sensor_metadata_file_path = sensor
 
         LOG.debug('Loading sensor from %s.', sensor_metadata_file_path)
@@ -139,18 +163,17 @@ class SensorsRegistrar(ResourceRegistrar):
         sensor_api = SensorTypeAPI(**content)
         sensor_model = SensorTypeAPI.to_model(sensor_api)
 
-        sensor_types = SensorType.query(pack=sensor_model.pack, name=sensor_model.name)
-        if len(sensor_types) >= 1:
-            sensor_type = sensor_types[0]
+        if existing_sensors is not None:
+            sensor_type = existing_sensors.get(sensor_model.name, None)
+        else:
+            sensor_types = SensorType.query(pack=sensor_model.pack, name=sensor_model.name)
+            sensor_type = sensor_types[0] if len(sensor_types) >= 1 else None
+
+        if sensor_type:
             LOG.debug('Found existing sensor id:%s with name:%s. Will update it.',
                       sensor_type.id, sensor_type.name)
             sensor_model.id = sensor_type.id
 
-        try:
-            sensor_model = SensorType.add_or_update(sensor_model)
-        except:
-            LOG.exception('Failed creating sensor model for %s', sensor)
-
         return sensor_model
 
 
@@ -0,0 +1,117 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import os
+import sys
+
+import eventlet
+from oslo_config import cfg
+
+from st2common import log as logging
+from st2common.service_setup import setup as common_setup
+from st2common.service_setup import teardown as common_teardown
+from st2common.services import retention
+from st2reactor.garbage_collector import config
+
+eventlet.monkey_patch(
+    os=True,
+    select=True,
+    socket=True,
+    thread=False if '--use-debugger' in sys.argv else True,
+    time=True)
+
+LOG = logging.getLogger('st2reactor.bin.garbagecollector')
+
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.execution',
+    'st2common.models.db.liveaction',
+    'st2common.models.db.trace',
+    'st2common.models.db.trigger'
+]
+
+
+def _setup():
+    common_setup(service='garbagecollector', config=config, setup_db=True,
+                 register_mq_exchanges=False, register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
+
+
+def _teardown():
+    common_teardown()
+
+
+def _get_policies():
+    gc_config = cfg.CONF.garbagecollector
+    policies = []
+
+    if gc_config.action_executions_ttl:
+        policies.append(retention.RetentionPolicy(
+            resource=retention.RESOURCE_EXECUTIONS,
+            ttl=datetime.timedelta(days=gc_config.action_executions_ttl),
+            statuses=gc_config.action_executions_statuses,
+            export=gc_config.export_action_executions))
+
+    if gc_config.trigger_instances_ttl:
+        policies.append(retention.RetentionPolicy(
+            resource=retention.RESOURCE_TRIGGER_INSTANCES,
+            ttl=datetime.timedelta(days=gc_config.trigger_instances_ttl)))
+
+    if gc_config.traces_ttl:
+        policies.append(retention.RetentionPolicy(
+            resource=retention.RESOURCE_TRACES,
+            ttl=datetime.timedelta(days=gc_config.traces_ttl)))
+
+    return policies
+
+
+def _run_worker():
+    LOG.info('(PID=%s) Garbage collector started.', os.getpid())
+
+    policies = _get_policies()
+    if not policies:
+        LOG.info('No retention policies are configured.')
+
+    gc_config = cfg.CONF.garbagecollector
+    engine = retention.RetentionEngine(policies=policies,
+                                       interval=gc_config.collection_interval,
+                                       batch_size=gc_config.batch_size,
+                                       max_deletes_per_second=gc_config.max_deletes_per_second,
+                                       export_dir=gc_config.export_dir)
+
+    try:
+        engine.start(wait=True)
+    except (KeyboardInterrupt, SystemExit):
+        LOG.info('(PID=%s) Garbage collector stopped.', os.getpid())
+        engine.shutdown()
+    except:
+        LOG.exception('(PID:%s) Garbage collector quit due to exception.', os.getpid())
+        return 1
+
+    return 0
+
+
+def main():
+    try:
+        _setup()
+        return _run_worker()
+    except SystemExit as exit_code:
+        sys.exit(exit_code)
+    except:
+        LOG.exception('(PID=%s) Garbage collector quit due to exception.', os.getpid())
+        return 1
+    finally:
+        _teardown()
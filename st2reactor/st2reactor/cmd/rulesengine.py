@@ -20,10 +20,23 @@ eventlet.monkey_patch(
 
 LOG = logging.getLogger('st2reactor.bin.rulesengine')
 
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.action',
+    'st2common.models.db.execution',
+    'st2common.models.db.keyvalue',
+    'st2common.models.db.liveaction',
+    'st2common.models.db.rule',
+    'st2common.models.db.runner',
+    'st2common.models.db.trace',
+    'st2common.models.db.trigger'
+]
+
 
 def _setup():
     common_setup(service='rulesengine', config=config, setup_db=True, register_mq_exchanges=True,
-                 register_signal_handlers=True)
+                 register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
 
 
 def _teardown():
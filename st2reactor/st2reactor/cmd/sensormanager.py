@@ -36,10 +36,18 @@ eventlet.monkey_patch(
 
 LOG = logging.getLogger('st2reactor.bin.sensors_manager')
 
+# Models used by the service whose indexes are ensured on startup
+MODEL_MODULE_NAMES = [
+    'st2common.models.db.sensor',
+    'st2common.models.db.trace',
+    'st2common.models.db.trigger'
+]
+
 
 def _setup():
     common_setup(service='sensorcontainer', config=config, setup_db=True,
-                 register_mq_exchanges=True, register_signal_handlers=True)
+                 register_mq_exchanges=True, register_signal_handlers=True,
+                 model_module_names=MODEL_MODULE_NAMES)
 
 
 def _teardown():
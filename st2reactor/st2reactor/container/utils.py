@@ -24,7 +24,8 @@ from st2common.services import triggers as TriggerService
 LOG = logging.getLogger('st2reactor.sensor.container_utils')
 
 
-def create_trigger_instance(trigger, payload, occurrence_time, raise_on_no_trigger=False):
+def create_trigger_instance(trigger, payload, occurrence_time, raise_on_no_trigger=False,
+                            writer=None):
     """
     This creates a trigger instance object given trigger and payload.
     Trigger can be just a string reference (pack.name) or a ``dict``
@@ -35,6 +36,11 @@ def create_trigger_instance(trigger, payload, occurrence_time, raise_on_no_trigg
 
     :param payload: Trigger payload.
     :type payload: ``dict``
+
+    :param writer: Writer used to save the trigger instance together with the trigger instances
+                   created by other greenthreads. If not provided, the trigger instance is saved
+                   right away.
+    :type writer: :class:`st2common.services.bulkwriter.BulkWriter`
     """
     # TODO: This is nasty, this should take a unique reference and not a dict
     if isinstance(trigger, six.string_types):
@@ -57,4 +63,8 @@ def create_trigger_instance(trigger, payload, occurrence_time, raise_on_no_trigg
     trigger_instance.trigger = trigger_ref
     trigger_instance.payload = payload
     trigger_instance.occurrence_time = occurrence_time
+
+    if writer:
+        return writer.add_or_update(trigger_instance)
+
     return TriggerInstance.add_or_update(trigger_instance)
@@ -46,6 +46,35 @@ def _register_rules_engine_opts():
     ]
     CONF.register_opts(logging_opts, group='rulesengine')
 
+    sharding_opts = [
+        cfg.ListOpt('buckets', default=[],
+                    help='Trigger instance buckets this rules engine processes. All the buckets '
+                         'are processed if empty. Rules engines which process a subset of the '
+                         'buckets must not run alongside rules engines which process all of '
+                         'them.')
+    ]
+    CONF.register_opts(sharding_opts, group='rulesengine')
+
+    trigger_instance_opts = [
+        cfg.IntOpt('trigger_instance_batch_size', default=1,
+                   help='Max number of trigger instances saved to the database as a single bulk '
+                        'write. Batching is disabled when set to 1.'),
+        cfg.FloatOpt('trigger_instance_batch_window', default=0.01,
+                     help='Time in seconds to wait for more trigger instances before a batch is '
+                          'saved.')
+    ]
+    CONF.register_opts(trigger_instance_opts, group='rulesengine')
+
+    rules_index_opts = [
+        cfg.BoolOpt('rules_index', default=True,
+                    help='True to keep the enabled rules in memory instead of retrieving them '
+                         'from the database for every trigger instance.'),
+        cfg.IntOpt('rules_index_resync_interval', default=300,
+                   help='Interval in seconds between the full reloads of the in-memory rules. '
+                        'Changes are otherwise applied as they happen. 0 to disable.')
+    ]
+    CONF.register_opts(rules_index_opts, group='rulesengine')
+
     timer_opts = [
         cfg.StrOpt('local_timezone', default='America/Los_Angeles',
                    help='Timezone pertaining to the location where st2 is run.')
@@ -0,0 +1,166 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compilation of the rule criteria.
+
+Criteria are compiled once when a rule is loaded: the payload paths are parsed, the operator
+functions are resolved, the static regular expressions are compiled and the patterns which don't
+contain any Jinja markup are marked as static so evaluating the criteria against a trigger
+instance doesn't redo that work for every instance.
+"""
+
+import re
+
+import six
+from jsonpath_rw import parse
+
+import st2common.operators as criteria_operators
+from st2common.util.cache import LRUCache
+
+__all__ = [
+    'CompiledCriterion',
+    'CompiledCriteria',
+
+    'compile_criteria',
+    'parse_expression',
+    'is_static_pattern'
+]
+
+# Payload lookup key -> parsed JSONPath expression
+_EXPRESSIONS_CACHE = LRUCache(max_size=1000)
+
+JINJA_MARKERS = ['{{', '{%', '{#']
+
+
+def parse_expression(lookup_key):
+    """
+    Parse the provided payload lookup key. Parsed expressions are cached.
+
+    :rtype: ``jsonpath_rw.JSONPath``
+    """
+    expression = _EXPRESSIONS_CACHE.get(lookup_key, None)
+
+    if expression is None:
+        expression = parse(lookup_key)
+        _EXPRESSIONS_CACHE.set(lookup_key, expression)
+
+    return expression
+
+
+def is_static_pattern(pattern):
+    """
+    Return True if rendering the provided criteria pattern wouldn't change it.
+    """
+    if not pattern or not isinstance(pattern, six.string_types):
+        return True
+
+    if any(marker in pattern for marker in JINJA_MARKERS):
+        return False
+
+    # Jinja normalizes the newlines and strips the trailing one
+    return '\r' not in pattern and not pattern.endswith('\n')
+
+
+class CompiledCriterion(object):
+    """
+    Single compiled criterion (payload key, operator and pattern).
+
+    Errors which happen during the compilation are stored and reported when the criterion is
+    evaluated, same as if the criterion wasn't compiled.
+    """
+
+    def __init__(self, key, criterion):
+        self.key = key
+        self.operator = criterion.get('type', None)
+        self.pattern = criterion.get('pattern', None)
+
+        # Static patterns are used as they are, the other ones are rendered for every evaluation
+        self.is_static_pattern = is_static_pattern(self.pattern)
+        self.static_pattern = (self.pattern or None) if self.is_static_pattern else None
+
+        self.expression = None
+        self.expression_error = None
+        self.operator_func = None
+        self.operator_error = None
+
+        try:
+            self.expression = parse_expression(key)
+        except Exception as e:
+            self.expression_error = e
+
+        if self.operator is not None:
+            try:
+                self.operator_func = criteria_operators.get_operator(self.operator)
+            except Exception as e:
+                self.operator_error = e
+
+        if self.operator_func is criteria_operators.match_regex and self.static_pattern:
+            self.operator_func = _get_compiled_regex_operator(self.static_pattern)
+
+    def get_operator_func(self):
+        """
+        Return the resolved operator function.
+
+        :raises: Exception if the operator is invalid.
+        """
+        if self.operator_error:
+            raise self.operator_error
+
+        return self.operator_func
+
+
+class CompiledCriteria(object):
+    """
+    Compiled criteria of a rule. Criteria are evaluated in the same order as the criteria dict.
+    """
+
+    def __init__(self, criteria):
+        self.criteria = [CompiledCriterion(key=key, criterion=criteria[key])
+                         for key in (criteria or {}).keys()]
+
+    def __len__(self):
+        return len(self.criteria)
+
+    def __iter__(self):
+        return iter(self.criteria)
+
+
+def _get_compiled_regex_operator(pattern):
+    """
+    Return an equivalent of ``operators.match_regex`` for the provided static pattern.
+    """
+    try:
+        regex = re.compile(pattern)
+    except Exception:
+        # Invalid pattern, let the regular operator report the error during the evaluation
+        return criteria_operators.match_regex
+
+    def match_compiled_regex(value, criteria_pattern):
+        return regex.match(value) is not None
+
+    return match_compiled_regex
+
+
+def compile_criteria(criteria):
+    """
+    Compile the provided rule criteria.
+
+    :param criteria: Rule criteria (``RuleDB.criteria``).
+    :type criteria: ``dict``
+
+    :rtype: :class:`CompiledCriteria`
+    """
+    return CompiledCriteria(criteria=criteria)
@@ -23,6 +23,14 @@ LOG = logging.getLogger('st2reactor.rules.RulesEngine')
 
 
 class RulesEngine(object):
+    def __init__(self, rules_index=None):
+        """
+        :param rules_index: In-memory index of the enabled rules. If not provided, the trigger and
+                            the rules are retrieved from the database for every trigger instance.
+        :type rules_index: :class:`RulesIndex`
+        """
+        self.rules_index = rules_index
+
     def handle_trigger_instance(self, trigger_instance):
         # Find matching rules for trigger instance.
         matching_rules = self.get_matching_rules_for_trigger(trigger_instance)
@@ -34,15 +42,26 @@ class RulesEngine(object):
         self.enforce_rules(enforcers)
 
     def get_matching_rules_for_trigger(self, trigger_instance):
-        trigger = trigger_instance.trigger
-        trigger = get_trigger_db_by_ref(trigger_instance.trigger)
-        rules = Rule.query(trigger=trigger_instance.trigger, enabled=True)
-        LOG.info('Found %d rules defined for trigger %s (type=%s)', len(rules), trigger['name'],
-                 trigger['type'])
-        matcher = RulesMatcher(trigger_instance=trigger_instance,
-                               trigger=trigger, rules=rules)
+        if self.rules_index:
+            trigger, network = self.rules_index.get_network(trigger_instance.trigger)
+
+            if not trigger:
+                LOG.info('Found 0 rules defined for trigger %s', trigger_instance.trigger)
+                return []
+
+            LOG.info('Found %d rules defined for trigger %s (type=%s)', len(network.rules),
+                     trigger['name'], trigger['type'])
+            matching_rules = network.get_matching_rules(trigger_instance=trigger_instance,
+                                                        trigger=trigger)
+        else:
+            trigger = get_trigger_db_by_ref(trigger_instance.trigger)
+            rules = Rule.query(trigger=trigger_instance.trigger, enabled=True)
+            LOG.info('Found %d rules defined for trigger %s (type=%s)', len(rules),
+                     trigger['name'], trigger['type'])
+            matcher = RulesMatcher(trigger_instance=trigger_instance,
+                                   trigger=trigger, rules=rules)
+            matching_rules = matcher.get_matching_rules()
 
-        matching_rules = matcher.get_matching_rules()
         LOG.info('Matched %s rule(s) for trigger_instance %s (type=%s)', len(matching_rules),
                  trigger['name'], trigger['type'])
         return matching_rules
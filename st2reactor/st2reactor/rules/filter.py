@@ -14,21 +14,20 @@
 # limitations under the License.
 
 import six
-from jsonpath_rw import parse
 
 from st2common import log as logging
-import st2common.operators as criteria_operators
 from st2common.constants.rules import TRIGGER_PAYLOAD_PREFIX
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
 from st2common.util.templating import render_template_with_system_context
+from st2reactor.rules.criteria import compile_criteria, parse_expression
 
 
 LOG = logging.getLogger('st2reactor.ruleenforcement.filter')
 
 
 class RuleFilter(object):
-    def __init__(self, trigger_instance, trigger, rule):
+    def __init__(self, trigger_instance, trigger, rule, compiled_criteria=None):
         """
         :param trigger_instance: TriggerInstance DB object.
         :type trigger_instance: :class:`TriggerInstanceDB``
@@ -38,10 +37,15 @@ class RuleFilter(object):
 
         :param rule: Rule DB object.
         :type rule: :class:`RuleDB`
+
+        :param compiled_criteria: Compiled criteria of the rule. Compiled on the fly if not
+                                  provided.
+        :type compiled_criteria: :class:`CompiledCriteria`
         """
         self.trigger_instance = trigger_instance
         self.trigger = trigger
         self.rule = rule
+        self.compiled_criteria = compiled_criteria
 
         # Base context used with a logger
         self._base_logger_context = {
@@ -62,7 +66,9 @@ class RuleFilter(object):
         if not self.rule.enabled:
             return False
 
-        criteria = self.rule.criteria
+        criteria = self.compiled_criteria
+        if criteria is None:
+            criteria = compile_criteria(self.rule.criteria)
         is_rule_applicable = True
 
         if criteria and not self.trigger_instance.payload:
@@ -73,9 +79,8 @@ class RuleFilter(object):
         LOG.debug('Trigger payload: %s', self.trigger_instance.payload,
                   extra=self._base_logger_context)
 
-        for criterion_k in criteria.keys():
-            criterion_v = criteria[criterion_k]
-            is_rule_applicable = self._check_criterion(criterion_k, criterion_v, payload_lookup)
+        for criterion in criteria:
+            is_rule_applicable = self._check_criterion(criterion, payload_lookup)
             if not is_rule_applicable:
                 break
 
@@ -85,24 +90,30 @@ class RuleFilter(object):
 
         return is_rule_applicable
 
-    def _check_criterion(self, criterion_k, criterion_v, payload_lookup):
-        if 'type' not in criterion_v:
+    def _check_criterion(self, criterion, payload_lookup):
+        if criterion.operator is None:
             # Comparison operator type not specified, can't perform a comparison
             return False
 
-        criteria_operator = criterion_v['type']
-        criteria_pattern = criterion_v.get('pattern', None)
+        criterion_k = criterion.key
+        criteria_pattern = criterion.pattern
 
         # Render the pattern (it can contain a jinja expressions)
-        try:
-            criteria_pattern = self._render_criteria_pattern(criteria_pattern=criteria_pattern)
-        except Exception:
-            LOG.exception('Failed to render pattern value "%s" for key "%s"' %
-                          (criteria_pattern, criterion_k), extra=self._base_logger_context)
-            return False
+        if criterion.is_static_pattern:
+            criteria_pattern = criterion.static_pattern
+        else:
+            try:
+                criteria_pattern = self._render_criteria_pattern(criteria_pattern=criteria_pattern)
+            except Exception:
+                LOG.exception('Failed to render pattern value "%s" for key "%s"' %
+                              (criteria_pattern, criterion_k), extra=self._base_logger_context)
+                return False
 
         try:
-            matches = payload_lookup.get_value(criterion_k)
+            if criterion.expression_error:
+                raise criterion.expression_error
+
+            matches = payload_lookup.get_value_for_expression(criterion.expression)
             # pick value if only 1 matches else will end up being an array match.
             if matches:
                 payload_value = matches[0] if len(matches) > 0 else matches
@@ -113,7 +124,7 @@ class RuleFilter(object):
                           extra=self._base_logger_context)
             return False
 
-        op_func = criteria_operators.get_operator(criteria_operator)
+        op_func = criterion.get_operator_func()
 
         try:
             result = op_func(value=payload_value, criteria_pattern=criteria_pattern)
@@ -146,8 +157,13 @@ class PayloadLookup():
         }
 
     def get_value(self, lookup_key):
-        expr = parse(lookup_key)
-        matches = [match.value for match in expr.find(self._context)]
+        return self.get_value_for_expression(parse_expression(lookup_key))
+
+    def get_value_for_expression(self, expression):
+        """
+        Same as ``get_value``, but for an already parsed lookup key.
+        """
+        matches = [match.value for match in expression.find(self._context)]
         if not matches:
             return None
         return matches
@@ -0,0 +1,324 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory index of the enabled rules keyed by the trigger reference.
+
+The index is loaded from the database on start and then kept up to date with the rule and trigger
+CUD events. A periodic full resync protects against missed events (e.g. while the message bus
+connection is down). Events received while a resync is loading the rules are applied again once
+the reloaded state is swapped in, so they are not lost. Matching the rules for a trigger instance
+doesn't hit the database.
+
+Rules of each trigger are matched using a discrimination network (see ``RulesNetwork``) which is
+built on the first use and rebuilt after the rules of the trigger change.
+"""
+
+import uuid
+from collections import OrderedDict
+
+import eventlet
+from eventlet import semaphore
+from kombu import Connection, Queue, binding
+
+from st2common import log as logging
+from st2common.persistence.rule import Rule
+from st2common.services.triggers import get_trigger_db_by_ref
+from st2common.transport import publishers, reactor, serializers
+from st2common.transport.consumers import ConsumerMixin
+from st2common.transport import utils as transport_utils
+from st2reactor.rules.criteria import compile_criteria
+from st2reactor.rules.network import RulesNetwork
+
+__all__ = [
+    'RulesIndex',
+    'RulesIndexWatcher'
+]
+
+LOG = logging.getLogger(__name__)
+
+
+class RulesIndex(object):
+
+    def __init__(self, resync_interval=300):
+        """
+        :param resync_interval: Interval in seconds between the full reloads of the index. 0 to
+                                disable the periodic reload.
+        :type resync_interval: ``int``
+        """
+        self._resync_interval = resync_interval
+
+        # trigger ref -> TriggerDB (None if the trigger doesn't exist)
+        self._triggers = {}
+        # trigger ref -> ordered dict of rule id -> RuleDB
+        self._rules = {}
+        # rule id -> CompiledCriteria
+        self._compiled_criteria = {}
+        # rule id -> trigger ref
+        self._rule_trigger_refs = {}
+        # trigger ref -> RulesNetwork
+        self._networks = {}
+
+        # Serializes the event handlers with the swap of a resync
+        self._lock = semaphore.Semaphore()
+        # (handler, model object) of the events received during a resync, None if there's no
+        # resync in progress
+        self._resync_events = None
+
+        self._watcher = None
+        self._resync_thread = None
+
+    def start(self):
+        self.resync()
+
+        self._watcher = RulesIndexWatcher(index=self)
+        self._watcher.start()
+
+        if self._resync_interval > 0:
+            self._resync_thread = eventlet.spawn(self._resync_periodically)
+
+    def stop(self):
+        if self._resync_thread:
+            self._resync_thread = eventlet.kill(self._resync_thread)
+
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+
+    def get_rules(self, trigger_ref):
+        """
+        Retrieve the enabled rules of the provided trigger.
+
+        :return: Tuple of the trigger (``None`` if not known), the list of the enabled rules and
+                 the compiled criteria keyed by the rule id.
+        :rtype: ``tuple``
+        """
+        rules = self._rules.get(trigger_ref, None)
+
+        if not rules:
+            return self._triggers.get(trigger_ref, None), [], {}
+
+        return self._triggers.get(trigger_ref, None), list(rules.values()), self._compiled_criteria
+
+    def get_network(self, trigger_ref):
+        """
+        Retrieve the discrimination network of the enabled rules of the provided trigger.
+
+        :return: Tuple of the trigger (``None`` if not known) and the network.
+        :rtype: ``tuple``
+        """
+        network = self._networks.get(trigger_ref, None)
+
+        if network is None:
+            _, rules, compiled_criteria = self.get_rules(trigger_ref)
+            network = RulesNetwork(rules=rules, compiled_criteria=compiled_criteria)
+
+            if rules:
+                self._networks[trigger_ref] = network
+
+        return self._triggers.get(trigger_ref, None), network
+
+    def resync(self):
+        """
+        Reload the whole index from the database.
+        """
+        triggers = {}
+        rules = {}
+        compiled_criteria = {}
+        rule_trigger_refs = {}
+
+        with self._lock:
+            self._resync_events = []
+
+        try:
+            for rule_db in Rule.query(enabled=True):
+                trigger_ref = rule_db.trigger
+
+                if trigger_ref not in triggers:
+                    triggers[trigger_ref] = get_trigger_db_by_ref(trigger_ref)
+
+                rules.setdefault(trigger_ref, OrderedDict())[rule_db.id] = rule_db
+                compiled_criteria[rule_db.id] = compile_criteria(rule_db.criteria)
+                rule_trigger_refs[rule_db.id] = trigger_ref
+
+            with self._lock:
+                # Swap the whole state at once so the lookups never see a partially loaded index
+                self._triggers = triggers
+                self._rules = rules
+                self._compiled_criteria = compiled_criteria
+                self._rule_trigger_refs = rule_trigger_refs
+                self._networks = {}
+
+                # The loaded rules might predate the events received in the meantime
+                for handler, model_object in self._resync_events:
+                    handler(model_object)
+        finally:
+            self._resync_events = None
+
+        LOG.debug('Loaded %s enabled rules of %s triggers.', len(rule_trigger_refs),
+                  len(triggers))
+
+    def add_rule(self, rule_db):
+        """
+        Add or replace the provided rule. Disabled rules are removed from the index.
+        """
+        self._handle_event(self._add_rule, rule_db)
+
+    def remove_rule(self, rule_db):
+        self._handle_event(self._remove_rule, rule_db)
+
+    def add_trigger(self, trigger_db):
+        """
+        Add or replace the provided trigger. Only the triggers of the indexed rules are kept.
+        """
+        self._handle_event(self._add_trigger, trigger_db)
+
+    def remove_trigger(self, trigger_db):
+        self._handle_event(self._remove_trigger, trigger_db)
+
+    def _handle_event(self, handler, model_object):
+        with self._lock:
+            handler(model_object)
+
+            if self._resync_events is not None:
+                self._resync_events.append((handler, model_object))
+
+    def _add_rule(self, rule_db):
+        self._remove_rule(rule_db)
+
+        if not rule_db.enabled:
+            return
+
+        trigger_ref = rule_db.trigger
+
+        if trigger_ref not in self._triggers:
+            self._triggers[trigger_ref] = get_trigger_db_by_ref(trigger_ref)
+
+        self._compiled_criteria[rule_db.id] = compile_criteria(rule_db.criteria)
+        self._rule_trigger_refs[rule_db.id] = trigger_ref
+        self._rules.setdefault(trigger_ref, OrderedDict())[rule_db.id] = rule_db
+        self._networks.pop(trigger_ref, None)
+
+    def _remove_rule(self, rule_db):
+        trigger_ref = self._rule_trigger_refs.pop(rule_db.id, None)
+
+        if trigger_ref is None:
+            return
+
+        self._compiled_criteria.pop(rule_db.id, None)
+        self._networks.pop(trigger_ref, None)
+
+        rules = self._rules.get(trigger_ref, {})
+        rules.pop(rule_db.id, None)
+
+        if not rules:
+            self._rules.pop(trigger_ref, None)
+            self._triggers.pop(trigger_ref, None)
+
+    def _add_trigger(self, trigger_db):
+        trigger_ref = trigger_db.get_reference().ref
+
+        if trigger_ref in self._rules:
+            self._triggers[trigger_ref] = trigger_db
+
+    def _remove_trigger(self, trigger_db):
+        trigger_ref = trigger_db.get_reference().ref
+
+        if trigger_ref in self._triggers:
+            self._triggers[trigger_ref] = None
+
+    def _resync_periodically(self):
+        while True:
+            eventlet.sleep(self._resync_interval)
+
+            try:
+                self.resync()
+            except Exception:
+                LOG.exception('Failed to reload the rules index.')
+
+
+class RulesIndexWatcher(ConsumerMixin):
+    """
+    Consumer of the rule and trigger CUD events which keeps the provided index up to date.
+    """
+
+    def __init__(self, index):
+        self._queue = self._get_queue()
+
+        # (exchange name, routing key) -> handler
+        self._handlers = {
+            (reactor.RULE_CUD_XCHG.name, publishers.CREATE_RK): index.add_rule,
+            (reactor.RULE_CUD_XCHG.name, publishers.UPDATE_RK): index.add_rule,
+            (reactor.RULE_CUD_XCHG.name, publishers.DELETE_RK): index.remove_rule,
+            (reactor.TRIGGER_CUD_XCHG.name, publishers.CREATE_RK): index.add_trigger,
+            (reactor.TRIGGER_CUD_XCHG.name, publishers.UPDATE_RK): index.add_trigger,
+            (reactor.TRIGGER_CUD_XCHG.name, publishers.DELETE_RK): index.remove_trigger
+        }
+
+        self.connection = None
+        self._updates_thread = None
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=[self._queue],
+                         accept=serializers.ACCEPTED_SERIALIZERS,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        key = (message.delivery_info.get('exchange', ''),
+               message.delivery_info.get('routing_key', ''))
+        handler = self._handlers.get(key, None)
+
+        try:
+            if not handler:
+                LOG.debug('Skipping message %s as no handler was found.', message)
+                return
+
+            try:
+                handler(body)
+            except Exception:
+                LOG.exception('Rules index update failed. Message body: %s', body)
+        finally:
+            message.ack()
+
+    def start(self):
+        if self._updates_thread is not None:
+            return
+
+        try:
+            self.connection = Connection(transport_utils.get_messaging_urls())
+            self._updates_thread = eventlet.spawn(self.run)
+        except:
+            LOG.exception('Failed to start rules index watcher.')
+            self._release_connection()
+
+    def stop(self):
+        try:
+            if self._updates_thread is not None:
+                self._updates_thread = eventlet.kill(self._updates_thread)
+        finally:
+            self._release_connection()
+
+    def _release_connection(self):
+        if self.connection is not None:
+            self.connection.release()
+            self.connection = None
+
+    @staticmethod
+    def _get_queue():
+        u_hex = uuid.uuid4().hex
+        queue_name = 'st2.rules.index.watch.%s' % (u_hex[len(u_hex) - 10:])
+        bindings = [binding(reactor.RULE_CUD_XCHG, routing_key='#'),
+                    binding(reactor.TRIGGER_CUD_XCHG, routing_key='#')]
+        return Queue(queue_name, bindings=bindings, exclusive=True, auto_delete=True)
@@ -20,13 +20,20 @@ LOG = logging.getLogger('st2reactor.rules.RulesMatcher')
 
 
 class RulesMatcher(object):
-    def __init__(self, trigger_instance, trigger, rules):
+    def __init__(self, trigger_instance, trigger, rules, compiled_criteria=None):
+        """
+        :param compiled_criteria: Compiled criteria of the rules by the rule id. Criteria of the
+                                  rules which are not included are compiled on the fly.
+        :type compiled_criteria: ``dict``
+        """
         self.trigger_instance = trigger_instance
         self.trigger = trigger
         self.rules = rules
+        self.compiled_criteria = compiled_criteria or {}
 
     def get_matching_rules(self):
-        rule_filters = [RuleFilter(self.trigger_instance, self.trigger, rule)
+        rule_filters = [RuleFilter(self.trigger_instance, self.trigger, rule,
+                                   compiled_criteria=self.compiled_criteria.get(rule.id, None))
                         for rule in self.rules]
         matched_rules = [rule_filter.rule for rule_filter in rule_filters if rule_filter.filter()]
         LOG.info('%d rule(s) found to enforce for %s.', len(matched_rules),
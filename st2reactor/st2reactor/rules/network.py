@@ -0,0 +1,245 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Discrimination network of the rules of a trigger.
+
+Criteria of all the rules of a trigger are split into the distinct payload extractions (lookup
+keys) and the distinct tests (key, operator and pattern). Each extraction and each test is
+evaluated at most once per trigger instance no matter how many rules share it, and the equality
+tests with a static pattern on the same key are resolved with a single hash lookup. Rules which
+match are the same as the ones ``RulesMatcher`` returns.
+"""
+
+from st2common import log as logging
+import st2common.operators as criteria_operators
+from st2common.util.templating import render_template_with_system_context
+from st2reactor.rules.criteria import compile_criteria
+from st2reactor.rules.filter import PayloadLookup
+
+__all__ = [
+    'RulesNetwork'
+]
+
+LOG = logging.getLogger(__name__)
+
+
+class RulesNetwork(object):
+
+    def __init__(self, rules, compiled_criteria=None):
+        """
+        :param rules: Rules of a single trigger.
+        :type rules: ``list`` of :class:`RuleDB`
+
+        :param compiled_criteria: Compiled criteria of the rules by the rule id. Criteria of the
+                                  rules which are not included are compiled.
+        :type compiled_criteria: ``dict``
+        """
+        compiled_criteria = compiled_criteria or {}
+
+        # test id -> CompiledCriterion
+        self._tests = {}
+        # lookup key -> dict of pattern -> list of ids of the equality tests with that pattern
+        self._equality_tests = {}
+        # equality test id -> lookup key
+        self._equality_test_keys = {}
+        # list of (rule, ids of the tests of the rule in the criteria order)
+        self._rule_tests = []
+
+        for rule in rules:
+            criteria = compiled_criteria.get(rule.id, None)
+            if criteria is None:
+                criteria = compile_criteria(rule.criteria)
+
+            test_ids = [self._add_test(criterion) for criterion in criteria]
+            self._rule_tests.append((rule, test_ids))
+
+    @property
+    def rules(self):
+        return [rule for rule, _ in self._rule_tests]
+
+    def get_stats(self):
+        return {
+            'rules': len(self._rule_tests),
+            'tests': len(self._tests),
+            'extractions': len(set([criterion.key for criterion in self._tests.values()])),
+            'equality_tests': len(self._equality_test_keys)
+        }
+
+    def get_matching_rules(self, trigger_instance, trigger):
+        """
+        Return the rules which are applicable to the provided trigger instance.
+
+        :rtype: ``list`` of :class:`RuleDB`
+        """
+        evaluation = _NetworkEvaluation(network=self, trigger_instance=trigger_instance,
+                                        trigger=trigger)
+        matching_rules = [rule for rule, test_ids in self._rule_tests
+                          if evaluation.is_applicable(rule=rule, test_ids=test_ids)]
+
+        LOG.info('%d rule(s) found to enforce for %s.', len(matching_rules), trigger['name'])
+        return matching_rules
+
+    def _add_test(self, criterion):
+        test_id = (criterion.key, criterion.operator, repr(criterion.pattern))
+
+        if test_id in self._tests:
+            return test_id
+
+        self._tests[test_id] = criterion
+
+        if self._is_hashable_equality_test(criterion):
+            patterns = self._equality_tests.setdefault(criterion.key, {})
+            patterns.setdefault(criterion.static_pattern, []).append(test_id)
+            self._equality_test_keys[test_id] = criterion.key
+
+        return test_id
+
+    @staticmethod
+    def _is_hashable_equality_test(criterion):
+        if criterion.operator is None or criterion.operator_error:
+            return False
+
+        if criterion.operator_func is not criteria_operators.equals:
+            return False
+
+        # Equals never matches a missing pattern
+        if not criterion.is_static_pattern or criterion.static_pattern is None:
+            return False
+
+        try:
+            hash(criterion.static_pattern)
+        except TypeError:
+            return False
+
+        return True
+
+
+class _NetworkEvaluation(object):
+    """
+    Results of the network tests for a single trigger instance.
+    """
+
+    def __init__(self, network, trigger_instance, trigger):
+        self._network = network
+        self._payload = trigger_instance.payload
+        self._payload_lookup = PayloadLookup(self._payload)
+
+        # lookup key -> (success, value)
+        self._values = {}
+        # test id -> result
+        self._results = {}
+
+        # Base context used with a logger
+        self._base_logger_context = {
+            'trigger': trigger,
+            'trigger_instance': trigger_instance
+        }
+
+    def is_applicable(self, rule, test_ids):
+        if not rule.enabled:
+            return False
+
+        if test_ids and not self._payload:
+            return False
+
+        for test_id in test_ids:
+            if not self._get_result(test_id):
+                LOG.debug('Rule %s not applicable.', rule.id, extra=self._base_logger_context)
+                return False
+
+        return True
+
+    def _get_result(self, test_id):
+        if test_id not in self._results:
+            key = self._network._equality_test_keys.get(test_id, None)
+
+            if key is not None:
+                self._evaluate_equality_tests(key=key, criterion=self._network._tests[test_id])
+            else:
+                self._results[test_id] = self._evaluate_test(self._network._tests[test_id])
+
+        return self._results[test_id]
+
+    def _evaluate_equality_tests(self, key, criterion):
+        """
+        Evaluate all the equality tests of the provided lookup key at once.
+        """
+        patterns = self._network._equality_tests[key]
+        success, value = self._get_value(criterion)
+        matching_test_ids = []
+
+        if success:
+            try:
+                matching_test_ids = patterns.get(value, [])
+            except TypeError:
+                # Unhashable value (e.g. list or dict), compare it with each of the patterns
+                matching_test_ids = [test_id for pattern, test_ids in patterns.items()
+                                     if value == pattern for test_id in test_ids]
+
+        for test_ids in patterns.values():
+            for test_id in test_ids:
+                self._results[test_id] = False
+
+        for test_id in matching_test_ids:
+            self._results[test_id] = True
+
+    def _evaluate_test(self, criterion):
+        if criterion.operator is None:
+            # Comparison operator type not specified, can't perform a comparison
+            return False
+
+        if criterion.is_static_pattern:
+            criteria_pattern = criterion.static_pattern
+        else:
+            try:
+                criteria_pattern = render_template_with_system_context(value=criterion.pattern)
+            except Exception:
+                LOG.exception('Failed to render pattern value "%s" for key "%s"' %
+                              (criterion.pattern, criterion.key),
+                              extra=self._base_logger_context)
+                return False
+
+        success, payload_value = self._get_value(criterion)
+        if not success:
+            return False
+
+        op_func = criterion.get_operator_func()
+
+        try:
+            return op_func(value=payload_value, criteria_pattern=criteria_pattern)
+        except Exception:
+            LOG.exception('There might be a problem with criteria %s.', criterion.key,
+                          extra=self._base_logger_context)
+            return False
+
+    def _get_value(self, criterion):
+        if criterion.key in self._values:
+            return self._values[criterion.key]
+
+        try:
+            if criterion.expression_error:
+                raise criterion.expression_error
+
+            matches = self._payload_lookup.get_value_for_expression(criterion.expression)
+            # pick value if only 1 matches else will end up being an array match.
+            value = (True, matches[0] if matches else None)
+        except Exception:
+            LOG.exception('Failed transforming criteria key %s', criterion.key,
+                          extra=self._base_logger_context)
+            value = (False, None)
+
+        self._values[criterion.key] = value
+        return value
@@ -14,15 +14,19 @@
 # limitations under the License.
 
 from kombu import Connection
+from oslo_config import cfg
 
 from st2common import log as logging
 from st2common.constants.trace import TRACE_CONTEXT, TRACE_ID
 from st2common.util import date as date_utils
+from st2common.persistence.trigger import TriggerInstance
+from st2common.services.bulkwriter import BulkWriter
 from st2common.services.trace import add_or_update_given_trace_context
 from st2common.transport import consumers, reactor
 from st2common.transport import utils as transport_utils
 import st2reactor.container.utils as container_utils
 from st2reactor.rules.engine import RulesEngine
+from st2reactor.rules.index import RulesIndex
 
 
 LOG = logging.getLogger(__name__)
@@ -36,7 +40,29 @@ class TriggerInstanceDispatcher(consumers.MessageHandler):
 
     def __init__(self, connection, queues):
         super(TriggerInstanceDispatcher, self).__init__(connection, queues)
-        self.rules_engine = RulesEngine()
+        self._rules_index = None
+        if cfg.CONF.rulesengine.rules_index:
+            self._rules_index = RulesIndex(
+                resync_interval=cfg.CONF.rulesengine.rules_index_resync_interval)
+        self.rules_engine = RulesEngine(rules_index=self._rules_index)
+        self._trigger_instance_writer = BulkWriter(
+            resource_cls=TriggerInstance,
+            batch_size=cfg.CONF.rulesengine.trigger_instance_batch_size,
+            batch_window=cfg.CONF.rulesengine.trigger_instance_batch_window)
+
+    def start(self, wait=False):
+        # Rules need to be loaded before the first trigger instance is processed
+        if self._rules_index:
+            self._rules_index.start()
+
+        super(TriggerInstanceDispatcher, self).start(wait=wait)
+
+    def shutdown(self):
+        super(TriggerInstanceDispatcher, self).shutdown()
+        self._trigger_instance_writer.shutdown()
+
+        if self._rules_index:
+            self._rules_index.stop()
 
     def process(self, instance):
         trigger = instance['trigger']
@@ -48,7 +74,8 @@ class TriggerInstanceDispatcher(consumers.MessageHandler):
                 trigger,
                 payload or {},
                 date_utils.get_datetime_utc_now(),
-                raise_on_no_trigger=True)
+                raise_on_no_trigger=True,
+                writer=self._trigger_instance_writer)
         except:
             # We got a trigger ref but we were unable to create a trigger instance.
             # This could be because a trigger object wasn't found in db for the ref.
@@ -77,6 +104,30 @@ class TriggerInstanceDispatcher(consumers.MessageHandler):
                 return
 
 
+def get_rules_engine_queue():
+    """
+    Return the work queue of this rules engine.
+
+    By default all the trigger instances are consumed from a single shared queue. If
+    ``rulesengine.buckets`` is configured, only the trigger instances which fall into those
+    buckets are consumed. Rules engines configured with the same buckets share a queue.
+    """
+    buckets = sorted(set([int(bucket) for bucket in cfg.CONF.rulesengine.buckets]))
+
+    if not buckets:
+        return RULESENGINE_WORK_Q
+
+    bucket_count = cfg.CONF.messaging.trigger_instance_buckets
+    invalid_buckets = [bucket for bucket in buckets if bucket < 0 or bucket >= bucket_count]
+    if invalid_buckets:
+        raise ValueError('Invalid buckets %s. Buckets need to be between 0 and %s.' %
+                         (invalid_buckets, bucket_count - 1))
+
+    name = '%s.buckets-%s' % (RULESENGINE_WORK_Q.name,
+                              '-'.join([str(bucket) for bucket in buckets]))
+    return reactor.get_trigger_instances_buckets_queue(name=name, buckets=buckets)
+
+
 def get_worker():
     with Connection(transport_utils.get_messaging_urls()) as conn:
-        return TriggerInstanceDispatcher(conn, [RULESENGINE_WORK_Q])
+        return TriggerInstanceDispatcher(conn, [get_rules_engine_queue()])
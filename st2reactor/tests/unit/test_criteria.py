@@ -0,0 +1,75 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+import st2common.operators as criteria_operators
+from st2reactor.rules.criteria import compile_criteria, is_static_pattern, parse_expression
+
+
+class CompiledCriteriaTestCase(unittest2.TestCase):
+
+    def test_is_static_pattern(self):
+        self.assertTrue(is_static_pattern(None))
+        self.assertTrue(is_static_pattern(''))
+        self.assertTrue(is_static_pattern(10))
+        self.assertTrue(is_static_pattern(['{{a}}']))
+        self.assertTrue(is_static_pattern('foo.*bar{1,3}'))
+        self.assertFalse(is_static_pattern('{{system.key}}'))
+        self.assertFalse(is_static_pattern('{% if 1 %}a{% endif %}'))
+        self.assertFalse(is_static_pattern('foo\n'))
+
+    def test_compile_criteria(self):
+        criteria = compile_criteria({
+            'trigger.k1': {'type': 'equals', 'pattern': 'v1'},
+            'trigger.k2': {'type': 'equals', 'pattern': '{{system.k2}}'},
+            'trigger.k3': {'type': 'exists'},
+            'trigger.k4': {'pattern': 'v4'},
+            'trigger.k5': {'type': 'unknown', 'pattern': 'v5'}
+        })
+        criteria = dict([(criterion.key, criterion) for criterion in criteria])
+
+        self.assertTrue(criteria['trigger.k1'].is_static_pattern)
+        self.assertEqual(criteria['trigger.k1'].static_pattern, 'v1')
+        self.assertEqual(criteria['trigger.k1'].get_operator_func(), criteria_operators.equals)
+        self.assertFalse(criteria['trigger.k2'].is_static_pattern)
+        self.assertEqual(criteria['trigger.k2'].static_pattern, None)
+        self.assertTrue(criteria['trigger.k3'].is_static_pattern)
+        self.assertEqual(criteria['trigger.k3'].static_pattern, None)
+        self.assertEqual(criteria['trigger.k4'].operator, None)
+        self.assertRaises(Exception, criteria['trigger.k5'].get_operator_func)
+
+    def test_static_regex_is_precompiled(self):
+        criteria = list(compile_criteria({'trigger.k1': {'type': 'matchregex',
+                                                         'pattern': 'foo.*'}}))
+        op_func = criteria[0].get_operator_func()
+        self.assertNotEqual(op_func, criteria_operators.match_regex)
+        self.assertTrue(op_func(value='foobar', criteria_pattern='foo.*'))
+        self.assertFalse(op_func(value='barfoo', criteria_pattern='foo.*'))
+
+        # Dynamic patterns are compiled during the evaluation
+        criteria = list(compile_criteria({'trigger.k1': {'type': 'matchregex',
+                                                         'pattern': '{{system.regex}}'}}))
+        self.assertEqual(criteria[0].get_operator_func(), criteria_operators.match_regex)
+
+    def test_invalid_regex_is_reported_on_evaluation(self):
+        criteria = list(compile_criteria({'trigger.k1': {'type': 'matchregex',
+                                                         'pattern': '('}}))
+        op_func = criteria[0].get_operator_func()
+        self.assertEqual(op_func, criteria_operators.match_regex)
+        self.assertRaises(Exception, op_func, value='foo', criteria_pattern='(')
+
+    def test_parse_expression_is_cached(self):
+        self.assertIs(parse_expression('trigger.k1.k2'), parse_expression('trigger.k1.k2'))
@@ -0,0 +1,190 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import mock
+import unittest2
+from eventlet import greenthread, hubs
+
+import st2tests.config as tests_config
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerDB, TriggerInstanceDB
+from st2common.util import date as date_utils
+from st2reactor.rules.engine import RulesEngine
+from st2reactor.rules.index import RulesIndex, RulesIndexWatcher
+
+TRIGGER_1 = TriggerDB(name='trigger1', pack='dummy_pack_1', type='dummy_pack_1.trigger_type1')
+TRIGGER_2 = TriggerDB(name='trigger2', pack='dummy_pack_1', type='dummy_pack_1.trigger_type2')
+TRIGGERS = {
+    'dummy_pack_1.trigger1': TRIGGER_1,
+    'dummy_pack_1.trigger2': TRIGGER_2
+}
+
+
+def _get_rule(name, trigger, criteria=None, enabled=True):
+    return RuleDB(id=bson.ObjectId(), name=name, pack='dummy_pack_1', trigger=trigger,
+                  criteria=criteria or {}, enabled=enabled)
+
+
+RULE_1 = _get_rule('rule1', 'dummy_pack_1.trigger1',
+                   criteria={'trigger.k1': {'type': 'equals', 'pattern': 'v1'}})
+RULE_2 = _get_rule('rule2', 'dummy_pack_1.trigger1')
+RULE_3 = _get_rule('rule3', 'dummy_pack_1.trigger2')
+
+
+@mock.patch('st2reactor.rules.index.get_trigger_db_by_ref',
+            mock.MagicMock(side_effect=TRIGGERS.get))
+@mock.patch('st2reactor.rules.index.Rule.query',
+            mock.MagicMock(return_value=[RULE_1, RULE_2, RULE_3]))
+class RulesIndexTestCase(unittest2.TestCase):
+
+    def test_resync(self):
+        index = RulesIndex()
+        index.resync()
+
+        trigger, rules, compiled_criteria = index.get_rules('dummy_pack_1.trigger1')
+        self.assertEqual(trigger, TRIGGER_1)
+        self.assertEqual(rules, [RULE_1, RULE_2])
+        self.assertEqual([criterion.key for criterion in compiled_criteria[RULE_1.id]],
+                         ['trigger.k1'])
+        self.assertEqual(len(compiled_criteria[RULE_2.id]), 0)
+
+        trigger, rules, _ = index.get_rules('dummy_pack_1.trigger2')
+        self.assertEqual(trigger, TRIGGER_2)
+        self.assertEqual(rules, [RULE_3])
+
+        self.assertEqual(index.get_rules('dummy_pack_1.unknown'), (None, [], {}))
+
+    def test_rule_events(self):
+        index = RulesIndex()
+        index.resync()
+
+        # Disabling a rule removes it
+        disabled_rule = _get_rule('rule3', 'dummy_pack_1.trigger2', enabled=False)
+        disabled_rule.id = RULE_3.id
+        index.add_rule(disabled_rule)
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger2'), (None, [], {}))
+
+        # Moving a rule to another trigger
+        moved_rule = _get_rule('rule2', 'dummy_pack_1.trigger2')
+        moved_rule.id = RULE_2.id
+        index.add_rule(moved_rule)
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger1')[1], [RULE_1])
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger2')[1], [moved_rule])
+
+        index.remove_rule(RULE_1)
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger1'), (None, [], {}))
+
+    def test_trigger_events(self):
+        index = RulesIndex()
+        index.resync()
+
+        updated_trigger = TriggerDB(name='trigger1', pack='dummy_pack_1',
+                                    type='dummy_pack_1.trigger_type1', parameters={'a': 1})
+        index.add_trigger(updated_trigger)
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger1')[0], updated_trigger)
+
+        index.remove_trigger(updated_trigger)
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger1')[0], None)
+
+        # Triggers without rules are not indexed
+        index.add_trigger(TriggerDB(name='trigger3', pack='dummy_pack_1'))
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger3'), (None, [], {}))
+
+    def test_events_received_during_resync_are_not_lost(self):
+        index = RulesIndex()
+        index.resync()
+
+        new_rule = _get_rule('rule4', 'dummy_pack_1.trigger2')
+
+        def query(**kwargs):
+            # Events are handled while the resync waits for the database
+            index.add_rule(new_rule)
+            index.remove_rule(RULE_1)
+            return [RULE_1, RULE_2, RULE_3]
+
+        with mock.patch('st2reactor.rules.index.Rule.query', mock.MagicMock(side_effect=query)):
+            index.resync()
+
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger1')[1], [RULE_2])
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger2')[1], [RULE_3, new_rule])
+
+        # Events are not buffered after the resync
+        index.remove_rule(new_rule)
+        self.assertEqual(index._resync_events, None)
+        self.assertEqual(index.get_rules('dummy_pack_1.trigger2')[1], [RULE_3])
+
+    def test_get_network(self):
+        index = RulesIndex()
+        index.resync()
+
+        trigger, network = index.get_network('dummy_pack_1.trigger1')
+        self.assertEqual(trigger, TRIGGER_1)
+        self.assertEqual(network.rules, [RULE_1, RULE_2])
+        self.assertIs(index.get_network('dummy_pack_1.trigger1')[1], network)
+
+        # Network is rebuilt after the rules of the trigger change
+        index.remove_rule(RULE_2)
+        _, network = index.get_network('dummy_pack_1.trigger1')
+        self.assertEqual(network.rules, [RULE_1])
+
+        trigger, network = index.get_network('dummy_pack_1.unknown')
+        self.assertEqual(trigger, None)
+        self.assertEqual(network.rules, [])
+
+    def test_get_matching_rules_for_trigger(self):
+        index = RulesIndex()
+        index.resync()
+        rules_engine = RulesEngine(rules_index=index)
+
+        trigger_instance = TriggerInstanceDB(trigger='dummy_pack_1.trigger1',
+                                             payload={'k1': 'v1'},
+                                             occurrence_time=date_utils.get_datetime_utc_now())
+        self.assertEqual(rules_engine.get_matching_rules_for_trigger(trigger_instance),
+                         [RULE_1, RULE_2])
+
+        trigger_instance.payload = {'k1': 'v2'}
+        self.assertEqual(rules_engine.get_matching_rules_for_trigger(trigger_instance),
+                         [RULE_2])
+
+        trigger_instance.trigger = 'dummy_pack_1.unknown'
+        self.assertEqual(rules_engine.get_matching_rules_for_trigger(trigger_instance), [])
+
+
+class RulesIndexWatcherTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    @mock.patch('st2reactor.rules.index.eventlet.spawn')
+    @mock.patch('st2reactor.rules.index.Connection', mock.MagicMock())
+    def test_start_spawns_single_thread(self, mock_spawn):
+        # Spawned thread which hasn't started yet is falsy
+        mock_spawn.return_value = greenthread.GreenThread(hubs.get_hub().greenlet)
+        self.assertFalse(mock_spawn.return_value)
+
+        watcher = RulesIndexWatcher(index=RulesIndex())
+        watcher.start()
+        watcher.start()
+        self.assertEqual(mock_spawn.call_count, 1)
+
+    @mock.patch('st2reactor.rules.index.Connection',
+                mock.MagicMock(side_effect=IOError('invalid messaging url')))
+    def test_start_failure(self):
+        watcher = RulesIndexWatcher(index=RulesIndex())
+        watcher.start()
+        self.assertEqual(watcher.connection, None)
+        watcher.stop()
@@ -0,0 +1,121 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import mock
+import unittest2
+
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerDB, TriggerInstanceDB
+from st2common.util import date as date_utils
+from st2reactor.rules.filter import PayloadLookup
+from st2reactor.rules.matcher import RulesMatcher
+from st2reactor.rules.network import RulesNetwork
+
+TRIGGER = TriggerDB(name='st2.generic.actiontrigger', pack='core',
+                    type='core.st2.generic.actiontrigger')
+
+
+def _get_rule(criteria, enabled=True):
+    return RuleDB(id=bson.ObjectId(), name='rule', pack='dummy_pack_1',
+                  trigger=TRIGGER.get_reference().ref, criteria=criteria, enabled=enabled)
+
+
+def _get_trigger_instance(payload):
+    return TriggerInstanceDB(trigger=TRIGGER.get_reference().ref, payload=payload,
+                             occurrence_time=date_utils.get_datetime_utc_now())
+
+
+RULES = [
+    _get_rule({}),
+    _get_rule({'trigger.status': {'type': 'equals', 'pattern': 'failed'}}),
+    _get_rule({'trigger.status': {'type': 'eq', 'pattern': 'failed'},
+               'trigger.action_ref': {'type': 'equals', 'pattern': 'core.local'}}),
+    _get_rule({'trigger.status': {'type': 'equals', 'pattern': 'succeeded'},
+               'trigger.action_ref': {'type': 'matchregex', 'pattern': 'core\\..*'}}),
+    _get_rule({'trigger.action_ref': {'type': 'matchregex', 'pattern': 'core\\..*'}}),
+    _get_rule({'trigger.status': {'type': 'nequals', 'pattern': 'failed'}}),
+    _get_rule({'trigger.parameters': {'type': 'equals', 'pattern': {'cmd': 'ls'}}}),
+    _get_rule({'trigger.tags': {'type': 'equals', 'pattern': 'tag1'}}),
+    _get_rule({'trigger.count': {'type': 'equals', 'pattern': 1}}),
+    _get_rule({'trigger.status': {'type': 'equals', 'pattern': ''}}),
+    _get_rule({'trigger.status': {'pattern': 'failed'}}),
+    _get_rule({'trigger.status': {'type': 'exists'}}),
+    _get_rule({'trigger.missing': {'type': 'equals', 'pattern': 'failed'}}),
+    _get_rule({'trigger.status': {'type': 'equals', 'pattern': 'failed'}}, enabled=False)
+]
+
+PAYLOADS = [
+    {},
+    {'status': 'failed', 'action_ref': 'core.local'},
+    {'status': 'failed', 'action_ref': 'linux.ls', 'count': 1},
+    {'status': 'succeeded', 'action_ref': 'core.remote', 'count': 1.0},
+    {'status': ['failed'], 'parameters': {'cmd': 'ls'}, 'tags': ['tag1', 'tag2']},
+    {'status': None, 'action_ref': 10}
+]
+
+
+class RulesNetworkTestCase(unittest2.TestCase):
+
+    def test_same_matching_rules_as_matcher(self):
+        network = RulesNetwork(rules=RULES)
+
+        for payload in PAYLOADS:
+            trigger_instance = _get_trigger_instance(payload)
+            matcher = RulesMatcher(trigger_instance=trigger_instance, trigger=TRIGGER,
+                                   rules=RULES)
+            expected = matcher.get_matching_rules()
+            self.assertTrue(expected or not payload)
+
+            self.assertEqual(network.get_matching_rules(trigger_instance=trigger_instance,
+                                                        trigger=TRIGGER),
+                             expected, 'Different rules matched for %s' % (payload))
+
+    def test_shared_tests(self):
+        network = RulesNetwork(rules=RULES)
+        self.assertEqual(network.get_stats(), {
+            'rules': len(RULES),
+            'tests': 13,
+            'extractions': 6,
+            'equality_tests': 7
+        })
+        self.assertEqual(network.rules, RULES)
+
+    def test_each_key_is_extracted_once(self):
+        network = RulesNetwork(rules=RULES)
+        trigger_instance = _get_trigger_instance(PAYLOADS[1])
+
+        with mock.patch.object(PayloadLookup, 'get_value_for_expression', autospec=True,
+                               side_effect=PayloadLookup.get_value_for_expression) as lookup:
+            network.get_matching_rules(trigger_instance=trigger_instance, trigger=TRIGGER)
+
+        keys = [str(call[0][1]) for call in lookup.call_args_list]
+        self.assertEqual(sorted(keys), sorted(set(keys)))
+        self.assertEqual(len(keys), 6)
+
+    @mock.patch('st2reactor.rules.network.render_template_with_system_context',
+                mock.MagicMock(return_value='failed'))
+    def test_dynamic_pattern_is_rendered_once(self):
+        from st2reactor.rules import network as network_module
+
+        rules = [_get_rule({'trigger.status': {'type': 'equals',
+                                               'pattern': '{{system.status}}'}})
+                 for _ in range(3)]
+        network = RulesNetwork(rules=rules)
+        trigger_instance = _get_trigger_instance(PAYLOADS[1])
+
+        self.assertEqual(network.get_matching_rules(trigger_instance=trigger_instance,
+                                                    trigger=TRIGGER), rules)
+        self.assertEqual(network_module.render_template_with_system_context.call_count, 1)
@@ -0,0 +1,51 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+from oslo_config import cfg
+
+import st2tests.config as tests_config
+from st2common.transport import reactor
+from st2reactor.rules import worker
+
+
+class RulesEngineQueueTest(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def tearDown(self):
+        cfg.CONF.clear_override(name='buckets', group='rulesengine')
+        super(RulesEngineQueueTest, self).tearDown()
+
+    def test_all_buckets(self):
+        queue = worker.get_rules_engine_queue()
+        self.assertEqual(queue, worker.RULESENGINE_WORK_Q)
+        self.assertEqual(queue.routing_key, '#')
+
+    def test_subset_of_buckets(self):
+        cfg.CONF.set_override(name='buckets', override=['3', '1', '3'], group='rulesengine')
+        queue = worker.get_rules_engine_queue()
+
+        self.assertEqual(queue.name, 'st2.trigger_instances_dispatch.rules_engine.buckets-1-3')
+        self.assertEqual(sorted([b.routing_key for b in queue.bindings]),
+                         ['trigger_instance.1.#', 'trigger_instance.3.#'])
+        self.assertTrue(all([b.exchange == reactor.TRIGGER_INSTANCE_XCHG
+                             for b in queue.bindings]))
+
+    def test_invalid_buckets(self):
+        cfg.CONF.set_override(name='buckets', override=['1000'], group='rulesengine')
+        self.assertRaises(ValueError, worker.get_rules_engine_queue)
@@ -57,6 +57,7 @@ def _register_config_opts():
     _register_scheduler_opts()
     _register_exporter_opts()
     _register_sensor_container_opts()
+    _register_rules_engine_opts()
 
 
 def _override_db_opts():
@@ -72,6 +73,9 @@ def _override_common_opts():
     CONF.set_override(name='mask_secrets', override=True, group='log')
     CONF.set_override(name='url', override='zake://', group='coordination')
     CONF.set_override(name='lock_timeout', override=1, group='coordination')
+    # Tests drop the database between the test cases which would leave stale cache entries.
+    CONF.set_override(name='enabled', override=False, group='metadata_cache')
+    CONF.set_override(name='enabled', override=False, group='datastore_cache')
 
 
 def _register_common_opts():
@@ -213,6 +217,22 @@ def _register_sensor_container_opts():
     _register_cli_opts([sensor_test_opt])
 
 
+def _register_rules_engine_opts():
+    sharding_opts = [
+        cfg.ListOpt('buckets', default=[],
+                    help='Trigger instance buckets this rules engine processes.')
+    ]
+    _register_opts(sharding_opts, group='rulesengine')
+
+    trigger_instance_opts = [
+        cfg.IntOpt('trigger_instance_batch_size', default=1,
+                   help='Max number of trigger instances saved as a single bulk write.'),
+        cfg.FloatOpt('trigger_instance_batch_window', default=0.01,
+                     help='Time in seconds to wait for more trigger instances.')
+    ]
+    _register_opts(trigger_instance_opts, group='rulesengine')
+
+
 def _register_opts(opts, group=None):
     CONF.register_opts(opts, group)
 
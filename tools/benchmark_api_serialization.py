@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which compares the per item cost of turning the documents retrieved from the
+database into the API objects of the listing endpoints: the document path (model instance
+construction + from_model) versus the raw document path (from_raw_document).
+"""
+
+import argparse
+import copy
+import timeit
+
+import bson
+
+from st2common import config
+from st2common.models.api.action import ActionAPI
+from st2common.models.api.execution import ActionExecutionAPI
+from st2common.models.api.trigger import TriggerInstanceAPI
+from st2tests.fixturesloader import FixturesLoader
+
+FIXTURES_PACK = 'generic'
+FIXTURES = {
+    'actions': ['local.yaml'],
+    'executions': ['execution1.yaml'],
+    'triggerinstances': ['trigger_instance_1.yaml']
+}
+API_MODELS = {
+    'actions': ActionAPI,
+    'executions': ActionExecutionAPI,
+    'triggerinstances': TriggerInstanceAPI
+}
+
+
+def _get_raw_documents(result_size):
+    models = FixturesLoader().load_models(fixtures_pack=FIXTURES_PACK, fixtures_dict=FIXTURES)
+
+    for fixture_type, fixtures in models.items():
+        for fixture, model in fixtures.items():
+            model.id = model.id or bson.ObjectId()
+            api_cls = API_MODELS[fixture_type]
+            yield '%s/%s' % (fixture_type, fixture), api_cls, model.to_mongo().to_dict()
+
+            if result_size and fixture_type == 'executions':
+                model = copy.deepcopy(model)
+                model.result = {
+                    'stdout': 'line of output\n' * (result_size // 15),
+                    'stderr': '',
+                    'return_code': 0
+                }
+                yield ('%s/%s (large result)' % (fixture_type, fixture), api_cls,
+                       model.to_mongo().to_dict())
+
+
+def main(iterations, result_size):
+    print('%-50s %15s %15s' % ('fixture', 'model (us)', 'raw (us)'))
+    for name, api_cls, raw_doc in _get_raw_documents(result_size=result_size):
+        model_cls = api_cls.model
+
+        model_time = timeit.timeit(
+            lambda: api_cls.from_model(model_cls._from_son(raw_doc), mask_secrets=True),
+            number=iterations)
+        raw_time = timeit.timeit(
+            lambda: api_cls.from_raw_document(raw_doc, mask_secrets=True),
+            number=iterations)
+
+        print('%-50s %15.2f %15.2f' % (name, model_time / iterations * 1000000,
+                                       raw_time / iterations * 1000000))
+
+
+if __name__ == '__main__':
+    config.parse_args(args={})
+    parser = argparse.ArgumentParser(description='API serialization benchmark')
+    parser.add_argument('--iterations', type=int, default=1000,
+                        help='Number of iterations for each measurement')
+    parser.add_argument('--result-size', type=int, default=64 * 1024,
+                        help='Size in bytes of the generated large execution result. 0 to skip.')
+    args = parser.parse_args()
+
+    main(iterations=args.iterations, result_size=args.result_size)
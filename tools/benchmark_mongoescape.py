@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which measures the cost of escaping and unescaping the keys of large nested
+execution results (as done on every read and write of the escaped fields). Deep copy of the same
+value is included as a reference, it's the lower bound of the implementations which copy the whole
+value.
+"""
+
+import argparse
+import copy
+import timeit
+
+from st2common.util import mongoescape
+
+
+def _get_result(width, depth, special_keys):
+    """
+    Generate a nested result with ``width`` keys on each level and ``depth`` levels.
+    """
+    separator = '.' if special_keys else '_'
+
+    def generate(level):
+        if level == depth:
+            return {'stdout': 'line of output\n' * 10, 'return_code': 0, 'items': range(10)}
+
+        value = {}
+        for index in range(width):
+            value['key%s%s' % (separator, index)] = generate(level + 1)
+        value['list'] = [{'host%s1' % (separator): generate(level + 1)}]
+        return value
+
+    return generate(0)
+
+
+def main(iterations, width, depth):
+    print('%-30s %15s %15s %15s' % ('result', 'deepcopy (ms)', 'escape (ms)',
+                                    'unescape (ms)'))
+
+    for special_keys in [False, True]:
+        result = _get_result(width=width, depth=depth, special_keys=special_keys)
+        escaped = mongoescape.escape_chars(result)
+
+        times = [
+            timeit.timeit(lambda: copy.deepcopy(result), number=iterations),
+            timeit.timeit(lambda: mongoescape.escape_chars(result), number=iterations),
+            timeit.timeit(lambda: mongoescape.unescape_chars(escaped), number=iterations)
+        ]
+
+        name = 'special keys' if special_keys else 'no special keys'
+        print('%-30s %15.3f %15.3f %15.3f' % ((name,) + tuple(time / iterations * 1000
+                                                             for time in times)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mongo key escaping benchmark')
+    parser.add_argument('--iterations', type=int, default=100,
+                        help='Number of iterations for each measurement')
+    parser.add_argument('--width', type=int, default=5,
+                        help='Number of keys on each level of the generated result')
+    parser.add_argument('--depth', type=int, default=5,
+                        help='Number of levels of the generated result')
+    args = parser.parse_args()
+
+    main(iterations=args.iterations, width=args.width, depth=args.depth)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which compares the publish throughput (messages per second) of PoolPublisher
+and BatchedPoolPublisher against the configured message broker.
+"""
+
+import argparse
+import time
+
+import eventlet
+from kombu import Exchange
+
+from st2common import config
+
+from st2common.transport import utils as transport_utils
+from st2common.transport.publishers import PoolPublisher, BatchedPoolPublisher
+
+
+def _monkey_patch():
+    eventlet.monkey_patch(
+        os=True,
+        select=True,
+        socket=True,
+        thread=False,
+        time=True)
+
+
+def run(publisher, exchange, count, concurrency):
+    payload = {'benchmark': True, 'data': 'x' * 512}
+    pool = eventlet.GreenPool(concurrency)
+
+    start = time.time()
+    for _ in range(count):
+        pool.spawn_n(publisher.publish, payload, exchange, 'benchmark')
+    pool.waitall()
+    duration = time.time() - start
+
+    return count / duration
+
+
+def main(exchange, count, concurrency, batch_size, batch_window):
+    exchange = Exchange(exchange, type='topic')
+    urls = transport_utils.get_messaging_urls()
+
+    publishers = [
+        ('PoolPublisher', PoolPublisher(urls=urls)),
+        ('BatchedPoolPublisher', BatchedPoolPublisher(urls=urls, batch_size=batch_size,
+                                                      batch_window=batch_window)),
+    ]
+
+    for name, publisher in publishers:
+        rate = run(publisher=publisher, exchange=exchange, count=count,
+                   concurrency=concurrency)
+        print('%-25s %10.2f msg/s' % (name, rate))
+
+
+if __name__ == '__main__':
+    _monkey_patch()
+    config.parse_args(args={})
+    parser = argparse.ArgumentParser(description='Publisher benchmark')
+    parser.add_argument('--exchange', default='st2.benchmark',
+                        help='Exchange to publish the messages to')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='Number of messages to publish')
+    parser.add_argument('--concurrency', type=int, default=100,
+                        help='Number of greenthreads publishing concurrently')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Max number of messages in a batch')
+    parser.add_argument('--batch-window', type=float, default=0.01,
+                        help='Time in seconds to wait for a batch to fill up')
+    args = parser.parse_args()
+
+    main(exchange=args.exchange, count=args.count, concurrency=args.concurrency,
+         batch_size=args.batch_size, batch_window=args.batch_window)
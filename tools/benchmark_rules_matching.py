@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which measures the per trigger instance cost of matching the rules of a trigger:
+criteria compiled for every trigger instance (rules retrieved from the database), criteria
+compiled once when the rules are loaded and the discrimination network which evaluates the
+criteria shared by the rules only once (rules index). Rendering the patterns, which is skipped for
+the static ones, is included as a reference.
+"""
+
+import argparse
+import logging
+import timeit
+
+import bson
+
+from st2common.models.db.rule import RuleDB
+from st2common.models.db.trigger import TriggerDB, TriggerInstanceDB
+from st2common.util import date as date_utils
+from st2common.util.templating import render_template
+from st2reactor.rules.criteria import compile_criteria
+from st2reactor.rules.matcher import RulesMatcher
+from st2reactor.rules.network import RulesNetwork
+
+TRIGGER = TriggerDB(name='st2.webhook', pack='core', type='core.st2.webhook')
+PAYLOAD = {
+    'headers': {'Content-Type': 'application/json', 'X-Event': 'push'},
+    'body': {
+        'repository': 'st2',
+        'branch': 'master',
+        'commits': [{'id': 'abcd', 'author': 'user1'}],
+        'status': 'success'
+    }
+}
+
+
+def _get_rules(count):
+    rules = []
+
+    for index in range(count):
+        criteria = {
+            'trigger.headers.X-Event': {'type': 'equals', 'pattern': 'push'},
+            'trigger.body.repository': {'type': 'matchregex', 'pattern': 'st%s.*' % (index % 3)},
+            'trigger.body.branch': {'type': 'iequals', 'pattern': 'MASTER'},
+            'trigger.body.commits[0].author': {'type': 'contains', 'pattern': 'user'},
+            'trigger.body.status': {'type': 'nequals', 'pattern': 'failure'}
+        }
+        rules.append(RuleDB(id=bson.ObjectId(), name='rule%s' % (index), pack='benchmark',
+                            trigger=TRIGGER.get_reference().ref, criteria=criteria,
+                            enabled=True))
+
+    return rules
+
+
+def main(iterations, rules_count):
+    # Matcher logs every evaluated rule
+    logging.getLogger('st2reactor').setLevel(logging.WARNING)
+
+    rules = _get_rules(count=rules_count)
+    compiled_criteria = dict([(rule.id, compile_criteria(rule.criteria)) for rule in rules])
+    patterns = [criterion['pattern'] for rule in rules for criterion in rule.criteria.values()]
+    trigger_instance = TriggerInstanceDB(trigger=TRIGGER.get_reference().ref, payload=PAYLOAD,
+                                         occurrence_time=date_utils.get_datetime_utc_now())
+
+    def match(compiled_criteria=None):
+        matcher = RulesMatcher(trigger_instance=trigger_instance, trigger=TRIGGER, rules=rules,
+                               compiled_criteria=compiled_criteria)
+        return matcher.get_matching_rules()
+
+    network = RulesNetwork(rules=rules, compiled_criteria=compiled_criteria)
+    assert match() == network.get_matching_rules(trigger_instance=trigger_instance,
+                                                 trigger=TRIGGER)
+
+    times = [
+        timeit.timeit(lambda: match(), number=iterations),
+        timeit.timeit(lambda: match(compiled_criteria=compiled_criteria), number=iterations),
+        timeit.timeit(lambda: network.get_matching_rules(trigger_instance=trigger_instance,
+                                                         trigger=TRIGGER),
+                      number=iterations),
+        timeit.timeit(lambda: [render_template(value=pattern) for pattern in patterns],
+                      number=iterations)
+    ]
+
+    print('%-10s %20s %20s %20s %20s' % ('rules', 'per instance (ms)', 'precompiled (ms)',
+                                         'network (ms)', 'rendering (ms)'))
+    print('%-10s %20.3f %20.3f %20.3f %20.3f' % ((rules_count,) + tuple(time / iterations * 1000
+                                                                      for time in times)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rules matching benchmark')
+    parser.add_argument('--iterations', type=int, default=100,
+                        help='Number of matched trigger instances')
+    parser.add_argument('--rules', type=int, default=100,
+                        help='Number of rules of the trigger')
+    args = parser.parse_args()
+
+    main(iterations=args.iterations, rules_count=args.rules)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which compares encode / decode time and message size of the pickle and st2
+message bus serializers on the execution fixtures.
+"""
+
+import argparse
+import copy
+import timeit
+
+from kombu import serialization
+
+from st2common import config
+from st2common.transport import serializers
+from st2tests.fixturesloader import FixturesLoader
+
+FIXTURES_PACK = 'generic'
+FIXTURES = {
+    'executions': ['execution1.yaml'],
+    'liveactions': ['liveaction1.yaml', 'parentliveaction.yaml']
+}
+
+
+def _get_models(result_size):
+    models = FixturesLoader().load_models(fixtures_pack=FIXTURES_PACK, fixtures_dict=FIXTURES)
+
+    for fixture_type, fixtures in models.items():
+        for fixture, model in fixtures.items():
+            yield '%s/%s' % (fixture_type, fixture), model
+
+            if result_size:
+                model = copy.deepcopy(model)
+                model.result = {
+                    'stdout': 'line of output\n' * (result_size // 15),
+                    'stderr': '',
+                    'return_code': 0
+                }
+                yield '%s/%s (large result)' % (fixture_type, fixture), model
+
+
+def main(iterations, result_size):
+    accept = serialization.prepare_accept_content(serializers.ACCEPTED_SERIALIZERS)
+
+    print('%-50s %-7s %10s %12s %12s' % ('fixture', 'format', 'size', 'encode (us)',
+                                         'decode (us)'))
+    for name, model in _get_models(result_size=result_size):
+        for serializer in serializers.ACCEPTED_SERIALIZERS:
+            content_type, content_encoding, body = serializers.dumps(model,
+                                                                     serializer=serializer)
+
+            encode_time = timeit.timeit(lambda: serializers.dumps(model, serializer=serializer),
+                                        number=iterations)
+            decode_time = timeit.timeit(lambda: serialization.loads(body, content_type,
+                                                                    content_encoding,
+                                                                    accept=accept),
+                                        number=iterations)
+
+            print('%-50s %-7s %10s %12.2f %12.2f' % (name, serializer, len(body),
+                                                     encode_time / iterations * 1000000,
+                                                     decode_time / iterations * 1000000))
+
+
+if __name__ == '__main__':
+    config.parse_args(args={})
+    parser = argparse.ArgumentParser(description='Message bus serializers benchmark')
+    parser.add_argument('--iterations', type=int, default=1000,
+                        help='Number of iterations for each measurement')
+    parser.add_argument('--result-size', type=int, default=1024 * 1024,
+                        help='Size in bytes of the generated large result. 0 to skip.')
+    args = parser.parse_args()
+
+    main(iterations=args.iterations, result_size=args.result_size)
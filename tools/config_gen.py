@@ -30,6 +30,7 @@ CONFIGS = ['st2actions.config',
            'st2auth.config',
            'st2common.config',
            'st2exporter.config',
+           'st2reactor.garbage_collector.config',
            'st2reactor.rules.config',
            'st2reactor.sensor.config']
 
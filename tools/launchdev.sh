@@ -112,6 +112,12 @@ function st2start(){
         ./st2reactor/bin/st2rulesengine \
         --config-file $ST2_CONF
 
+    # Run the garbage collector
+    echo 'Starting screen session st2-garbagecollector...'
+    screen -d -m -S st2-garbagecollector ./virtualenv/bin/python \
+        ./st2reactor/bin/st2garbagecollector \
+        --config-file $ST2_CONF
+
     # Run the results tracker
     echo 'Starting screen session st2-resultstracker...'
     screen -d -m -S st2-resultstracker ./virtualenv/bin/python \
@@ -146,6 +152,7 @@ function st2start(){
         "${RUNNER_SCREENS[@]}"
         "st2-sensorcontainer"
         "st2-rulesengine"
+        "st2-garbagecollector"
         "st2-resultstracker"
         "st2-notifier"
         "st2-auth"
@@ -20,9 +20,12 @@ A utility script that purges st2 executions older than certain
 timestamp.
 
 *** RISK RISK RISK. You will lose data. Run at your own risk. ***
+
+Note: st2garbagecollector service deletes old executions periodically based on the configured
+retention policies.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 import sys
 
 import eventlet
@@ -31,13 +34,12 @@ from oslo_config import cfg
 from st2common import config
 from st2common.models.db import db_setup
 from st2common.models.db import db_teardown
-from st2common.persistence.liveaction import LiveAction
-from st2common.persistence.execution import ActionExecution
+from st2common.services import retention
+from st2common.util import date as date_utils
 from st2common.util import isotime
 
 
 DEFAULT_TIMEDELTA_DAYS = 2  # in days
-DELETED_COUNT = 0
 
 
 def _monkey_patch():
@@ -58,32 +60,19 @@ def do_register_cli_opts(opts, ignore_errors=False):
                 raise
 
 
-def _purge_action_models(execution_db):
-    liveaction_id = execution_db.liveaction['id']
+def _get_timestamp(timestamp=None):
+    """
+    Return the UTC timestamp before which the executions are purged.
 
-    if not liveaction_id:
-        print('Invalid LiveAction id. Skipping delete: %s', execution_db)
+    :param timestamp: ISO8601 timestamp. Defaults to DEFAULT_TIMEDELTA_DAYS ago.
+    :type timestamp: ``str``
 
-    liveaction_db = None
-    try:
-        liveaction_db = LiveAction.get_by_id(liveaction_id)
-    except:
-        print('LiveAction with id: %s not found. Skipping delete.', liveaction_id)
-    else:
-        global DELETED_COUNT
-        DELETED_COUNT += 1
+    :rtype: ``datetime.datetime``
+    """
+    if not timestamp:
+        return date_utils.get_datetime_utc_now() - timedelta(days=DEFAULT_TIMEDELTA_DAYS)
 
-    try:
-        ActionExecution.delete(execution_db)
-    except Exception as e:
-        print('Exception deleting Execution model: %s, exception: %s',
-              execution_db, str(e))
-    else:
-        try:
-            LiveAction.delete(liveaction_db)
-        except Exception as e:
-            print('Zombie LiveAction left in db: %s. Exception: %s',
-                  liveaction_db, str(e))
+    return isotime.parse(timestamp)
 
 
 def _purge_executions(timestamp=None, action_ref=None):
@@ -91,31 +80,15 @@ def _purge_executions(timestamp=None, action_ref=None):
         print('Specify a valid timestamp to purge.')
         return
 
-    if not action_ref:
-        action_ref = ''
-
     print('Purging executions older than timestamp: %s' %
           timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
 
-    def should_delete(execution_db):
-        if action_ref != '':
-            return (execution_db.liveaction['action'] == action_ref
-                    and execution_db.start_timestamp < timestamp)
-        else:
-            return execution_db.start_timestamp < timestamp
-
-    # XXX: Think about paginating this call.
-    filters = {'start_timestamp__lt': isotime.parse(timestamp)}
-    executions = ActionExecution.query(**filters)
-    executions_to_delete = filter(should_delete, executions)
-    print('#### Total number of executions to delete: %d' % len(executions_to_delete))
-
-    # Purge execution and liveaction models now
-    for execution_db in executions_to_delete:
-        _purge_action_models(execution_db)
+    # Executions are deleted in batches together with their liveactions, stored results and
+    # trace components
+    deleted_count = retention.purge_executions(timestamp=timestamp, action_ref=action_ref)
 
     # Print stats
-    print('#### Total execution models deleted: %d' % DELETED_COUNT)
+    print('#### Total execution models deleted: %d' % deleted_count)
 
 
 def main():
@@ -142,14 +115,8 @@ def main():
     db_setup(cfg.CONF.database.db_name, cfg.CONF.database.host, cfg.CONF.database.port,
              username=username, password=password)
 
-    if not timestamp:
-        now = datetime.now()
-        timestamp = now - timedelta(days=DEFAULT_TIMEDELTA_DAYS)
-    else:
-        timestamp = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ')
-
     # Purge models.
-    _purge_executions(timestamp=timestamp, action_ref=action_ref)
+    _purge_executions(timestamp=_get_timestamp(timestamp), action_ref=action_ref)
 
     # Disconnect from db.
     db_teardown()
@@ -26,6 +26,7 @@ from kombu.mixins import ConsumerMixin
 from kombu import Connection, Exchange, Queue
 
 from st2common import config
+from st2common.transport import serializers
 from st2common.transport import utils as transport_utils
 
 
@@ -36,7 +37,7 @@ class QueueConsumer(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         return [Consumer(queues=[self.queue],
-                         accept=['pickle'],
+                         accept=serializers.ACCEPTED_SERIALIZERS,
                          callbacks=[self.process_task])]
 
     def process_task(self, body, message):
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which prints the slowest database query shapes recorded by the query profiler
+(see the ``query_profiler`` config section) and suggests the missing compound indexes for them.
+
+Profiles of all the processes in the profile directory (or the ``query_profiles`` directory of
+an extracted st2debug tarball) are merged.
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+
+from oslo_config import cfg
+
+from st2common import config
+from st2common.models.db import MODEL_MODULE_NAMES
+from st2common.models.db import indexadvisor
+
+
+def _load_profiles(dump_dir):
+    profiles = []
+
+    for file_path in sorted(glob.glob(os.path.join(dump_dir, '*.json'))):
+        with open(file_path, 'r') as fp:
+            profiles.append(json.load(fp))
+
+    return profiles
+
+
+def _get_models():
+    models = {}
+
+    for module_name in MODEL_MODULE_NAMES:
+        module = importlib.import_module(module_name)
+        for model in getattr(module, 'MODELS', []):
+            models[model._get_collection_name()] = model
+
+    return models
+
+
+def _format_fields(fields):
+    return ', '.join(['%s:%s' % (name, value) for name, value in fields])
+
+
+def _format_index(index):
+    return json.dumps([('-' if direction < 0 else '') + field for field, direction in index])
+
+
+def main(dump_dir, top, include_all):
+    profiles = _load_profiles(dump_dir=dump_dir)
+
+    if not profiles:
+        print('No query profiles found in "%s".' % (dump_dir))
+        return
+
+    shapes = indexadvisor.merge_query_profiles(profiles)
+    slow_shapes = [shape for shape in shapes if shape['slow_count']]
+
+    print('Slowest query shapes (%s profiles, %s shapes, %s with slow queries):' %
+          (len(profiles), len(shapes), len(slow_shapes)))
+
+    for shape in (shapes if include_all else slow_shapes)[:top]:
+        print('')
+        print('  %s.%s filter=[%s] sort=[%s]' % (shape['collection'], shape['operation'],
+                                                 _format_fields(shape['filter']),
+                                                 _format_fields(shape['sort'])))
+        print('    count=%s slow=%s total=%.3fs max=%.3fs avg documents=%.1f' %
+              (shape['count'], shape['slow_count'], shape['total_time'], shape['max_time'],
+               float(shape['documents']) / shape['count']))
+        if shape['explain']:
+            print('    explain: %s' % (json.dumps(shape['explain'], sort_keys=True)))
+
+    suggestions = indexadvisor.suggest_indexes(shapes=shapes, models=_get_models(),
+                                               slow_only=not include_all)
+
+    print('')
+    print('Suggested indexes (%s):' % (len(suggestions)))
+
+    for suggestion in suggestions:
+        print('')
+        print('  %s (%s): {"fields": %s}' % (suggestion['model'], suggestion['collection'],
+                                             _format_index(suggestion['index'])))
+        print('    queries=%s total=%.3fs' % (suggestion['count'], suggestion['total_time']))
+
+
+if __name__ == '__main__':
+    config.parse_args(args={})
+    parser = argparse.ArgumentParser(description='Query profile index advisor')
+    parser.add_argument('--dump-dir', default=cfg.CONF.query_profiler.dump_dir,
+                        help='Directory with the query profiles')
+    parser.add_argument('--top', type=int, default=20,
+                        help='Number of printed query shapes')
+    parser.add_argument('--all', action='store_true', default=False,
+                        help='Include the shapes without slow queries')
+    args = parser.parse_args()
+
+    main(dump_dir=args.dump_dir, top=args.top, include_all=args.all)